@@ -6,14 +6,18 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_smorest import Api
 from flask_mail import Mail
+from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 
-from resources.game import blp as GameBlueprint
+from resources.game import blp as GameBlueprint, load_game_search_index, random_game_pool
 from resources.word import blp as WordBlueprint
 from resources.user import blp as UserBlueprint
 from resources.flag import blp as FlagBlueprint
 from resources.utils import blp as UtilBlueprint
-from blocklist import BLOCKLIST
+from blocklist import revocation_store
+from google_login import GoogleTokenVerifier
+from mail_queue import flag_mail_sender
+from votes import vote_aggregator
 from db import db
 
 import models
@@ -39,11 +43,11 @@ def create_app(db_url=None):
     app.config['JWT_REFRESH_COOKIE_NAME'] = 'refresh_token_cookie'
     app.config['JWT_COOKIE_DOMAIN'] = os.getenv('BASE_DOMAIN')
     app.config['SESSION_COOKIE_SECURE'] = True
-    app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-    app.config['MAIL_PORT'] = 587
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
     app.config['MAIL_USERNAME'] = os.getenv('SEND_EMAIL')
     app.config['MAIL_PASSWORD'] = os.getenv('SEND_EMAIL_PASSWORD')
-    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
 
     with open('access.txt', 'r') as cred:
         os.environ['IGDB_ACCESS_TOKEN'] = cred.read()
@@ -54,13 +58,14 @@ def create_app(db_url=None):
     api = Api(app)
     mail = Mail(app)
     jwt = JWTManager(app)
+    app.extensions['google_token_verifier'] = GoogleTokenVerifier(os.getenv('GOOGLE_CLIENT_ID'))
 
 
     @jwt.additional_claims_loader
     def add_claims_to_jwt(identity):
         additional_claims = {}
-        user_roles = models.RoleModel.query.filter_by(user_id=identity).first()
-        if user_roles and user_roles.admin == True:
+        user_access = models.get_user_access(int(identity))
+        if user_access and user_access.is_admin:
             additional_claims['is_admin'] = True
         return additional_claims
 
@@ -78,7 +83,7 @@ def create_app(db_url=None):
     
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blocklist(jwt_header, jwt_payload):
-        return jwt_payload['jti'] in BLOCKLIST
+        return revocation_store.is_revoked(jwt_payload['jti'])
     
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
@@ -88,7 +93,8 @@ def create_app(db_url=None):
                     'message': 'The token has been revoked.',
                     'error': 'token_revoked'
                 }
-            )
+            ),
+            401
         )
     
     @jwt.unauthorized_loader
@@ -119,6 +125,24 @@ def create_app(db_url=None):
     #     app.before_request_funcs[None].remove(create_tables)
     #     db.create_all()
 
+    with app.app_context():
+        try:
+            load_game_search_index()
+            models.load_word_suggestion_index()
+            models.load_random_word_index()
+            models.preload_admin_access()
+            if os.getenv('RANDOM_GAME_POOL_WARM_ON_START', 'true').lower() == 'true':
+                random_game_pool.start(app)
+        except SQLAlchemyError:
+            # Tables don't exist yet (e.g. before the first migration); the indexes build on first use instead.
+            db.session.rollback()
+
+    if os.getenv('VOTE_WRITE_BEHIND', 'false').lower() == 'true':
+        vote_aggregator.start(app)
+    # Off by default so CLI runs (e.g. `flask db upgrade`) do not send queued mail; the server turns it on.
+    if os.getenv('FLAG_MAIL_SENDER', 'false').lower() == 'true':
+        flag_mail_sender.start(app)
+
     api.register_blueprint(GameBlueprint)
     api.register_blueprint(WordBlueprint)
     app.register_blueprint(UserBlueprint)
@@ -1 +1,176 @@
-BLOCKLIST = set()
\ No newline at end of file
+import hashlib
+import logging
+import math
+import os
+import threading
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from time import monotonic
+
+from db import db, utc_now
+from models import RevokedTokenModel
+from models.upsert import upsert_rows
+
+
+logger = logging.getLogger(__name__)
+
+
+def token_expiry(jwt_payload: dict) -> datetime:
+    '''When a decoded token stops being valid anyway, as a naive UTC datetime like the rest of the database.'''
+    return datetime.fromtimestamp(jwt_payload['exp'], timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    '''Set membership with no false negatives and about `error_rate` false positives while holding up to `capacity` items.'''
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class MemoryRevocationStore:
+    '''Revoked token ids kept in this process only. Fine for a single worker and for tests.'''
+
+    def __init__(self):
+        self._expiries = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._expiries[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            expires_at = self._expiries.get(jti)
+            if expires_at is not None and expires_at <= utc_now():
+                del self._expiries[jti]
+                expires_at = None
+        return expires_at is not None
+
+    def purge_expired(self):
+        now = utc_now()
+        with self._lock:
+            self._expiries = {jti: expires_at for jti, expires_at in self._expiries.items() if expires_at > now}
+
+
+class DatabaseRevocationStore:
+    '''Revoked token ids in the revoked_tokens table, shared by every worker.
+
+    Each worker answers from a Bloom filter of the unexpired ids, so a token that was never revoked is
+    rejected without touching the database. Only filter hits (revoked tokens and rare false positives)
+    are confirmed with a primary key lookup. Every `refresh_interval` seconds the filter picks up ids
+    revoked by other workers. Every `rebuild_interval` seconds it is rebuilt from scratch and expired
+    rows are purged.
+    '''
+
+    # Overlap between incremental refreshes, covering clock skew between workers.
+    refresh_overlap = timedelta(seconds=5)
+
+    def __init__(self, refresh_interval: float, rebuild_interval: float, capacity: int):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self._filter = BloomFilter(capacity)
+        self._built_at = None
+        self._refreshed_at = None
+        self._seen_until = None
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: datetime):
+        with db.engine.begin() as connection:
+            upsert_rows(connection, RevokedTokenModel.__table__, ['jti'], [{'jti': jti, 'revoked_at': utc_now(), 'expires_at': expires_at}])
+        with self._lock:
+            self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._refresh_if_due()
+        if jti not in self._filter:
+            return False
+        return db.session.scalar(
+            select(RevokedTokenModel.jti).where(RevokedTokenModel.jti == jti, RevokedTokenModel.expires_at > utc_now())
+        ) is not None
+
+    def invalidate(self):
+        '''Forget the filter so it is rebuilt on next use.'''
+        self._built_at = self._refreshed_at = None
+
+    def _refresh_if_due(self):
+        now = monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at <= self.refresh_interval:
+            return
+        if self._built_at is None or now - self._built_at > self.rebuild_interval:
+            self.rebuild()
+        else:
+            self.refresh()
+
+    def purge_expired(self, connection):
+        connection.execute(delete(RevokedTokenModel).where(RevokedTokenModel.expires_at <= utc_now()))
+
+    def rebuild(self):
+        started_at = monotonic()
+        seen_until = utc_now()
+        try:
+            with db.engine.begin() as connection:
+                self.purge_expired(connection)
+                jtis = connection.scalars(select(RevokedTokenModel.jti)).all()
+        except SQLAlchemyError:
+            logger.exception('Rebuilding the token revocation filter failed')
+            self._refreshed_at = started_at
+            return
+        bloom_filter = BloomFilter(max(self.capacity, 2 * len(jtis)))
+        for jti in jtis:
+            bloom_filter.add(jti)
+        with self._lock:
+            self._filter = bloom_filter
+            self._built_at = self._refreshed_at = started_at
+            self._seen_until = seen_until
+
+    def refresh(self):
+        started_at = monotonic()
+        seen_until = utc_now()
+        try:
+            with db.engine.connect() as connection:
+                jtis = connection.scalars(
+                    select(RevokedTokenModel.jti).where(RevokedTokenModel.revoked_at >= self._seen_until - self.refresh_overlap)
+                ).all()
+        except SQLAlchemyError:
+            logger.exception('Refreshing the token revocation filter failed')
+            self._refreshed_at = started_at
+            return
+        with self._lock:
+            for jti in jtis:
+                self._filter.add(jti)
+            self._refreshed_at = started_at
+            self._seen_until = seen_until
+
+
+def build_revocation_store():
+    if os.getenv('REVOCATION_STORE', 'database') == 'memory':
+        return MemoryRevocationStore()
+    return DatabaseRevocationStore(
+        refresh_interval=float(os.getenv('REVOCATION_REFRESH_INTERVAL', 30)),
+        rebuild_interval=float(os.getenv('REVOCATION_REBUILD_INTERVAL', 3600)),
+        capacity=int(os.getenv('REVOCATION_BLOOM_CAPACITY', 100000))
+    )
+
+
+revocation_store = build_revocation_store()
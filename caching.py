@@ -0,0 +1,244 @@
+import threading
+
+from collections import OrderedDict
+from time import monotonic
+
+
+class TTLCache:
+    '''A thread-safe, size-bounded mapping whose entries expire after `ttl` seconds. Least recently used entries are evicted first.'''
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class VersionPoller:
+    '''Reads a version number shared with other processes, at most every `interval` seconds, and reports when it changed.
+
+    The first read counts as a change, since nothing is known about what happened before it.
+    '''
+
+    def __init__(self, read, interval: float):
+        self.read = read
+        self.interval = interval
+        self._seen = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def changed(self) -> bool:
+        now = monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.interval:
+                return False
+        version = self.read()
+        with self._lock:
+            changed = self._checked_at is None or version != self._seen
+            self._seen, self._checked_at = version, now
+        return changed
+
+    def reset(self):
+        with self._lock:
+            self._seen = self._checked_at = None
+
+
+class SharedGenerations:
+    '''Generation counters shared with other processes. `read(scopes)` returns {scope: generation} for the scopes
+    it knows; each scope is re-read at most every `interval` seconds.
+    '''
+
+    def __init__(self, read, interval: float):
+        self.read = read
+        self.interval = interval
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, scopes: tuple) -> tuple:
+        now = monotonic()
+        with self._lock:
+            expired = [scope for scope in scopes if scope not in self._values or now - self._values[scope][1] >= self.interval]
+        if expired:
+            generations = self.read(expired)
+            with self._lock:
+                for scope in expired:
+                    self._values[scope] = (generations.get(scope, 0), now)
+        with self._lock:
+            return tuple(self._values[scope][0] for scope in scopes)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class GenerationCache:
+    '''A TTLCache whose entries go stale as soon as a generation counter they depend on is bumped.
+
+    A caller takes a `stamp` of the scopes its value depends on before computing it, and stores the value
+    under that stamp. Writers `bump` the scopes they touched, so only the entries depending on them are
+    dropped, and a value computed while a write landed is never served. An optional `epoch` callable
+    reads a counter shared with other processes, at most every `epoch_check_interval` seconds; when it
+    changes, every entry goes stale. An optional `shared_generations` callable (see SharedGenerations)
+    reads per-scope generations that writers in other processes bump, so their writes drop only the
+    entries depending on the scopes they touched, within `shared_check_interval` seconds.
+    '''
+
+    def __init__(self, ttl: float, max_entries: int, epoch=None, epoch_check_interval: float = 10,
+                 shared_generations=None, shared_check_interval: float = 5):
+        self.epoch = VersionPoller(epoch, epoch_check_interval) if epoch is not None else None
+        self.shared = SharedGenerations(shared_generations, shared_check_interval) if shared_generations is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._entries = TTLCache(ttl, max_entries)
+        self._generations = {}
+        self._base_generation = 0
+        self._lock = threading.Lock()
+
+    def stamp(self, scopes: tuple) -> tuple:
+        if self.epoch is not None and self.epoch.changed():
+            with self._lock:
+                self._base_generation += 1
+        shared = self.shared.get(scopes) if self.shared is not None else ()
+        with self._lock:
+            return (self._base_generation, *(self._generations.get(scope, 0) for scope in scopes), *shared)
+
+    def get(self, key, stamp: tuple, default=None):
+        entry = self._entries.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] != stamp:
+                self.stale += 1
+                self.misses += 1
+                return default
+            self.hits += 1
+        return entry[1]
+
+    def set(self, key, stamp: tuple, value):
+        self._entries.set(key, (stamp, value))
+
+    def bump(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        if self.epoch is not None:
+            self.epoch.reset()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict:
+        entries = self._entries.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': entries['size'],
+                'max_entries': entries['max_entries'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': entries['evictions'],
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    '''Collapses concurrent calls that share a key into one call whose result (or error) every caller receives.'''
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._in_flight[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared, 'in_flight': len(self._in_flight)}
@@ -1,5 +1,6 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
 
@@ -13,4 +14,14 @@ migrate_constraint_naming_convention = {
 }
 
 metadata = MetaData(naming_convention=migrate_constraint_naming_convention)
-db = SQLAlchemy(metadata=metadata)
\ No newline at end of file
+db = SQLAlchemy(metadata=metadata)
+
+
+def utc_now() -> datetime:
+    '''The current time as a naive UTC datetime, for timestamps compared across workers and sent in HTTP headers.'''
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def thread_app_context():
+    '''A new app context for the current app. Create it in a request and enter it in a background thread.'''
+    return current_app._get_current_object().app_context()
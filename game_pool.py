@@ -0,0 +1,99 @@
+import logging
+import threading
+
+from collections import deque
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+
+class RefillingPool:
+    '''A bounded pool of ready-to-serve items that a background thread tops up whenever it drops below `low_water`.
+
+    `refill(count)` produces up to `count` new items and runs inside the Flask app context given to `start` or `pop`.
+    '''
+
+    def __init__(self, size: int, low_water: int, refill):
+        self.size = size
+        self.low_water = low_water
+        self.refill = refill
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._app = None
+        self._served = 0
+        self._empty = 0
+        self._refills = 0
+        self._refill_failures = 0
+        self._last_refill_seconds = None
+
+    def start(self, app):
+        '''Remember the app and begin filling the pool in the background.'''
+        self._app = app
+        self.trigger_refill()
+
+    def pop(self, app=None):
+        '''Take an item without blocking. Returns None when the pool is empty.'''
+        if app is not None:
+            self._app = app
+        with self._lock:
+            item = self._items.popleft() if self._items else None
+            if item is None:
+                self._empty += 1
+            else:
+                self._served += 1
+            needs_refill = len(self._items) < self.low_water
+        if needs_refill:
+            self.trigger_refill()
+        return item
+
+    def trigger_refill(self):
+        with self._lock:
+            if self._refilling or self._app is None:
+                return
+            self._refilling = True
+        threading.Thread(target=self._run_refill, name='refilling-pool', daemon=True).start()
+
+    def _run_refill(self):
+        started_at = monotonic()
+        try:
+            with self._app.app_context():
+                items = self.refill(self.size - len(self._items))
+            with self._lock:
+                self._items.extend(items[:max(self.size - len(self._items), 0)])
+                self._refills += 1
+        except Exception:
+            logger.exception('Refilling pool failed')
+            with self._lock:
+                self._refill_failures += 1
+        finally:
+            with self._lock:
+                self._refilling = False
+                self._last_refill_seconds = monotonic() - started_at
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def items(self) -> list:
+        '''A copy of the items waiting in the pool.'''
+        with self._lock:
+            return list(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._items),
+                'capacity': self.size,
+                'low_water': self.low_water,
+                'refilling': self._refilling,
+                'served': self._served,
+                'empty': self._empty,
+                'refills': self._refills,
+                'refill_failures': self._refill_failures,
+                'last_refill_seconds': self._last_refill_seconds
+            }
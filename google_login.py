@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import threading
+
+from google.auth import exceptions as google_exceptions, jwt
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+
+class GoogleTokenError(Exception):
+    '''The ID token is malformed, expired, for another audience or not signed by Google.'''
+
+
+class GoogleCertsError(Exception):
+    '''Google's signing certificates could not be fetched and none are cached.'''
+
+
+def cache_control_max_age(cache_control: str | None) -> float | None:
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return float(match.group(1)) if match else None
+
+
+class GoogleCertCache:
+    '''Google's token signing certificates, cached for as long as Cache-Control allows.
+
+    Once `refresh_ahead` of that lifetime has passed, a background fetch replaces them, so requests only
+    wait on Google when the cache is empty or fully expired. If a fetch fails, the expired certificates
+    are still used, because Google keeps signing with a key for some time after rotating it out.
+    '''
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, fetch=None, default_max_age: float = 3600,
+                 refresh_ahead: float = 0.8, min_forced_interval: float = 60, clock=monotonic):
+        self.url = url
+        self.fetch = fetch or self._fetch_from_google
+        self.default_max_age = default_max_age
+        self.refresh_ahead = refresh_ahead
+        self.min_forced_interval = min_forced_interval
+        self.clock = clock
+        self._certs = None
+        self._fetched_at = None
+        self._max_age = default_max_age
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.fetches = 0
+        self.fetch_failures = 0
+
+    def _get_session(self) -> Session:
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            session = Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=int(os.getenv('GOOGLE_POOL_SIZE', 4))))
+            self._session, self._session_pid = session, pid
+        return self._session
+
+    def _fetch_from_google(self) -> tuple[dict, float | None]:
+        '''Return the certificates and their max-age in seconds.'''
+        response = self._get_session().get(self.url, timeout=(3.05, 5))
+        response.raise_for_status()
+        return response.json(), cache_control_max_age(response.headers.get('Cache-Control'))
+
+    def get(self, force: bool = False) -> dict:
+        '''The current certificates. `force` refetches, at most once per `min_forced_interval`, e.g. for an unknown key id.'''
+        with self._lock:
+            certs, fetched_at, max_age = self._certs, self._fetched_at, self._max_age
+        if certs is None:
+            return self._refresh(fetched_at)
+        age = self.clock() - fetched_at
+        if age >= max_age or (force and age >= self.min_forced_interval):
+            return self._refresh(fetched_at)
+        if age >= max_age * self.refresh_ahead:
+            self._refresh_in_background()
+        return certs
+
+    def _refresh(self, seen_fetched_at) -> dict:
+        with self._refresh_lock:
+            if self._fetched_at != seen_fetched_at:
+                # Another thread fetched while this one waited.
+                return self._certs
+            try:
+                certs, max_age = self.fetch()
+            except (RequestException, ValueError) as error:
+                self.fetch_failures += 1
+                if self._certs is None:
+                    raise GoogleCertsError(str(error)) from error
+                logger.warning('Fetching Google certificates failed, keeping the cached ones: %s', error)
+                return self._certs
+            with self._lock:
+                self._certs = certs
+                self._fetched_at = self.clock()
+                self._max_age = max_age if max_age is not None else self.default_max_age
+                self.fetches += 1
+            return certs
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            seen_fetched_at = self._fetched_at
+
+        def run():
+            try:
+                self._refresh(seen_fetched_at)
+            except GoogleCertsError:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='google-certs-refresh', daemon=True).start()
+
+
+class GoogleTokenVerifier:
+    '''Verifies Google ID tokens against cached certificates instead of fetching them on every login.'''
+
+    def __init__(self, client_id: str | None, cert_cache: GoogleCertCache | None = None, clock_skew: int = 10):
+        self.client_id = client_id
+        self.cert_cache = cert_cache or GoogleCertCache()
+        self.clock_skew = clock_skew
+
+    def verify(self, token: str) -> dict:
+        '''Return the token's claims, raising GoogleTokenError if it isn't a valid Google ID token for our client.'''
+        try:
+            key_id = jwt.decode_header(token).get('kid')
+        except (ValueError, google_exceptions.GoogleAuthError) as error:
+            raise GoogleTokenError(str(error)) from error
+
+        certs = self.cert_cache.get()
+        if key_id and key_id not in certs:
+            certs = self.cert_cache.get(force=True)
+        try:
+            claims = jwt.decode(token, certs=certs, audience=self.client_id, clock_skew_in_seconds=self.clock_skew)
+        except (ValueError, google_exceptions.GoogleAuthError) as error:
+            raise GoogleTokenError(str(error)) from error
+
+        if claims.get('iss') not in GOOGLE_ISSUERS:
+            raise GoogleTokenError('Unknown token source')
+        return claims
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+from datetime import datetime
+from flask import current_app, json, request
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+
+# Cache-Control per endpoint, overridable with CACHE_CONTROL_<NAME>, e.g.
+# CACHE_CONTROL_WORD='public, max-age=300'. An empty value sends no header.
+CACHE_CONTROL_DEFAULTS = {
+    'word': 'public, max-age=60',
+    'game': 'public, max-age=3600'
+}
+
+
+def cache_control(name: str) -> str | None:
+    return os.getenv(f'CACHE_CONTROL_{name.upper()}', CACHE_CONTROL_DEFAULTS[name]) or None
+
+
+def content_etag(data) -> str:
+    '''An ETag for data that has no version of its own, hashed from its JSON form.'''
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_headers(name: str, etag: str, last_modified: datetime | None = None) -> dict:
+    '''Validator and Cache-Control headers for the response of endpoint `name`. `last_modified` is naive UTC.'''
+    headers = {'ETag': quote_etag(etag)}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    policy = cache_control(name)
+    if policy:
+        headers['Cache-Control'] = policy
+    return headers
+
+
+def not_modified(headers: dict):
+    '''A 304 response if the request's If-None-Match / If-Modified-Since match `headers`, otherwise None.
+
+    Call it before loading anything the body needs, so a revalidation costs only the version lookup.
+    '''
+    modified = is_resource_modified(
+        request.environ,
+        etag=headers['ETag'],
+        last_modified=headers.get('Last-Modified')
+    )
+    if modified:
+        return None
+    return current_app.response_class(status=304, headers=headers)
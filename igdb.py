@@ -0,0 +1,212 @@
+import os
+import threading
+
+from datetime import datetime
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
+
+from caching import SingleFlight, TTLCache
+from ratelimit import RequestScheduler, SchedulerBusy, SQLiteSlots, SQLiteTokenBucket, TokenBucket
+
+
+IGDB_GAMES_URL = 'https://api.igdb.com/v4/games'
+GAME_FIELDS = 'name,summary,first_release_date,involved_companies,cover.url,slug'
+MAIN_GAME_FILTER = 'parent_game=null & game_type.type="Main Game" & version_parent=null'
+MAX_QUERY_LIMIT = 500
+
+
+class IGDBError(Exception):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> Session:
+    '''Return this worker's pooled IGDB session, creating it on first use (and again after a fork).'''
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                pool_size = int(os.getenv('IGDB_POOL_SIZE', 10))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+                session = Session()
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = pid
+    return _session
+
+
+def get_timeout() -> tuple[float, float]:
+    return (
+        float(os.getenv('IGDB_CONNECT_TIMEOUT', 3.05)),
+        float(os.getenv('IGDB_READ_TIMEOUT', 10))
+    )
+
+
+def build_query(where: str, fields: str = GAME_FIELDS, limit: int | None = None, offset: int | None = None) -> str:
+    query = f'where {where};\nfields {fields};'
+    if limit is not None:
+        query += f'\nlimit {limit};'
+    if offset is not None:
+        query += f'\noffset {offset};'
+    return query
+
+
+def normalize_game(game: dict) -> dict:
+    '''Convert an IGDB game payload into the shape GameSchema expects.'''
+    if 'first_release_date' in game:
+        game['first_release_date'] = datetime.fromtimestamp(game['first_release_date'])
+    if 'cover' in game:
+        game['cover_url'] = game['cover']['url']
+    return game
+
+
+def is_retryable(error: Exception) -> bool:
+    return isinstance(error, IGDBError) and error.status_code is not None and \
+        (error.status_code == 429 or error.status_code >= 500)
+
+
+def build_scheduler() -> RequestScheduler:
+    '''Build the IGDB request scheduler.
+
+    Setting IGDB_RATE_LIMIT_DB to a file path shares the rate budget and the IGDB_MAX_IN_FLIGHT cap between
+    workers; without it each worker gets its own budget and cap.
+    '''
+    rate = float(os.getenv('IGDB_RATE_LIMIT', 4))
+    max_in_flight = int(os.getenv('IGDB_MAX_IN_FLIGHT', 8))
+    rate_limit_db = os.getenv('IGDB_RATE_LIMIT_DB')
+    shared_slots = None
+    if rate_limit_db:
+        bucket = SQLiteTokenBucket(rate_limit_db, rate, capacity=rate)
+        # A lease outlives the slowest call, connect and read timeouts included, before it is reclaimed.
+        shared_slots = SQLiteSlots(rate_limit_db, max_in_flight, lease=sum(get_timeout()) + 5)
+    else:
+        bucket = TokenBucket(rate, capacity=rate)
+    return RequestScheduler(
+        bucket,
+        shared_slots=shared_slots,
+        max_in_flight=max_in_flight,
+        max_queue=int(os.getenv('IGDB_MAX_QUEUE', 32)),
+        max_wait=float(os.getenv('IGDB_MAX_WAIT', 5)),
+        max_retries=int(os.getenv('IGDB_MAX_RETRIES', 3)),
+        is_retryable=is_retryable
+    )
+
+
+scheduler = build_scheduler()
+_single_flight = SingleFlight()
+
+
+def _post_games(query: str) -> list[dict]:
+    headers = {
+        'Client-ID': os.getenv('IGDB_CLIENT_ID'),
+        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
+    }
+    try:
+        response = get_session().post(
+            IGDB_GAMES_URL,
+            headers=headers,
+            data=query,
+            timeout=get_timeout()
+        )
+    except RequestException as e:
+        raise IGDBError(f'IGDB request failed: {e}') from e
+
+    if response.status_code != 200:
+        raise IGDBError(f'IGDB responded with status {response.status_code}', response.status_code)
+    try:
+        games = response.json()
+    except ValueError as e:
+        raise IGDBError('IGDB returned a malformed response') from e
+
+    return [normalize_game(game) for game in games]
+
+
+def _scheduled_post_games(query: str) -> list[dict]:
+    try:
+        return scheduler.run(_post_games, query)
+    except SchedulerBusy as e:
+        raise IGDBError(f'IGDB request not scheduled: {e}', 503) from e
+
+
+def fetch_games(where: str, fields: str = GAME_FIELDS, limit: int | None = None, offset: int | None = None) -> list[dict]:
+    '''Run a query against the IGDB games endpoint and return the normalized results.
+
+    Concurrent callers sending the same query share a single request and its parsed result. Requests are
+    paced by the IGDB scheduler and retried with backoff on 429 and 5xx responses.
+    '''
+    query = build_query(' '.join(where.split()), fields, limit, offset)
+    return _single_flight.do(query, _scheduled_post_games, query)
+
+
+class GameCache:
+    '''Caches normalized IGDB games under both their id and their slug, so a lookup by either fills the other.'''
+
+    def __init__(self, ttl: float, max_entries: int):
+        self._cache = TTLCache(ttl, max_entries)
+
+    def get_by_id(self, game_id: int) -> dict | None:
+        return self._cache.get(('id', game_id))
+
+    def get_by_slug(self, slug: str) -> dict | None:
+        return self._cache.get(('slug', slug))
+
+    def put(self, game: dict):
+        if 'id' in game:
+            self._cache.set(('id', game['id']), game)
+        if 'slug' in game:
+            self._cache.set(('slug', game['slug']), game)
+
+    def invalidate(self, game_id: int | None = None, slug: str | None = None):
+        if game_id is not None:
+            self._cache.delete(('id', game_id))
+        if slug is not None:
+            self._cache.delete(('slug', slug))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+game_cache = GameCache(
+    ttl=float(os.getenv('IGDB_CACHE_TTL', 3600)),
+    max_entries=int(os.getenv('IGDB_CACHE_MAX_ENTRIES', 2048))
+)
+
+
+def fetch_game_by_id(game_id: int, where: str | None = None) -> dict | None:
+    where = f'id=({game_id})' + (f' & {where}' if where else '')
+    games = fetch_games(where)
+    return games[0] if games else None
+
+
+def fetch_game_by_slug(slug: str) -> dict | None:
+    games = fetch_games(f'slug="{slug}"')
+    return games[0] if games else None
+
+
+def fetch_games_by_ids(game_ids: list[int], batch_size: int = MAX_QUERY_LIMIT) -> list[dict]:
+    '''Fetch many games with as few `where id=(...)` queries as the IGDB page size allows.'''
+    games = []
+    game_ids = list(game_ids)
+    for start in range(0, len(game_ids), batch_size):
+        batch = game_ids[start:start + batch_size]
+        id_list = ','.join(str(game_id) for game_id in batch)
+        games.extend(fetch_games(f'id=({id_list})', limit=len(batch)))
+    return games
+
+
+def igdb_stats() -> dict:
+    return {
+        'scheduler': scheduler.stats(),
+        'single_flight': _single_flight.stats(),
+        'game_cache': game_cache.stats()
+    }
@@ -0,0 +1,210 @@
+import atexit
+import logging
+import os
+import smtplib
+import threading
+
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func, or_, select, update
+from time import monotonic
+from uuid import uuid4
+
+from db import db
+from models import FlagMailModel
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_flag_mail(subject: str, body: str) -> FlagMailModel:
+    '''Store a flag email for the background sender. Commits the current session.'''
+    mail = FlagMailModel(subject=subject, body=body, created_at=datetime.now())
+    db.session.add(mail)
+    db.session.commit()
+    flag_mail_sender.wake()
+    return mail
+
+
+class FlagMailSender:
+    '''Sends queued flag emails from a background thread over one SMTP connection that is reused between sends.
+
+    In digest mode, everything queued during an interval goes out as a single email. Otherwise each flag
+    is sent on its own as soon as the sender is woken. Mails are claimed with a lease before sending, so
+    every worker can run a sender without sending a mail twice.
+    '''
+
+    def __init__(self, interval: float, digest: bool = False, batch_size: int = 50, max_attempts: int = 5,
+                 lease: float = 300, idle_timeout: float = 60):
+        self.interval = interval
+        self.digest = digest
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.idle_timeout = idle_timeout
+        self._app = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._send_lock = threading.Lock()
+        self._connection = None
+        self._connection_used_at = None
+        self._sent = 0
+        self._emails = 0
+        self._failures = 0
+        self._send_seconds = 0.0
+        self._last_send_seconds = None
+
+    def start(self, app):
+        self._app = app
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='flag-mail-sender', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        '''Stop the background thread and try once more to send what is queued.'''
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            with self._app.app_context():
+                self.send_pending()
+                self._close_connection()
+        except Exception:
+            logger.exception('Sending flag mail failed')
+
+    def wake(self):
+        '''Send now instead of at the end of the interval. Digest mode ignores this.'''
+        if not self.digest:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                with self._app.app_context():
+                    while self.send_pending() == self.batch_size:
+                        pass
+                    if self._connection is not None and monotonic() - self._connection_used_at > self.idle_timeout:
+                        self._close_connection()
+            except Exception:
+                logger.exception('Sending flag mail failed')
+
+    def _pending(self, lease_expired: datetime):
+        return (
+            FlagMailModel.sent_at.is_(None),
+            FlagMailModel.attempts < self.max_attempts,
+            or_(FlagMailModel.claimed_at.is_(None), FlagMailModel.claimed_at < lease_expired)
+        )
+
+    def _claim(self) -> list[FlagMailModel]:
+        now = datetime.now()
+        pending = self._pending(now - timedelta(seconds=self.lease))
+        mail_ids = db.session.scalars(select(FlagMailModel.mail_id).where(*pending).order_by(FlagMailModel.mail_id).limit(self.batch_size)).all()
+        if not mail_ids:
+            db.session.rollback()
+            return []
+        claim = str(uuid4())
+        db.session.execute(
+            update(FlagMailModel).where(FlagMailModel.mail_id.in_(mail_ids), *pending).values(claimed_by=claim, claimed_at=now)
+        )
+        db.session.commit()
+        return db.session.scalars(select(FlagMailModel).where(FlagMailModel.claimed_by == claim).order_by(FlagMailModel.mail_id)).all()
+
+    def _message(self, mails: list[FlagMailModel]) -> Message:
+        if len(mails) == 1:
+            subject, body = mails[0].subject, mails[0].body
+        else:
+            subject = f'{len(mails)} Flags'
+            body = '\n\n----------------------------------------\n\n'.join(f'{mail.subject}\n\n{mail.body}' for mail in mails)
+        message = Message(subject, sender=os.getenv('SEND_EMAIL'), recipients=[os.getenv('FLAG_RECV_EMAIL')])
+        message.body = body
+        return message
+
+    def _open_connection(self):
+        if self._connection is None:
+            connection = current_app.extensions['mail'].connect()
+            connection.__enter__()
+            self._connection = connection
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._connection = None
+
+    def _send(self, message: Message):
+        try:
+            self._open_connection().send(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle connection; reconnect once.
+            self._close_connection()
+            self._open_connection().send(message)
+        self._connection_used_at = monotonic()
+
+    def send_pending(self) -> int:
+        '''Send up to one batch of queued mail. Returns how many flags were sent.'''
+        with self._send_lock:
+            mails = self._claim()
+            groups = [mails] if self.digest and mails else [[mail] for mail in mails]
+            sent = 0
+            for group in groups:
+                started_at = monotonic()
+                try:
+                    self._send(self._message(group))
+                except (smtplib.SMTPException, OSError) as error:
+                    logger.warning('Sending flag mail failed: %s', error)
+                    self._close_connection()
+                    self._failures += 1
+                    for mail in group:
+                        mail.attempts += 1
+                        mail.last_error = str(error)
+                    break
+                send_seconds = monotonic() - started_at
+                self._emails += 1
+                self._send_seconds += send_seconds
+                self._last_send_seconds = send_seconds
+                for mail in group:
+                    mail.sent_at = datetime.now()
+                sent += len(group)
+            for mail in mails:
+                if mail.sent_at is None:
+                    mail.claimed_by = mail.claimed_at = None
+            db.session.commit()
+            self._sent += sent
+            return sent
+
+    def stats(self) -> dict:
+        pending = self._pending(datetime.now() - timedelta(seconds=self.lease))[:2]
+        queue_length, oldest = db.session.execute(
+            select(func.count(FlagMailModel.mail_id), func.min(FlagMailModel.created_at)).where(*pending)
+        ).one()
+        return {
+            'digest': self.digest,
+            'running': self._thread is not None,
+            'queue_length': queue_length,
+            'oldest_queued_seconds': (datetime.now() - oldest).total_seconds() if oldest else None,
+            'sent': self._sent,
+            'emails': self._emails,
+            'failures': self._failures,
+            'average_send_seconds': self._send_seconds / self._emails if self._emails else None,
+            'last_send_seconds': self._last_send_seconds
+        }
+
+
+flag_mail_digest = os.getenv('FLAG_MAIL_DIGEST', 'false').lower() == 'true'
+flag_mail_sender = FlagMailSender(
+    interval=float(os.getenv('FLAG_MAIL_INTERVAL', 900 if flag_mail_digest else 5)),
+    digest=flag_mail_digest
+)
@@ -0,0 +1,28 @@
+"""Word trigram search
+
+Revision ID: 2f6b9e4d1a83
+Revises: e57a0d3b8c14
+Create Date: 2026-10-18 11:26:52.640187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6b9e4d1a83'
+down_revision = 'e57a0d3b8c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite has no trigram index; the application keeps one in memory instead.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_words_word_lower_trgm ON words USING GIN (word_lower gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_words_word_lower_trgm')
@@ -0,0 +1,44 @@
+"""Site counters
+
+Revision ID: 7a3c5e9d2b41
+Revises: 2f6b9e4d1a83
+Create Date: 2026-10-18 13:04:18.512907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e9d2b41'
+down_revision = '2f6b9e4d1a83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    site_counters = op.create_table('site_counters',
+    sa.Column('name', sa.String(length=80), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    bind = op.get_bind()
+    words = sa.table('words', sa.column('word_id'), sa.column('game_id'), sa.column('is_active'), sa.column('published'))
+    games = sa.table('games', sa.column('game_id'))
+    users = sa.table('users', sa.column('user_id'))
+    visible = sa.and_(words.c.is_active == sa.true(), words.c.published == sa.true())
+    counters = {
+        'words': bind.scalar(sa.select(sa.func.count(words.c.word_id))),
+        'active_words': bind.scalar(sa.select(sa.func.count(words.c.word_id)).where(words.c.is_active == sa.true())),
+        'published_words': bind.scalar(sa.select(sa.func.count(words.c.word_id)).where(visible)),
+        'games': bind.scalar(sa.select(sa.func.count(games.c.game_id))),
+        'users': bind.scalar(sa.select(sa.func.count(users.c.user_id)))
+    }
+    for game_id, word_count in bind.execute(sa.select(words.c.game_id, sa.func.count(words.c.word_id)).where(visible).group_by(words.c.game_id)):
+        counters[f'game_words:{game_id}'] = word_count
+    op.bulk_insert(site_counters, [{'name': name, 'value': value} for name, value in counters.items()])
+
+
+def downgrade():
+    op.drop_table('site_counters')
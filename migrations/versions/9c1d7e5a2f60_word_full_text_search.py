@@ -0,0 +1,52 @@
+"""Word full-text search
+
+Revision ID: 9c1d7e5a2f60
+Revises: 4b8e2f1c9a37
+Create Date: 2026-10-18 10:03:11.274816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d7e5a2f60'
+down_revision = '4b8e2f1c9a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE words_fts USING fts5(word, definition, example, content='words', content_rowid='word_id')")
+        op.execute('''CREATE TRIGGER words_fts_insert AFTER INSERT ON words WHEN new.is_active BEGIN
+            INSERT INTO words_fts(rowid, word, definition, example) VALUES (new.word_id, new.word, new.definition, new.example);
+        END''')
+        op.execute('''CREATE TRIGGER words_fts_delete AFTER DELETE ON words WHEN old.is_active BEGIN
+            INSERT INTO words_fts(words_fts, rowid, word, definition, example) VALUES ('delete', old.word_id, old.word, old.definition, old.example);
+        END''')
+        op.execute('''CREATE TRIGGER words_fts_update AFTER UPDATE OF word, definition, example, is_active ON words BEGIN
+            INSERT INTO words_fts(words_fts, rowid, word, definition, example) SELECT 'delete', old.word_id, old.word, old.definition, old.example WHERE old.is_active;
+            INSERT INTO words_fts(rowid, word, definition, example) SELECT new.word_id, new.word, new.definition, new.example WHERE new.is_active;
+        END''')
+        op.execute('INSERT INTO words_fts(rowid, word, definition, example) SELECT word_id, word, definition, example FROM words WHERE is_active')
+    elif dialect == 'postgresql':
+        op.execute('''ALTER TABLE words ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(word, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(definition, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(example, '')), 'C')
+        ) STORED''')
+        op.execute('CREATE INDEX ix_words_search_vector ON words USING GIN (search_vector)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS words_fts_update')
+        op.execute('DROP TRIGGER IF EXISTS words_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS words_fts_insert')
+        op.execute('DROP TABLE IF EXISTS words_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_words_search_vector')
+        op.execute('ALTER TABLE words DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,60 @@
+"""Per-game and per-author word stats
+
+Revision ID: b81f4c6d0e27
+Revises: 7a3c5e9d2b41
+Create Date: 2026-10-18 13:52:40.118364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4c6d0e27'
+down_revision = '7a3c5e9d2b41'
+branch_labels = None
+depends_on = None
+
+
+def create_stats_table(name, key, referenced):
+    return op.create_table(name,
+    sa.Column(key, sa.Integer(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=False),
+    sa.Column('upvotes', sa.Integer(), nullable=False),
+    sa.Column('downvotes', sa.Integer(), nullable=False),
+    sa.Column('top_word_id', sa.Integer(), nullable=True),
+    sa.Column('top_word_score', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint([key], [referenced], ),
+    sa.ForeignKeyConstraint(['top_word_id'], ['words.word_id'], ),
+    sa.PrimaryKeyConstraint(key)
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    words = sa.table('words', sa.column('word_id'), sa.column('game_id'), sa.column('author_id'), sa.column('is_active'),
+        sa.column('published'), sa.column('upvotes'), sa.column('downvotes'))
+    counted = sa.and_(words.c.is_active == sa.true(), words.c.published == sa.true())
+    score = words.c.upvotes - words.c.downvotes
+
+    for name, key, referenced in (('game_word_stats', 'game_id', 'games.game_id'), ('author_word_stats', 'author_id', 'users.user_id')):
+        stats_table = create_stats_table(name, key, referenced)
+        key_column = words.c[key]
+        rows = {
+            group: {key: group, 'word_count': word_count, 'upvotes': upvotes, 'downvotes': downvotes, 'top_word_id': None, 'top_word_score': None}
+            for group, word_count, upvotes, downvotes in bind.execute(
+                sa.select(key_column, sa.func.count(words.c.word_id), sa.func.sum(words.c.upvotes), sa.func.sum(words.c.downvotes)
+                ).where(counted).group_by(key_column)
+            )
+        }
+        for group, word_id, word_score in bind.execute(
+            sa.select(key_column, words.c.word_id, score).where(counted).order_by(key_column, score.desc(), words.c.word_id)
+        ):
+            if rows[group]['top_word_id'] is None:
+                rows[group].update(top_word_id=word_id, top_word_score=word_score)
+        op.bulk_insert(stats_table, list(rows.values()))
+
+
+def downgrade():
+    op.drop_table('author_word_stats')
+    op.drop_table('game_word_stats')
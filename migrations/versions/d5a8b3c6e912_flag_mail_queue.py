@@ -0,0 +1,40 @@
+"""Flag mail queue
+
+Revision ID: d5a8b3c6e912
+Revises: c4e2a9f71d35
+Create Date: 2026-10-18 15:12:53.340218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8b3c6e912'
+down_revision = 'c4e2a9f71d35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('flag_mail_queue',
+    sa.Column('mail_id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_by', sa.String(length=36), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('mail_id')
+    )
+    with op.batch_alter_table('flag_mail_queue', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_flag_mail_queue_sent_at'), ['sent_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('flag_mail_queue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_flag_mail_queue_sent_at'))
+
+    op.drop_table('flag_mail_queue')
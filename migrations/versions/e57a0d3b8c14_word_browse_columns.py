@@ -0,0 +1,72 @@
+"""Word browse columns
+
+Revision ID: e57a0d3b8c14
+Revises: 9c1d7e5a2f60
+Create Date: 2026-10-18 10:48:27.903164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e57a0d3b8c14'
+down_revision = '9c1d7e5a2f60'
+branch_labels = None
+depends_on = None
+
+
+# Batch operations rebuild the table on SQLite, which drops its triggers; these are the words_fts ones
+# from 9c1d7e5a2f60, recreated after such a rebuild.
+WORDS_FTS_TRIGGERS = [
+    '''CREATE TRIGGER words_fts_insert AFTER INSERT ON words WHEN new.is_active BEGIN
+        INSERT INTO words_fts(rowid, word, definition, example) VALUES (new.word_id, new.word, new.definition, new.example);
+    END''',
+    '''CREATE TRIGGER words_fts_delete AFTER DELETE ON words WHEN old.is_active BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) VALUES ('delete', old.word_id, old.word, old.definition, old.example);
+    END''',
+    '''CREATE TRIGGER words_fts_update AFTER UPDATE OF word, definition, example, is_active ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) SELECT 'delete', old.word_id, old.word, old.definition, old.example WHERE old.is_active;
+        INSERT INTO words_fts(rowid, word, definition, example) SELECT new.word_id, new.word, new.definition, new.example WHERE new.is_active;
+    END'''
+]
+
+
+def first_char_bucket(word):
+    first_char = word[:1].lower()
+    return first_char if 'a' <= first_char <= 'z' else '#'
+
+
+def upgrade():
+    bind = op.get_bind()
+    collation = 'C' if bind.dialect.name == 'postgresql' else None
+    with op.batch_alter_table('words', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('word_lower', sa.String(length=50, collation=collation), nullable=True))
+        batch_op.add_column(sa.Column('first_char_bucket', sa.String(length=1), nullable=True))
+
+    words = sa.table('words', sa.column('word_id'), sa.column('word'), sa.column('word_lower'), sa.column('first_char_bucket'))
+    rows = bind.execute(sa.select(words.c.word_id, words.c.word)).all()
+    if rows:
+        bind.execute(
+            words.update().where(words.c.word_id == sa.bindparam('b_word_id')).values(
+                word_lower=sa.bindparam('b_word_lower'),
+                first_char_bucket=sa.bindparam('b_first_char_bucket')
+            ),
+            [{'b_word_id': word_id, 'b_word_lower': word.lower(), 'b_first_char_bucket': first_char_bucket(word)} for word_id, word in rows]
+        )
+
+    with op.batch_alter_table('words', schema=None) as batch_op:
+        batch_op.create_index('ix_words_word_lower', ['word_lower', 'word_id'], unique=False)
+        batch_op.create_index('ix_words_first_char_bucket', ['first_char_bucket', 'word_lower', 'word_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('words', schema=None) as batch_op:
+        batch_op.drop_index('ix_words_first_char_bucket')
+        batch_op.drop_index('ix_words_word_lower')
+        batch_op.drop_column('first_char_bucket')
+        batch_op.drop_column('word_lower')
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in WORDS_FTS_TRIGGERS:
+            op.execute(statement)
@@ -0,0 +1,65 @@
+"""Word updated_at
+
+Revision ID: e93b7d2f4a16
+Revises: d5a8b3c6e912
+Create Date: 2026-10-18 16:03:41.582907
+
+"""
+from datetime import timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b7d2f4a16'
+down_revision = 'd5a8b3c6e912'
+branch_labels = None
+depends_on = None
+
+
+# Batch operations rebuild the table on SQLite, which drops its triggers; these are the words_fts ones
+# from 9c1d7e5a2f60, recreated after such a rebuild.
+WORDS_FTS_TRIGGERS = [
+    '''CREATE TRIGGER words_fts_insert AFTER INSERT ON words WHEN new.is_active BEGIN
+        INSERT INTO words_fts(rowid, word, definition, example) VALUES (new.word_id, new.word, new.definition, new.example);
+    END''',
+    '''CREATE TRIGGER words_fts_delete AFTER DELETE ON words WHEN old.is_active BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) VALUES ('delete', old.word_id, old.word, old.definition, old.example);
+    END''',
+    '''CREATE TRIGGER words_fts_update AFTER UPDATE OF word, definition, example, is_active ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) SELECT 'delete', old.word_id, old.word, old.definition, old.example WHERE old.is_active;
+        INSERT INTO words_fts(rowid, word, definition, example) SELECT new.word_id, new.word, new.definition, new.example WHERE new.is_active;
+    END'''
+]
+
+
+def upgrade():
+    with op.batch_alter_table('words', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # submit_datetime holds naive local time (datetime.now()) while updated_at is naive UTC, so convert
+    # each value using this host's timezone, which is the one that wrote them.
+    bind = op.get_bind()
+    words = sa.table('words', sa.column('word_id'), sa.column('submit_datetime', sa.DateTime()), sa.column('updated_at', sa.DateTime()))
+    rows = bind.execute(sa.select(words.c.word_id, words.c.submit_datetime)).all()
+    if rows:
+        bind.execute(
+            words.update().where(words.c.word_id == sa.bindparam('b_word_id')).values(updated_at=sa.bindparam('b_updated_at')),
+            [{'b_word_id': word_id, 'b_updated_at': submitted_at.astimezone(timezone.utc).replace(tzinfo=None)} for word_id, submitted_at in rows]
+        )
+
+    # On SQLite, changing nullability rebuilds the table, which drops the words_fts triggers.
+    # The column stays nullable there; the model always sets it.
+    if bind.dialect.name != 'sqlite':
+        with op.batch_alter_table('words', schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('words', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in WORDS_FTS_TRIGGERS:
+            op.execute(statement)
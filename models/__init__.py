@@ -1,4 +1,11 @@
 from models.game import GameModel
 from models.user import UserModel
 from models.word import WordModel
-from models.roles import RoleModel
\ No newline at end of file
+from models.roles import RoleModel
+from models.flag_mail import FlagMailModel
+from models.revoked_token import RevokedTokenModel
+from models.user_access import UserAccess, get_user_access, preload_admin_access, user_access_cache
+from models.site_counter import SiteCounterModel, count_publish_run, read_publish_runs, read_site_counters, reconcile_site_counters
+from models.word_stats import AuthorWordStatsModel, GameWordStatsModel, apply_word_stats, reconcile_word_stats
+from models.word_changes import WordChange, on_word_change, notify_word_changes
+from models.word_search import apply_full_text_search, count_search_result_changes, fuzzy_search, load_random_word_index, load_word_suggestion_index, random_word_index, search_result_cache, search_result_scopes, word_suggestion_index
\ No newline at end of file
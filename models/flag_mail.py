@@ -0,0 +1,17 @@
+from db import db
+
+
+class FlagMailModel(db.Model):
+    '''A flag email waiting for (or already handled by) the background sender.'''
+    __tablename__ = 'flag_mail_queue'
+
+    mail_id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text(), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True, index=True)
+    # Set by the sender that is working on the mail, so several workers never send it twice.
+    claimed_by = db.Column(db.String(36), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text(), nullable=True)
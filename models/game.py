@@ -4,8 +4,35 @@ class GameModel(db.Model):
     __tablename__ = 'games'
 
     game_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=False, nullable=True)
+    slug = db.Column(db.String(255), unique=True, nullable=True, index=True)
+    summary = db.Column(db.Text(), unique=False, nullable=True)
+    cover_url = db.Column(db.String(255), unique=False, nullable=True)
+    first_release_date = db.Column(db.DateTime, unique=False, nullable=True)
 
     words = db.relationship('WordModel', back_populates='game', lazy='dynamic')
 
+    @property
+    def is_synced(self):
+        return self.name is not None
+
+    def update_from_igdb(self, igdb_game: dict):
+        self.name = igdb_game.get('name')
+        self.slug = igdb_game.get('slug')
+        self.summary = igdb_game.get('summary')
+        self.cover_url = igdb_game.get('cover_url')
+        self.first_release_date = igdb_game.get('first_release_date')
+
+    def as_game_dict(self):
+        '''Shape the stored game like a normalized IGDB game so it can be dumped by GameSchema.'''
+        return {
+            'id': self.game_id,
+            'name': self.name,
+            'slug': self.slug,
+            'summary': self.summary,
+            'cover_url': self.cover_url,
+            'first_release_date': self.first_release_date
+        }
+
     def as_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
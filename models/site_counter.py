@@ -0,0 +1,136 @@
+from collections import Counter
+
+from sqlalchemy import delete, event, func, select
+
+from db import db
+from models.game import GameModel
+from models.upsert import upsert_rows
+from models.user import UserModel
+from models.word import WordModel
+from models.word_changes import snapshot_word
+
+
+# The totals served by /stats.
+SITE_TOTALS = ('words', 'active_words', 'published_words', 'games', 'users')
+# Versions rather than totals, which workers poll to drop cached data another process made stale.
+# The publish cron bumps publish_runs; user and role changes bump user_access_version.
+PUBLISH_RUNS = 'publish_runs'
+USER_ACCESS_VERSION = 'user_access_version'
+VERSION_COUNTERS = (PUBLISH_RUNS, USER_ACCESS_VERSION)
+# Per-scope /words/search cache generations (e.g. search_generation:game:7), bumped by every word write.
+SEARCH_GENERATION_PREFIX = 'search_generation:'
+
+
+class SiteCounterModel(db.Model):
+    '''Named running totals for /stats, kept current inside the same transaction as the rows they count.'''
+    __tablename__ = 'site_counters'
+
+    name = db.Column(db.String(80), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _word_counters(word: dict) -> Counter:
+    counters = Counter(words=1)
+    if word['is_active']:
+        counters['active_words'] += 1
+        if word['published']:
+            counters['published_words'] += 1
+    return counters
+
+
+def _write_counters(connection, values: dict, increment: bool):
+    rows = [{'name': name, 'value': value} for name, value in sorted(values.items())]
+    upsert_rows(connection, SiteCounterModel.__table__, ['name'], rows, increment=increment)
+
+
+@event.listens_for(db.session, 'after_flush')
+def count_flushed_rows(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, WordModel):
+            deltas.update(_word_counters(snapshot_word(obj)))
+        elif isinstance(obj, GameModel):
+            deltas['games'] += 1
+        elif isinstance(obj, UserModel):
+            deltas['users'] += 1
+    for obj in session.dirty:
+        if isinstance(obj, WordModel) and session.is_modified(obj):
+            deltas.update(_word_counters(snapshot_word(obj)))
+            deltas.subtract(_word_counters(snapshot_word(obj, committed=True)))
+    for obj in session.deleted:
+        if isinstance(obj, WordModel):
+            deltas.subtract(_word_counters(snapshot_word(obj, committed=True)))
+        elif isinstance(obj, GameModel):
+            deltas['games'] -= 1
+        elif isinstance(obj, UserModel):
+            deltas['users'] -= 1
+    _write_counters(session.connection(), {name: delta for name, delta in deltas.items() if delta}, increment=True)
+
+
+def count_publish_run(connection):
+    _write_counters(connection, {PUBLISH_RUNS: 1}, increment=True)
+
+
+def count_user_access_change(connection):
+    _write_counters(connection, {USER_ACCESS_VERSION: 1}, increment=True)
+
+
+def count_search_changes(connection, scopes):
+    _write_counters(connection, {f'{SEARCH_GENERATION_PREFIX}{scope}': 1 for scope in scopes}, increment=True)
+
+
+def read_counter(name: str) -> int:
+    return db.session.scalar(select(SiteCounterModel.value).where(SiteCounterModel.name == name)) or 0
+
+
+def read_publish_runs() -> int:
+    return read_counter(PUBLISH_RUNS)
+
+
+def read_user_access_version() -> int:
+    return read_counter(USER_ACCESS_VERSION)
+
+
+def read_search_generations(scopes) -> dict:
+    names = [f'{SEARCH_GENERATION_PREFIX}{scope}' for scope in scopes]
+    rows = db.session.execute(select(SiteCounterModel.name, SiteCounterModel.value).where(SiteCounterModel.name.in_(names)))
+    return {name[len(SEARCH_GENERATION_PREFIX):]: value for name, value in rows}
+
+
+def count_site_totals(session) -> dict:
+    '''Recount every counter from the underlying tables.'''
+    return {
+        'words': session.scalar(select(func.count(WordModel.word_id))),
+        'active_words': session.scalar(select(func.count(WordModel.word_id)).where(WordModel.is_active.is_(True))),
+        'published_words': session.scalar(
+            select(func.count(WordModel.word_id)).where(WordModel.is_active.is_(True), WordModel.published.is_(True))
+        ),
+        'games': session.scalar(select(func.count(GameModel.game_id))),
+        'users': session.scalar(select(func.count(UserModel.user_id)))
+    }
+
+
+def reconcile_site_counters(session) -> dict:
+    '''Overwrite the counters with fresh counts, correcting drift from writes that bypass the ORM. Returns the counts.'''
+    totals = count_site_totals(session)
+    session.execute(delete(SiteCounterModel).where(
+        SiteCounterModel.name.not_in([*totals, *VERSION_COUNTERS]),
+        SiteCounterModel.name.not_like(f'{SEARCH_GENERATION_PREFIX}%')
+    ))
+    _write_counters(session.connection(), totals, increment=False)
+    session.commit()
+    return totals
+
+
+def read_site_counters() -> dict:
+    '''The /stats payload built from the counters table. Per-game totals are served by /games/<id>/stats.'''
+    counters = dict(db.session.execute(
+        select(SiteCounterModel.name, SiteCounterModel.value).where(SiteCounterModel.name.in_(SITE_TOTALS))
+    ).all())
+    return {
+        'game_count': counters.get('games', 0),
+        'word_count': counters.get('words', 0),
+        'user_count': counters.get('users', 0),
+        'active_word_count': counters.get('active_words', 0),
+        'published_word_count': counters.get('published_words', 0)
+    }
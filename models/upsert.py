@@ -0,0 +1,22 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def upsert_rows(connection, table, key_columns: list[str], rows: list[dict], increment: bool = False):
+    '''Insert rows, or update the existing row with the same key by adding (`increment`) or replacing the other values.'''
+    if not rows:
+        return
+    value_columns = [name for name in rows[0] if name not in key_columns]
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert(table) if dialect == 'postgresql' else sqlite.insert(table)
+        new_values = {
+            name: table.c[name] + insert.excluded[name] if increment else insert.excluded[name]
+            for name in value_columns
+        }
+        connection.execute(insert.on_conflict_do_update(index_elements=[table.c[name] for name in key_columns], set_=new_values), rows)
+        return
+    for row in rows:
+        key = [table.c[name] == row[name] for name in key_columns]
+        new_values = {name: table.c[name] + row[name] if increment else row[name] for name in value_columns}
+        if connection.execute(table.update().where(*key).values(**new_values)).rowcount == 0:
+            connection.execute(table.insert().values(**row))
@@ -0,0 +1,93 @@
+import os
+
+from typing import NamedTuple
+
+from sqlalchemy import event, inspect, select
+
+from caching import TTLCache, VersionPoller
+from db import db
+from models.roles import RoleModel
+from models.site_counter import count_user_access_change, read_user_access_version
+from models.user import UserModel
+
+
+class UserAccess(NamedTuple):
+    is_admin: bool
+    is_active: bool
+    username: str | None
+
+
+user_access_cache = TTLCache(
+    ttl=float(os.getenv('USER_ACCESS_CACHE_TTL', 300)),
+    max_entries=int(os.getenv('USER_ACCESS_CACHE_MAX_ENTRIES', 10000))
+)
+# How long another worker's freeze or role change can go unseen here.
+user_access_version = VersionPoller(read_user_access_version, interval=float(os.getenv('USER_ACCESS_VERSION_CHECK_INTERVAL', 5)))
+
+
+def _drop_if_changed_elsewhere():
+    if user_access_version.changed():
+        user_access_cache.clear()
+
+
+def load_user_access(user_ids) -> dict[int, UserAccess]:
+    '''Read and cache the access of several users with one query for users and one for their admin roles.'''
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    admin_ids = set(db.session.scalars(select(RoleModel.user_id).where(RoleModel.user_id.in_(user_ids), RoleModel.admin.is_(True))))
+    access = {}
+    for user_id, is_active, username in db.session.execute(
+        select(UserModel.user_id, UserModel.is_active, UserModel.username).where(UserModel.user_id.in_(user_ids))
+    ):
+        access[user_id] = UserAccess(user_id in admin_ids, bool(is_active), username)
+        user_access_cache.set(user_id, access[user_id])
+    return access
+
+
+def get_user_access(user_id: int) -> UserAccess | None:
+    '''A user's admin flag, active flag and username, or None if there is no such user.'''
+    _drop_if_changed_elsewhere()
+    access = user_access_cache.get(user_id)
+    if access is None:
+        access = load_user_access([user_id]).get(user_id)
+    return access
+
+
+def preload_admin_access():
+    '''Warm the cache with every admin so their token refreshes never wait on the database.'''
+    _drop_if_changed_elsewhere()
+    admin_ids = db.session.scalars(select(RoleModel.user_id).where(RoleModel.admin.is_(True))).all()
+    load_user_access(admin_ids)
+
+
+# Cached entries are dropped once a commit touches the user or their roles. The same
+# transaction bumps user_access_version, so every other worker drops its cache within
+# USER_ACCESS_VERSION_CHECK_INTERVAL seconds.
+
+@event.listens_for(db.session, 'after_flush')
+def collect_user_access_changes(session, flush_context):
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, UserModel):
+            # A new user has nothing cached anywhere yet.
+            if obj not in session.new and (obj in session.deleted or session.is_modified(obj)):
+                changed.add(obj.user_id)
+        elif isinstance(obj, RoleModel):
+            # A role moved to another user changes both users' access.
+            changed.update(inspect(obj).attrs.user_id.history.deleted)
+            changed.add(obj.user_id)
+    if changed:
+        session.info.setdefault('user_access_changes', set()).update(changed)
+        count_user_access_change(session.connection())
+
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_user_access(session):
+    for user_id in session.info.pop('user_access_changes', ()):
+        user_access_cache.delete(user_id)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def discard_user_access_changes(session, previous_transaction):
+    session.info.pop('user_access_changes', None)
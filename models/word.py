@@ -1,4 +1,13 @@
-from db import db
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from db import db, utc_now
+
+
+def first_char_bucket(word: str) -> str:
+    '''The A–Z browse bucket of a word: its lowercase first letter, or '#' when it doesn't start with a-z.'''
+    first_char = word[:1].lower()
+    return first_char if 'a' <= first_char <= 'z' else '#'
 
 
 class WordModel(db.Model):
@@ -15,9 +24,26 @@ class WordModel(db.Model):
     upvotes = db.Column(db.Integer, unique=False, nullable=False, default=0)
     downvotes = db.Column(db.Integer, unique=False, nullable=False, default=0)
     game_id = db.Column(db.Integer, db.ForeignKey('games.game_id'), unique=False, nullable=False)
+    # UTC. Set by SQLAlchemy on every insert and update, including bulk UPDATE statements.
+    updated_at = db.Column(db.DateTime, unique=False, nullable=False, default=utc_now, onupdate=utc_now)
+    # Derived from `word` on every insert/update. The "C" collation on Postgres keeps prefix range scans index-friendly.
+    word_lower = db.Column(db.String(50).with_variant(postgresql.VARCHAR(50, collation='C'), 'postgresql'), unique=False, nullable=True)
+    first_char_bucket = db.Column(db.String(1), unique=False, nullable=True)
 
     user = db.relationship('UserModel', back_populates='words')
     game = db.relationship('GameModel', back_populates='words')
 
+    __table_args__ = (
+        db.Index('ix_words_word_lower', 'word_lower', 'word_id'),
+        db.Index('ix_words_first_char_bucket', 'first_char_bucket', 'word_lower', 'word_id'),
+    )
+
     def as_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+
+@event.listens_for(WordModel, 'before_insert')
+@event.listens_for(WordModel, 'before_update')
+def sync_normalized_word(mapper, connection, target: WordModel):
+    target.word_lower = target.word.lower()
+    target.first_char_bucket = first_char_bucket(target.word)
@@ -0,0 +1,94 @@
+import logging
+
+from sqlalchemy import event, inspect
+
+from db import db
+from models.word import WordModel
+
+
+logger = logging.getLogger(__name__)
+
+TRACKED_FIELDS = ('word_id', 'word', 'is_active', 'published', 'game_id', 'author_id', 'upvotes', 'downvotes')
+
+
+class WordChange:
+    '''A committed change to one word. `before` is None for inserts and `after` is None for deletes.'''
+
+    def __init__(self, word_id: int, before: dict | None, after: dict | None):
+        self.word_id = word_id
+        self.before = before
+        self.after = after
+
+    def __repr__(self):
+        return f'WordChange({self.word_id}, before={self.before}, after={self.after})'
+
+
+word_change_listeners = []
+
+
+def on_word_change(listener):
+    '''Register `listener(changes)` to be called with the list of WordChanges after every commit that touched words.'''
+    word_change_listeners.append(listener)
+    return listener
+
+
+def notify_word_changes(changes: list[WordChange]):
+    '''Dispatch changes to every listener. Writes that bypass the ORM (bulk UPDATEs) call this themselves.'''
+    for listener in word_change_listeners:
+        try:
+            listener(changes)
+        except Exception:
+            logger.exception('Word change listener %r failed', listener)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Without active history, setting an attribute on an expired word records no previous value.
+for field in TRACKED_FIELDS:
+    event.listen(getattr(WordModel, field), 'set', _load_previous_value, active_history=True)
+
+
+def snapshot_word(word: WordModel, committed: bool = False) -> dict:
+    state = inspect(word)
+    snapshot = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if committed and history.has_changes():
+            snapshot[field] = history.deleted[0] if history.deleted else None
+        else:
+            snapshot[field] = getattr(word, field)
+    return snapshot
+
+
+def flushed_word_changes(session) -> list[WordChange]:
+    '''The changes to words made by the flush in progress. Only meaningful inside an after_flush hook.'''
+    changes = []
+    for word in session.new:
+        if isinstance(word, WordModel):
+            changes.append(WordChange(word.word_id, None, snapshot_word(word)))
+    for word in session.dirty:
+        if isinstance(word, WordModel) and session.is_modified(word):
+            changes.append(WordChange(word.word_id, snapshot_word(word, committed=True), snapshot_word(word)))
+    for word in session.deleted:
+        if isinstance(word, WordModel):
+            changes.append(WordChange(word.word_id, snapshot_word(word, committed=True), None))
+    return changes
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_word_changes(session, flush_context):
+    session.info.setdefault('word_changes', []).extend(flushed_word_changes(session))
+
+
+@event.listens_for(db.session, 'after_commit')
+def dispatch_word_changes(session):
+    changes = session.info.pop('word_changes', None)
+    if changes:
+        notify_word_changes(changes)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def discard_word_changes(session, previous_transaction):
+    session.info.pop('word_changes', None)
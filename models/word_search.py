@@ -0,0 +1,245 @@
+import os
+
+from sqlalchemy import DDL, case, column, event, func, literal_column, select, table
+
+from caching import GenerationCache
+from db import db, thread_app_context
+from models.site_counter import count_search_changes, read_publish_runs, read_search_generations
+from models.word import WordModel, first_char_bucket
+from models.word_changes import flushed_word_changes, on_word_change
+from search_index import RandomSampleIndex, TrigramIndex, WordSuggestionIndex
+
+
+# ------------------------------------------------------------
+# Full-text and trigram index DDL, also created by the word_full_text_search and
+# word_trigram_search migrations.
+# SQLite keeps an external-content FTS5 table in sync with triggers; Postgres
+# uses a generated tsvector column with a GIN index, plus a pg_trgm GIN index
+# on word_lower. Inactive (soft-deleted) words are never indexed on SQLite and
+# filtered out by the query on Postgres.
+# ------------------------------------------------------------
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE words_fts USING fts5(word, definition, example, content='words', content_rowid='word_id')",
+    '''CREATE TRIGGER words_fts_insert AFTER INSERT ON words WHEN new.is_active BEGIN
+        INSERT INTO words_fts(rowid, word, definition, example) VALUES (new.word_id, new.word, new.definition, new.example);
+    END''',
+    '''CREATE TRIGGER words_fts_delete AFTER DELETE ON words WHEN old.is_active BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) VALUES ('delete', old.word_id, old.word, old.definition, old.example);
+    END''',
+    '''CREATE TRIGGER words_fts_update AFTER UPDATE OF word, definition, example, is_active ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, word, definition, example) SELECT 'delete', old.word_id, old.word, old.definition, old.example WHERE old.is_active;
+        INSERT INTO words_fts(rowid, word, definition, example) SELECT new.word_id, new.word, new.definition, new.example WHERE new.is_active;
+    END'''
+]
+
+POSTGRES_SEARCH_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX ix_words_word_lower_trgm ON words USING GIN (word_lower gin_trgm_ops)',
+    '''ALTER TABLE words ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(word, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(definition, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(example, '')), 'C')
+    ) STORED''',
+    'CREATE INDEX ix_words_search_vector ON words USING GIN (search_vector)'
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(WordModel.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(WordModel.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(WordModel.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS words_fts').execute_if(dialect='sqlite'))
+
+
+words_fts = table('words_fts', column('rowid'), column('rank'))
+
+
+def fts5_query(term: str) -> str:
+    '''Quote each token so user input is matched literally instead of parsed as FTS5 query syntax.'''
+    return ' '.join('"' + token.replace('"', '""') + '"' for token in term.split())
+
+
+def apply_full_text_search(query, term: str):
+    '''Restrict a select over WordModel to words matching `term` in word, definition or example, best matches first.'''
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return query.join(words_fts, words_fts.c.rowid == WordModel.word_id
+            ).where(literal_column('words_fts').op('MATCH')(fts5_query(term))
+            ).order_by(words_fts.c.rank)
+    if dialect == 'postgresql':
+        search_vector = literal_column('words.search_vector')
+        ts_query = func.websearch_to_tsquery('english', term)
+        return query.where(search_vector.op('@@')(ts_query)
+            ).order_by(func.ts_rank(search_vector, ts_query).desc())
+
+    term_pattern = '%' + term + '%'
+    return query.where(
+        WordModel.word.ilike(term_pattern) | WordModel.definition.ilike(term_pattern) | WordModel.example.ilike(term_pattern)
+    )
+
+
+# ------------------------------------------------------------
+# Fuzzy (trigram) search. Postgres ranks with pg_trgm; other databases use an
+# in-process trigram index over active words, kept current by word changes.
+# ------------------------------------------------------------
+
+default_fuzzy_threshold = float(os.getenv('FUZZY_SEARCH_THRESHOLD', 0.2))
+max_fuzzy_candidates = 1000
+
+def active_word_rows():
+    return db.session.execute(select(WordModel.word_id, WordModel.word).where(WordModel.is_active.is_(True)))
+
+
+word_trigram_index = TrigramIndex(max_age=float(os.getenv('WORD_TRIGRAM_INDEX_MAX_AGE', 600)), loader=active_word_rows, context=thread_app_context)
+
+
+def load_word_trigram_index():
+    word_trigram_index.rebuild()
+
+
+@on_word_change
+def update_word_trigram_index(changes):
+    for change in changes:
+        if change.after and change.after['is_active']:
+            word_trigram_index.add(change.word_id, change.after['word'])
+        else:
+            word_trigram_index.remove(change.word_id)
+
+
+def fuzzy_search(connection, query, term: str, threshold: float | None = None, offset: int = 0, limit: int = 10) -> list:
+    '''Run a select over WordModel restricted to words whose trigram similarity to `term` is at least `threshold`,
+    most similar first, and return the rows of the page at `offset`.
+
+    Without pg_trgm the in-process index ranks every match, and the select's own filters (author, game, ...) are
+    applied to the ranked ids a window of `max_fuzzy_candidates` at a time until the page fills, so a filtered
+    search still finds matches that rank outside the overall top candidates.
+    '''
+    threshold = default_fuzzy_threshold if threshold is None else threshold
+    term = term.lower()
+    if db.engine.dialect.name == 'postgresql':
+        # `%` uses the GIN trigram index and respects this transaction-local threshold.
+        connection.execute(select(func.set_config('pg_trgm.similarity_threshold', str(threshold), True)))
+        return connection.execute(query.where(WordModel.word_lower.op('%')(term)
+            ).order_by(func.similarity(WordModel.word_lower, term).desc(), WordModel.word_id
+            ).offset(offset).limit(limit)).all()
+
+    word_trigram_index.ensure_fresh()
+    matches = word_trigram_index.search(term, threshold)
+    wanted = offset + limit
+    rows = []
+    for start in range(0, len(matches), max_fuzzy_candidates):
+        ranks = {word_id: rank for rank, (word_id, similarity) in enumerate(matches[start:start + max_fuzzy_candidates])}
+        rows.extend(connection.execute(query.where(WordModel.word_id.in_(ranks)
+            ).order_by(case(ranks, value=WordModel.word_id)
+            ).limit(wanted - len(rows))))
+        if len(rows) >= wanted:
+            break
+    return rows[offset:wanted]
+
+
+# ------------------------------------------------------------
+# Autocomplete suggestions over active, published words, kept current by word
+# changes so /words/suggest never needs a database connection while fresh.
+# ------------------------------------------------------------
+
+def word_suggestion_rows():
+    return db.session.execute(
+        select(WordModel.word_id, WordModel.word, WordModel.upvotes - WordModel.downvotes
+        ).where(WordModel.is_active.is_(True), WordModel.published.is_(True))
+    )
+
+
+word_suggestion_index = WordSuggestionIndex(max_age=float(os.getenv('WORD_SUGGESTION_INDEX_MAX_AGE', 600)), loader=word_suggestion_rows, context=thread_app_context)
+
+
+def load_word_suggestion_index():
+    word_suggestion_index.rebuild()
+
+
+@on_word_change
+def update_word_suggestion_index(changes):
+    for change in changes:
+        if change.after and change.after['is_active'] and change.after['published']:
+            word_suggestion_index.upsert(change.word_id, change.after['word'], change.after['upvotes'] - change.after['downvotes'])
+        else:
+            word_suggestion_index.remove(change.word_id)
+
+
+# ------------------------------------------------------------
+# Random sampling over active, published words, globally and per game.
+# ------------------------------------------------------------
+
+def random_word_rows():
+    return db.session.execute(
+        select(WordModel.word_id, WordModel.game_id).where(WordModel.is_active.is_(True), WordModel.published.is_(True))
+    )
+
+
+random_word_index = RandomSampleIndex(max_age=float(os.getenv('RANDOM_WORD_INDEX_MAX_AGE', 600)), loader=random_word_rows, context=thread_app_context)
+
+
+def load_random_word_index():
+    random_word_index.rebuild()
+
+
+@on_word_change
+def update_random_word_index(changes):
+    for change in changes:
+        if change.after and change.after['is_active'] and change.after['published']:
+            random_word_index.add(change.word_id, change.after['game_id'])
+        else:
+            random_word_index.remove(change.word_id)
+
+
+# ------------------------------------------------------------
+# /words/search results, keyed on the normalized query. Each entry depends on the
+# generation of the game it filters on, the first letter it filters on, or on
+# every word when it filters on neither. Word changes bump the generations of
+# both the old and the new game and letter, locally right after the commit and
+# in site_counters inside the write's transaction, which other workers poll.
+# Publish cron runs bump a shared counter that every worker polls too.
+# ------------------------------------------------------------
+
+search_result_cache = GenerationCache(
+    ttl=float(os.getenv('SEARCH_CACHE_TTL', 60)),
+    max_entries=int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1000)),
+    epoch=read_publish_runs,
+    epoch_check_interval=float(os.getenv('SEARCH_CACHE_PUBLISH_CHECK_INTERVAL', 10)),
+    shared_generations=read_search_generations,
+    shared_check_interval=float(os.getenv('SEARCH_CACHE_WRITE_CHECK_INTERVAL', 5))
+)
+
+
+def search_result_scopes(game_id: int | None, prefix: str | None) -> tuple:
+    scopes = []
+    if game_id is not None:
+        scopes.append(f'game:{game_id}')
+    if prefix:
+        scopes.append(f'letter:{first_char_bucket(prefix)}')
+    return tuple(scopes) or ('all',)
+
+
+def changed_search_scopes(changes) -> set:
+    scopes = {'all'}
+    for change in changes:
+        for word in (change.before, change.after):
+            if word is not None:
+                scopes.add(f'game:{word["game_id"]}')
+                scopes.add(f'letter:{first_char_bucket(word["word"])}')
+    return scopes
+
+
+def count_search_result_changes(connection, changes):
+    '''Bump the shared generations of the searches `changes` affect. Call inside the transaction that made the changes.'''
+    if changes:
+        count_search_changes(connection, changed_search_scopes(changes))
+
+
+@event.listens_for(db.session, 'after_flush')
+def count_flushed_search_changes(session, flush_context):
+    count_search_result_changes(session.connection(), flushed_word_changes(session))
+
+
+@on_word_change
+def invalidate_search_results(changes):
+    search_result_cache.bump(changed_search_scopes(changes))
@@ -0,0 +1,137 @@
+from sqlalchemy import delete, event, func, select
+
+from db import db
+from models.upsert import upsert_rows
+from models.word import WordModel
+from models.word_changes import WordChange, flushed_word_changes
+
+
+class GameWordStatsModel(db.Model):
+    '''Totals over a game's active, published words.'''
+    __tablename__ = 'game_word_stats'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.game_id'), primary_key=True)
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    upvotes = db.Column(db.Integer, nullable=False, default=0)
+    downvotes = db.Column(db.Integer, nullable=False, default=0)
+    top_word_id = db.Column(db.Integer, db.ForeignKey('words.word_id'), nullable=True)
+    top_word_score = db.Column(db.Integer, nullable=True)
+
+    top_word = db.relationship('WordModel')
+
+
+class AuthorWordStatsModel(db.Model):
+    '''Totals over an author's active, published words.'''
+    __tablename__ = 'author_word_stats'
+
+    author_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True)
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    upvotes = db.Column(db.Integer, nullable=False, default=0)
+    downvotes = db.Column(db.Integer, nullable=False, default=0)
+    top_word_id = db.Column(db.Integer, db.ForeignKey('words.word_id'), nullable=True)
+    top_word_score = db.Column(db.Integer, nullable=True)
+
+    top_word = db.relationship('WordModel')
+
+
+# (stats model, the word field it groups by)
+STATS_GROUPS = ((GameWordStatsModel, 'game_id'), (AuthorWordStatsModel, 'author_id'))
+
+net_votes = WordModel.upvotes - WordModel.downvotes
+
+
+def _is_counted(word: dict | None) -> bool:
+    return word is not None and bool(word['is_active']) and bool(word['published'])
+
+
+def _rank(word: dict) -> tuple:
+    '''Sort key for the top word: highest net votes, then lowest id.'''
+    return (-(word['upvotes'] - word['downvotes']), word['word_id'])
+
+
+def _find_top_word(connection, key_column, group) -> tuple:
+    row = connection.execute(
+        select(WordModel.word_id, net_votes
+        ).where(key_column == group, WordModel.is_active.is_(True), WordModel.published.is_(True)
+        ).order_by(net_votes.desc(), WordModel.word_id
+        ).limit(1)
+    ).first()
+    return tuple(row) if row else (None, None)
+
+
+def _apply_group_stats(connection, model, key: str, changes: list[WordChange]):
+    table = model.__table__
+    key_column = getattr(WordModel, key)
+    deltas = {}
+    best = {}
+    for change in changes:
+        for word, sign in ((change.before, -1), (change.after, 1)):
+            if _is_counted(word):
+                delta = deltas.setdefault(word[key], {key: word[key], 'word_count': 0, 'upvotes': 0, 'downvotes': 0})
+                delta['word_count'] += sign
+                delta['upvotes'] += sign * word['upvotes']
+                delta['downvotes'] += sign * word['downvotes']
+        if _is_counted(change.after):
+            group = change.after[key]
+            if group not in best or _rank(change.after) < _rank(best[group]):
+                best[group] = change.after
+    if not deltas:
+        return
+    upsert_rows(connection, table, [key], [deltas[group] for group in sorted(deltas)], increment=True)
+
+    tops = {
+        group: (top_word_id, top_word_score)
+        for group, top_word_id, top_word_score in connection.execute(
+            select(table.c[key], table.c.top_word_id, table.c.top_word_score).where(table.c[key].in_(deltas))
+        )
+    }
+    for group, (top_word_id, top_word_score) in tops.items():
+        # The top word got worse or left the group, so any word could be on top now.
+        demoted = any(
+            _is_counted(change.before) and change.word_id == top_word_id and change.before[key] == group and
+            (not _is_counted(change.after) or change.after[key] != group or _rank(change.after) > _rank(change.before))
+            for change in changes
+        )
+        if demoted:
+            new_top = _find_top_word(connection, key_column, group)
+        elif group in best and (top_word_id is None or _rank(best[group]) <= (-top_word_score, top_word_id)):
+            new_top = (best[group]['word_id'], best[group]['upvotes'] - best[group]['downvotes'])
+        else:
+            continue
+        if new_top != (top_word_id, top_word_score):
+            connection.execute(table.update().where(table.c[key] == group).values(top_word_id=new_top[0], top_word_score=new_top[1]))
+
+
+def apply_word_stats(connection, changes: list[WordChange]):
+    '''Fold word changes into the per-game and per-author stats. Call inside the transaction that made the changes.'''
+    for model, key in STATS_GROUPS:
+        _apply_group_stats(connection, model, key, changes)
+
+
+@event.listens_for(db.session, 'after_flush')
+def update_word_stats(session, flush_context):
+    apply_word_stats(session.connection(), flushed_word_changes(session))
+
+
+def reconcile_word_stats(session):
+    '''Recompute every stats row from the words table, correcting drift from writes that bypass the ORM.'''
+    counted = (WordModel.is_active.is_(True), WordModel.published.is_(True))
+    for model, key in STATS_GROUPS:
+        key_column = getattr(WordModel, key)
+        rows = {
+            group: {key: group, 'word_count': word_count, 'upvotes': upvotes, 'downvotes': downvotes, 'top_word_id': None, 'top_word_score': None}
+            for group, word_count, upvotes, downvotes in session.execute(
+                select(key_column, func.count(WordModel.word_id), func.sum(WordModel.upvotes), func.sum(WordModel.downvotes)
+                ).where(*counted).group_by(key_column)
+            )
+        }
+        ranked = select(
+            key_column.label('group'), WordModel.word_id, net_votes.label('score'),
+            func.row_number().over(partition_by=key_column, order_by=(net_votes.desc(), WordModel.word_id)).label('position')
+        ).where(*counted).subquery()
+        for group, word_id, score in session.execute(select(ranked.c.group, ranked.c.word_id, ranked.c.score).where(ranked.c.position == 1)):
+            rows[group].update(top_word_id=word_id, top_word_score=score)
+
+        session.execute(delete(model).where(getattr(model, key).not_in(rows)))
+        upsert_rows(session.connection(), model.__table__, [key], list(rows.values()))
+    session.commit()
@@ -0,0 +1,30 @@
+import json
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(position: dict) -> str:
+    '''Encode a page position into an opaque, URL-safe cursor.'''
+    return urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, fields: dict) -> dict:
+    '''Decode a cursor made by `encode_cursor`, e.g. `decode_cursor(cursor, {'offset': int})`.
+
+    Raises ValueError if it is malformed, or if any of `fields` is missing or not of its type. Integers must not be negative.
+    '''
+    try:
+        position = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Malformed cursor.') from e
+    if not isinstance(position, dict):
+        raise ValueError('Malformed cursor.')
+    for key, field_type in fields.items():
+        value = position.get(key)
+        # JSON true/false decode to bool, which is an int subclass.
+        if type(value) is not field_type or (field_type is int and value < 0):
+            raise ValueError('Malformed cursor.')
+    return position
@@ -0,0 +1,256 @@
+import os
+import sqlite3
+import threading
+
+from random import uniform
+from uuid import uuid4
+from time import monotonic, sleep, time
+
+
+class SchedulerBusy(Exception):
+    '''Raised when a request cannot be scheduled: the wait queue is full or its deadline passed.'''
+
+
+class TokenBucket:
+    '''In-process token bucket refilled at `rate` tokens per second, holding at most `capacity` tokens.'''
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        '''Take a token if one is available. Returns 0 on success, otherwise the seconds until one will be.'''
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+class SQLiteState:
+    '''Base for limiter state kept in a SQLite file that every worker on the host opens.'''
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(schema)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are per thread and must not survive a fork into a new worker.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+
+class SQLiteTokenBucket(SQLiteState):
+    '''Token bucket whose state lives in a SQLite file, so every worker on the host draws from the same budget.'''
+
+    def __init__(self, path: str, rate: float, capacity: float, name: str = 'igdb'):
+        super().__init__(
+            path,
+            'CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+
+    def try_acquire(self) -> float:
+        '''Take a token if one is available. Returns 0 on success, otherwise the seconds until one will be.'''
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time()
+            row = connection.execute('SELECT tokens, updated_at FROM token_buckets WHERE name = ?', (self.name,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + max(now - row[1], 0) * self.rate)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            connection.execute(
+                'INSERT INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                (self.name, tokens, now)
+            )
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class SQLiteSlots(SQLiteState):
+    '''At most `limit` leases held at once across every worker sharing the SQLite file.
+
+    A lease left behind by a worker that died mid-call expires after `lease` seconds, so it should
+    outlast the longest call made under it.
+    '''
+
+    def __init__(self, path: str, limit: int, lease: float, name: str = 'igdb'):
+        super().__init__(
+            path,
+            'CREATE TABLE IF NOT EXISTS request_slots (lease_id TEXT PRIMARY KEY, name TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self.limit = limit
+        self.lease = lease
+        self.name = name
+
+    def try_acquire(self) -> str | None:
+        '''Take a lease if fewer than `limit` are held. Returns its id on success, otherwise None.'''
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time()
+            connection.execute('DELETE FROM request_slots WHERE name = ? AND expires_at <= ?', (self.name, now))
+            held = connection.execute('SELECT COUNT(*) FROM request_slots WHERE name = ?', (self.name,)).fetchone()[0]
+            lease_id = None
+            if held < self.limit:
+                lease_id = uuid4().hex
+                connection.execute(
+                    'INSERT INTO request_slots (lease_id, name, expires_at) VALUES (?, ?, ?)',
+                    (lease_id, self.name, now + self.lease)
+                )
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        return lease_id
+
+    def release(self, lease_id: str):
+        self._connect().execute('DELETE FROM request_slots WHERE lease_id = ?', (lease_id,))
+
+
+class RequestScheduler:
+    '''Runs calls under a token-bucket rate limit and a concurrency cap.
+
+    Callers wait in a bounded queue for at most `max_wait` seconds. Calls failing with an error that
+    `is_retryable` accepts are retried with jittered exponential backoff while the deadline allows.
+    `max_in_flight` caps this process only; pass `shared_slots` (e.g. SQLiteSlots) to also cap calls
+    across every worker.
+    '''
+
+    def __init__(self, bucket, max_in_flight: int, max_queue: int, max_wait: float,
+                 max_retries: int = 3, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 is_retryable=None, shared_slots=None, slot_poll_interval: float = 0.05):
+        self.bucket = bucket
+        self.shared_slots = shared_slots
+        self.slot_poll_interval = slot_poll_interval
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.is_retryable = is_retryable or (lambda error: False)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._requests = 0
+        self._retries = 0
+        self._rejected = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def _acquire_shared_slot(self, deadline: float) -> str | None:
+        if self.shared_slots is None:
+            return None
+        while True:
+            lease_id = self.shared_slots.try_acquire()
+            if lease_id is not None:
+                return lease_id
+            if monotonic() + self.slot_poll_interval > deadline:
+                raise SchedulerBusy('Timed out waiting for a free shared request slot.')
+            sleep(self.slot_poll_interval)
+
+    def _acquire(self, deadline: float) -> str | None:
+        with self._lock:
+            if self._queue_depth >= self.max_queue:
+                self._rejected += 1
+                raise SchedulerBusy('Request queue is full.')
+            self._queue_depth += 1
+        started_at = monotonic()
+        try:
+            if not self._slots.acquire(timeout=max(deadline - monotonic(), 0)):
+                raise SchedulerBusy('Timed out waiting for a free request slot.')
+            lease_id = None
+            try:
+                lease_id = self._acquire_shared_slot(deadline)
+                while True:
+                    wait = self.bucket.try_acquire()
+                    if wait == 0:
+                        break
+                    if monotonic() + wait > deadline:
+                        raise SchedulerBusy('Timed out waiting for rate limit budget.')
+                    sleep(wait)
+            except BaseException:
+                if lease_id is not None:
+                    self.shared_slots.release(lease_id)
+                self._slots.release()
+                raise
+        except SchedulerBusy:
+            with self._lock:
+                self._rejected += 1
+            raise
+        finally:
+            waited = monotonic() - started_at
+            with self._lock:
+                self._queue_depth -= 1
+                self._waits += 1
+                self._total_wait += waited
+                self._max_wait_seen = max(self._max_wait_seen, waited)
+        with self._lock:
+            self._in_flight += 1
+        return lease_id
+
+    def _release(self, lease_id: str | None):
+        with self._lock:
+            self._in_flight -= 1
+        if lease_id is not None:
+            self.shared_slots.release(lease_id)
+        self._slots.release()
+
+    def backoff(self, attempt: int) -> float:
+        return uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def run(self, fn, *args, **kwargs):
+        deadline = monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            lease_id = self._acquire(deadline)
+            with self._lock:
+                self._requests += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                if monotonic() + delay > deadline:
+                    raise
+            finally:
+                self._release(lease_id)
+            attempt += 1
+            with self._lock:
+                self._retries += 1
+            sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'queue_depth': self._queue_depth,
+                'in_flight': self._in_flight,
+                'requests': self._requests,
+                'retries': self._retries,
+                'rejected': self._rejected,
+                'average_wait': self._total_wait / self._waits if self._waits else 0.0,
+                'max_wait': self._max_wait_seen
+            }
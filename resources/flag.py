@@ -1,11 +1,11 @@
-import os
-
-from flask import current_app, jsonify
+from flask import jsonify
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_mail import Message, Mail
 from flask_smorest import Blueprint, abort
+from sqlalchemy.exc import SQLAlchemyError
 
+from db import db
+from mail_queue import enqueue_flag_mail
 from models import WordModel, GameModel, UserModel
 from schemas import FlagSchema
 
@@ -20,7 +20,7 @@ class Flag(MethodView):
     def post(self, request_payload: dict):
         content_type = request_payload['content_type']
         reason = request_payload['reason']
-        user = UserModel.query.first_or_404(get_jwt_identity())
+        user = UserModel.query.filter_by(user_id=int(get_jwt_identity())).first_or_404()
         non_content_specific_line = f'\n\nReason: "{reason}"\n\nby User: {{Username: {user.username}, User ID: {user.user_id}}}'
 
         if content_type == 'other':
@@ -60,9 +60,9 @@ class Flag(MethodView):
             body += pretty_content
             body += non_content_specific_line
 
-        with current_app.app_context():
-            msg = Message(subject, sender=os.getenv('SEND_EMAIL'), recipients=[os.getenv('FLAG_RECV_EMAIL')])
-            msg.body = body
-            mail = Mail()
-            mail.send(msg)
+        try:
+            enqueue_flag_mail(subject, body)
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message='Unable to save flag.')
         return jsonify({'message': 'Successfully flagged content.'})
\ No newline at end of file
@@ -1,76 +1,226 @@
 import os
 
-from datetime import datetime
+from flask import current_app
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from requests import post
-from sqlalchemy import func
-from sqlalchemy.orm import load_only
-from random import random
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 
-from db import db
-from models import GameModel
-from schemas import GameSchema, GameSearchSchema
+from db import db, thread_app_context
+from game_pool import RefillingPool
+from igdb import IGDBError, MAIN_GAME_FILTER, fetch_games, fetch_game_by_id, fetch_game_by_slug, fetch_games_by_ids, game_cache
+from models import GameModel, GameWordStatsModel
+from http_cache import cache_headers, content_etag, not_modified
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from search_index import GameSearchIndex, RandomSampleIndex
+from schemas import GameSchema, GameSearchSchema, GameBatchSchema, WordStatsSchema
 
 words_per_game = 4
 default_query_limit = 10
 
 blp = Blueprint('Games', __name__, description='Blueprint for /games endpoints')
 
+def stored_game_dicts() -> list[dict]:
+    '''Every stored game with metadata, shaped for the game search index.'''
+    return [stored_game.as_game_dict() for stored_game in GameModel.query.filter(GameModel.name.isnot(None))]
+
+
+game_search_index = GameSearchIndex(max_age=float(os.getenv('GAME_SEARCH_INDEX_MAX_AGE', 600)), loader=stored_game_dicts, context=thread_app_context)
+
+
+def load_game_search_index():
+    '''(Re)build the local game search index from every stored game with metadata.'''
+    game_search_index.rebuild()
+
+
+def stored_game_rows():
+    '''(game_id, is_synced) for every stored game, grouping the random game index by whether metadata is stored.'''
+    return ((game_id, name is not None) for game_id, name in db.session.execute(select(GameModel.game_id, GameModel.name)))
+
+
+# Games stored by other processes (e.g. the sync and cleanup crons) show up once the index expires.
+random_game_index = RandomSampleIndex(max_age=float(os.getenv('RANDOM_GAME_INDEX_MAX_AGE', 600)), loader=stored_game_rows, context=thread_app_context)
+
+
+def add_stored_game(stored_game: GameModel):
+    '''Make a just committed game visible to the local indexes.'''
+    game_search_index.add(stored_game.as_game_dict())
+    random_game_index.add(stored_game.game_id, stored_game.is_synced)
+
+
+def store_game(stored_game: GameModel, igdb_game: dict):
+    '''Copy freshly fetched IGDB metadata onto a stored game that was missing it.'''
+    stored_game.update_from_igdb(igdb_game)
+    try:
+        db.session.add(stored_game)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return
+    add_stored_game(stored_game)
+
+
+def lookup_game_by_id(game_id: int, where: str | None = None) -> dict | None:
+    '''Resolve a game from the in-process cache, then the games table, and only then IGDB.'''
+    game = game_cache.get_by_id(game_id)
+    if game is None:
+        stored_game = GameModel.query.get(game_id)
+        if stored_game and stored_game.is_synced:
+            game = stored_game.as_game_dict()
+        else:
+            game = fetch_game_by_id(game_id, where)
+            if game and stored_game:
+                store_game(stored_game, game)
+        if game:
+            game_cache.put(game)
+    return game
+
+
+def lookup_game_by_slug(game_slug: str) -> dict | None:
+    '''Resolve a game from the in-process cache, then the games table, and only then IGDB.'''
+    game = game_cache.get_by_slug(game_slug)
+    if game is None:
+        stored_game = GameModel.query.filter_by(slug=game_slug).first()
+        if stored_game:
+            game = stored_game.as_game_dict()
+        else:
+            game = fetch_game_by_slug(game_slug)
+            if game:
+                stored_game = GameModel.query.get(game['id'])
+                if stored_game:
+                    store_game(stored_game, game)
+        if game:
+            game_cache.put(game)
+    return game
+
+
+def lookup_games_by_ids(game_ids: list[int]) -> list[dict]:
+    '''Resolve many games at once, sending a single IGDB query for whatever the cache and games table cannot serve.'''
+    games = {}
+    for game_id in game_ids:
+        game = game_cache.get_by_id(game_id)
+        if game is not None:
+            games[game_id] = game
+
+    missing_ids = [game_id for game_id in game_ids if game_id not in games]
+    stored_games = {}
+    if missing_ids:
+        for stored_game in GameModel.query.filter(GameModel.game_id.in_(missing_ids)):
+            if stored_game.is_synced:
+                games[stored_game.game_id] = stored_game.as_game_dict()
+                game_cache.put(games[stored_game.game_id])
+            else:
+                stored_games[stored_game.game_id] = stored_game
+
+    missing_ids = [game_id for game_id in game_ids if game_id not in games]
+    if missing_ids:
+        for game in fetch_games_by_ids(missing_ids):
+            games[game['id']] = game
+            game_cache.put(game)
+            if game['id'] in stored_games:
+                store_game(stored_games[game['id']], game)
+
+    return [games[game_id] for game_id in game_ids if game_id in games]
+
+
+def refill_random_games(count: int) -> list[dict]:
+    '''Pick up to `count` distinct random stored games and resolve their details, querying IGDB at most once for those the store lacks.
+
+    Games already waiting in the pool are skipped, so with few stored games the pool stays below its target.
+    '''
+    random_game_index.ensure_fresh()
+    picks = random_game_index.sample(count, exclude=[game['id'] for game in random_game_pool.items()])
+    if not picks:
+        return []
+    return lookup_games_by_ids(picks)
+
+
+def pick_stored_random_game() -> dict | None:
+    '''Fallback for an empty pool: a random game that already has metadata stored, without touching IGDB.'''
+    random_game_index.ensure_fresh()
+    picks = random_game_index.sample(1, group=True)
+    if not picks:
+        return None
+    stored_game = db.session.get(GameModel, picks[0])
+    if stored_game is None or not stored_game.is_synced:
+        return None
+    return stored_game.as_game_dict()
+
+
+def game_response(game: dict):
+    '''The game with validator headers, or a 304 if the client already has this version of it.'''
+    headers = cache_headers('game', content_etag(game))
+    response = not_modified(headers)
+    if response is not None:
+        return response
+    return game, 200, headers
+
+
+random_game_pool = RefillingPool(
+    size=int(os.getenv('RANDOM_GAME_POOL_SIZE', 20)),
+    low_water=int(os.getenv('RANDOM_GAME_POOL_LOW_WATER', 5)),
+    refill=refill_random_games
+)
+
+
+@blp.route('/games/batch')
+class GamesBatch(MethodView):
+    @blp.arguments(GameBatchSchema, location='query')
+    @blp.response(200, GameSchema(many=True))
+    def get(self, args: dict):
+        '''Get details for up to 100 games by ID, e.g. /games/batch?ids=1,2,3. Unknown IDs are left out.'''
+        game_ids = list(dict.fromkeys(args['ids']))
+        try:
+            games = lookup_games_by_ids(game_ids)
+        except IGDBError:
+            abort(502, message='Unable to retrieve games from IGDB.')
+
+        return games
+
 
 @blp.route('/games/<string:game_slug>')
 class Game(MethodView):
     @blp.response(200, GameSchema)
     def get(self, game_slug: str):
-        '''Get a specific game's details from IGDB.'''
-        igdb_game = post('https://api.igdb.com/v4/games',
-                                **{'headers':
-                                    {
-                                        'Client-ID': os.getenv('IGDB_CLIENT_ID'),
-                                        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
-                                    },
-                                'data':
-                                    f'where slug="{game_slug}";\n\
-                                    fields name,summary,first_release_date,involved_companies,cover.url,slug;'
-                                }
-                            )
-
-        igdb_game_json = igdb_game.json()
-        if len(igdb_game_json) == 0:
+        '''Get a specific game's details from the local store, falling back to IGDB.'''
+        try:
+            game = lookup_game_by_slug(game_slug)
+        except IGDBError:
+            abort(502, message='Unable to retrieve game from IGDB.')
+
+        if not game:
             abort(404)
-        if 'first_release_date' in igdb_game_json[0]:
-            igdb_game_json[0]['first_release_date'] = datetime.fromtimestamp(igdb_game_json[0]['first_release_date'])
-        if 'cover' in igdb_game_json[0]:
-            igdb_game_json[0]['cover_url'] = igdb_game_json[0]['cover']['url']
 
-        return igdb_game_json[0]
+        return game_response(game)
     
 @blp.route('/games/by_id/<int:game_id>')
 class GameByID(MethodView):
     @blp.response(200, GameSchema)
     def get(self, game_id: int):
-        '''Get a specific game's details from IGDB.'''
-        igdb_game = post('https://api.igdb.com/v4/games',
-                                **{'headers':
-                                    {
-                                        'Client-ID': os.getenv('IGDB_CLIENT_ID'),
-                                        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
-                                    },
-                                'data':
-                                    f'where id=({game_id});\n\
-                                    fields name,summary,first_release_date,involved_companies,cover.url,slug;'
-                                }
-                            )
-
-        igdb_game_json = igdb_game.json()
-        if len(igdb_game_json) == 0:
+        '''Get a specific game's details from the local store, falling back to IGDB.'''
+        try:
+            game = lookup_game_by_id(game_id)
+        except IGDBError:
+            abort(502, message='Unable to retrieve game from IGDB.')
+
+        if not game:
             abort(404)
-        if 'first_release_date' in igdb_game_json[0]:
-            igdb_game_json[0]['first_release_date'] = datetime.fromtimestamp(igdb_game_json[0]['first_release_date'])
-        if 'cover' in igdb_game_json[0]:
-            igdb_game_json[0]['cover_url'] = igdb_game_json[0]['cover']['url']
 
-        return igdb_game_json[0]
+        return game_response(game)
+
+
+@blp.route('/games/<int:game_id>/stats')
+class GameStats(MethodView):
+    @blp.response(200, WordStatsSchema)
+    def get(self, game_id: int):
+        '''Word totals for a game, read from its precomputed stats row.'''
+        stats = db.session.get(GameWordStatsModel, game_id)
+        if stats is None:
+            if db.session.get(GameModel, game_id) is None:
+                abort(404, message=f'No game with ID {game_id} is stored.')
+            stats = GameWordStatsModel(game_id=game_id, word_count=0, upvotes=0, downvotes=0)
+
+        return stats
     
 
 @blp.route('/games/search')
@@ -78,12 +228,40 @@ class GamesSearch(MethodView):
     @blp.arguments(GameSearchSchema, location='query')
     @blp.response(200, GameSchema(many=True))
     def get(self, args: dict):
-        '''Search IGDB by game name. Either by "startsWith" or "name".'''
-        offset = args['offset'] if 'offset' in args else 0
+        '''Search games by name. Either by "startsWith" or "name".
+
+        Results list the matching games stored locally first, by name, then continue with the other matches from
+        IGDB in IGDB's order. IGDB has no keyset paging, so the X-Next-Cursor header here encodes the next page's
+        source ("local" or "igdb") and its offset within that source. A plain `offset` counts from the first local match.
+        '''
+        source, offset = 'local', args['offset'] if 'offset' in args else 0
+        if 'cursor' in args:
+            if 'offset' in args:
+                abort(400, message='\'cursor\' cannot be combined with \'offset\'.')
+            try:
+                position = decode_cursor(args['cursor'], {'source': str, 'offset': int})
+            except ValueError:
+                abort(400, message='Invalid cursor.')
+            if position['source'] not in ('local', 'igdb'):
+                abort(400, message='Invalid cursor.')
+            source, offset = position['source'], position['offset']
         offset = max(offset, 0)
         limit = args['limit'] if 'limit' in args else default_query_limit
         limit = min(max(limit, 1), 20)
 
+        if 'startsWith' not in args and 'name' not in args:
+            abort(400, message='Must include \'startsWith\' or \'name\' in query parameters.')
+
+        game_search_index.ensure_fresh()
+        local_games = game_search_index.search(name=args.get('name'), starts_with=args.get('startsWith'))
+        games = local_games[offset:offset + limit] if source == 'local' else []
+        if len(games) == limit:
+            if offset + limit < len(local_games):
+                next_position = {'source': 'local', 'offset': offset + limit}
+            else:
+                next_position = {'source': 'igdb', 'offset': 0}
+            return games, 200, {NEXT_CURSOR_HEADER: encode_cursor(next_position)}
+
         name_filter = ''
         if 'startsWith' in args and 'name' in args:
             name_filter=f'name~*"{args["name"]}"* & name~"{args["startsWith"]}"*'
@@ -91,62 +269,33 @@ class GamesSearch(MethodView):
             name_filter=f'name~"{args["startsWith"]}"*'
         elif 'name' in args:
             name_filter=f'name~*"{args["name"]}"*'
-        else:
-            abort(400, message='Must include \'startsWith\' or \'name\' in query parameters.')
-        
-        igdb_games = post('https://api.igdb.com/v4/games',
-                                **{'headers':
-                                    {
-                                       'Client-ID': os.getenv('IGDB_CLIENT_ID'),
-                                        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
-                                    },
-                                'data':
-                                    f'where {name_filter} & parent_game=null & game_type.type="Main Game" & version_parent=null;\n\
-                                    fields name,summary,first_release_date,involved_companies,cover.url,slug;\
-                                    limit {limit};\
-                                    offset {offset};'
-                                }
-                            )
-
-        igdb_games_json = igdb_games.json()
-        if len(igdb_games_json) == 0:
-            return [], 200
-        for i in range(len(igdb_games_json)):
-            if 'first_release_date' in igdb_games_json[i]:
-                igdb_games_json[i]['first_release_date'] = datetime.fromtimestamp(igdb_games_json[i]['first_release_date'])
-            if 'cover' in igdb_games_json[i]:
-                igdb_games_json[i]['cover_url'] = igdb_games_json[i]['cover']['url']
-        return igdb_games_json, 200
+        igdb_filter = f'{name_filter} & {MAIN_GAME_FILTER}'
+        if local_games:
+            # The local matches were listed already; IGDB continues with everything else.
+            igdb_filter += f' & id!=({",".join(str(game["id"]) for game in local_games)})'
+        igdb_limit = limit - len(games)
+        igdb_offset = max(offset - len(local_games), 0) if source == 'local' else offset
+
+        try:
+            igdb_games = fetch_games(igdb_filter, limit=igdb_limit, offset=igdb_offset)
+        except IGDBError:
+            abort(502, message='Unable to search games in IGDB.')
+
+        headers = {}
+        if len(igdb_games) == igdb_limit:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor({'source': 'igdb', 'offset': igdb_offset + igdb_limit})
+        return games + igdb_games, 200, headers
 
     
 @blp.route('/games/random')
 class GameRandom(MethodView):
     @blp.response(200, GameSchema)
     def get(self):
-        '''Get details from IGDB of a random game that has some definitions in GamerDictionary.'''
-        # game = GameModel.query.options(load_only(GameModel.game_id)).offset(
-        #     func.floor(
-        #         ((func.random() + 9223372036854775808) / 18446744073709551616.0) * db.session.query(func.count(GameModel.game_id))
-        #     )
-        # ).first()
-        game = GameModel.query.order_by(func.random()).first()
-
-        igdb_game = post('https://api.igdb.com/v4/games',
-                                **{'headers':
-                                    {
-                                       'Client-ID': os.getenv('IGDB_CLIENT_ID'),
-                                        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
-                                    },
-                                'data':
-                                    f'where id=({game.game_id}) & parent_game=null & game_type.type="Main Game" & version_parent=null;\n\
-                                    fields name,summary,first_release_date,involved_companies,cover.url,slug;'
-                                }
-                            )
-
-        igdb_game_json = igdb_game.json()
-        if 'first_release_date' in igdb_game_json[0]:
-            igdb_game_json[0]['first_release_date'] = datetime.fromtimestamp(igdb_game_json[0]['first_release_date'])
-        if 'cover' in igdb_game_json[0]:
-            igdb_game_json[0]['cover_url'] = igdb_game_json[0]['cover']['url']
-
-        return igdb_game_json[0]
\ No newline at end of file
+        '''Get details of a random game that has some definitions in GamerDictionary. Served from a pre-resolved pool.'''
+        game = random_game_pool.pop(current_app._get_current_object())
+        if game is None:
+            game = pick_stored_random_game()
+        if not game:
+            abort(404)
+
+        return game
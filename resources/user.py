@@ -1,12 +1,9 @@
-import os
-
 from datetime import timedelta
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_req
-from flask import jsonify, make_response
+from flask import current_app, jsonify, make_response
 from flask.views import MethodView
 from flask_jwt_extended import (
     create_access_token,
+    get_jwt,
     get_jwt_identity,
     jwt_required,
     create_refresh_token,
@@ -18,10 +15,11 @@ from passlib.hash import pbkdf2_sha256
 from sqlalchemy.exc import SQLAlchemyError
 
 
-from blocklist import BLOCKLIST
+from blocklist import revocation_store, token_expiry
 from db import db
-from models import UserModel
-from schemas import UserUpdateSchema, LoginSchema
+from google_login import GoogleCertsError, GoogleTokenError
+from models import AuthorWordStatsModel, UserModel, get_user_access
+from schemas import UserUpdateSchema, LoginSchema, WordStatsSchema
 
 
 blp = Blueprint('Users', __name__, description='Blueprint for user operations')
@@ -72,19 +70,30 @@ class User(MethodView):
     #         abort(500, message='Unable to delete user from database.')
 
 
+@blp.route('/users/<string:username>/stats')
+class UserStats(MethodView):
+    @blp.response(200, WordStatsSchema)
+    def get(self, username: str):
+        user = UserModel.query.filter_by(username=username, is_active=True).first_or_404()
+        stats = db.session.get(AuthorWordStatsModel, user.user_id)
+        if stats is None:
+            stats = AuthorWordStatsModel(author_id=user.user_id, word_count=0, upvotes=0, downvotes=0)
+
+        return stats
+
+
 @blp.route('/login')
 class UserLogin(MethodView):
     @blp.arguments(LoginSchema)
     def post(self, request_payload):
         if request_payload['source'] == 'Google':
             try:
-                decoded_token = id_token.verify_oauth2_token(request_payload['token'], google_req.Request(), os.getenv('GOOGLE_CLIENT_ID'))
-                if decoded_token['iss'] != 'https://accounts.google.com':
-                    abort(401, message='Unknown token source')
-                user_email = decoded_token['email']
-
-            except Exception as e:
-                abort(500, message=e)
+                decoded_token = current_app.extensions['google_token_verifier'].verify(request_payload['token'])
+            except GoogleTokenError as e:
+                abort(401, message=str(e))
+            except GoogleCertsError:
+                abort(503, message='Unable to verify Google sign-in right now.')
+            user_email = decoded_token['email']
         else:
             abort(400, message='Unknown source identifier in request payload')
 
@@ -128,6 +137,8 @@ class UserLogin(MethodView):
 class UserLogout(MethodView):
     @jwt_required(refresh=True, locations=['cookies'])
     def get(self):
+        jwt = get_jwt()
+        revocation_store.revoke(jwt['jti'], token_expiry(jwt))
         response = make_response(jsonify(), 204)
         unset_refresh_cookies(response)
         return response
@@ -138,8 +149,10 @@ class UserRefresh(MethodView):
     @jwt_required(refresh=True, locations=['cookies'])
     def get(self):
         user_id = get_jwt_identity()
-        user = UserModel.query.filter_by(user_id = int(user_id)).first()
-        if not user.is_active:
+        user_access = get_user_access(int(user_id))
+        if not user_access:
+            abort(404, message='User not found.')
+        if not user_access.is_active:
             abort(403, message='Permission denied. Account frozen by admin.')
         new_access_token = create_access_token(identity=user_id, fresh=False, expires_delta=access_token_expiration_time)
-        return {'access_token': new_access_token, 'username': user.username}
\ No newline at end of file
+        return {'access_token': new_access_token, 'username': user_access.username}
\ No newline at end of file
@@ -1,19 +1,43 @@
-from flask import abort
+import hashlib
+
+from flask import abort, jsonify, request
 from flask.views import MethodView
 from flask_smorest import Blueprint
-from json import load as jsonload
-from models import WordModel, GameModel, UserModel
+from json import dumps, load as jsonload
+from igdb import igdb_stats
+from mail_queue import flag_mail_sender
+from models import read_site_counters, search_result_cache
+from resources.game import random_game_pool
 
 blp = Blueprint('Utils', __name__, 'Blueprint for Utility functions.')
 
 @blp.route('/stats')
 class Stats(MethodView):
     def get(self):
-        word_count = WordModel.query.count()
-        game_count = GameModel.query.count()
-        user_count = UserModel.query.count()
-        
-        return {'game_count': game_count, 'word_count': word_count, 'user_count': user_count}, 200
+        stats = read_site_counters()
+        response = jsonify(stats)
+        response.set_etag(hashlib.sha1(dumps(stats, sort_keys=True).encode()).hexdigest())
+        return response.make_conditional(request)
+
+@blp.route('/stats/igdb')
+class IGDBStats(MethodView):
+    def get(self):
+        return igdb_stats(), 200
+
+@blp.route('/stats/random-games')
+class RandomGamePoolStats(MethodView):
+    def get(self):
+        return random_game_pool.stats(), 200
+
+@blp.route('/stats/flag-mail')
+class FlagMailStats(MethodView):
+    def get(self):
+        return flag_mail_sender.stats(), 200
+
+@blp.route('/stats/search-cache')
+class SearchCacheStats(MethodView):
+    def get(self):
+        return search_result_cache.stats(), 200
 
 @blp.route('/')
 class Health(MethodView):
@@ -1,29 +1,47 @@
-import os
 from datetime import datetime
 from flask.views import MethodView
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 from flask_smorest import Blueprint, abort
-from requests import post as req_post
-from random import randint, shuffle
-from sqlalchemy import select, func
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 
 from db import db
-from models import WordModel, UserModel, GameModel
-from schemas import WordSchema, WordUpdateSchema, WordSearchSchema, VoteActionSchema, VoteReturnSchema, WordWithUsernameSchema
+from http_cache import cache_headers, content_etag, not_modified
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from igdb import IGDBError, MAIN_GAME_FILTER, fetch_game_by_id, game_cache
+from models import WordModel, UserModel, GameModel, apply_full_text_search, fuzzy_search, random_word_index, search_result_cache, search_result_scopes, word_suggestion_index
+from models.word import first_char_bucket
+from resources.game import add_stored_game
+from votes import apply_vote, vote_aggregator
+from serializers import compiled_response
+from schemas import WordSchema, WordUpdateSchema, WordSearchSchema, WordSuggestSchema, WordSuggestionSchema, VoteActionSchema, VoteReturnSchema, WordWithUsernameSchema
 
 blp = Blueprint('Words', __name__, description='Blueprint for /words endpoints')
 
 games_per_word = 4
 default_query_limit = 10
+max_query_limit = 100
+max_unicode_char = chr(0x10FFFF)
+max_suggestion_limit = 20
+random_words_count = 7
+random_words_per_game = 10
 
 
 @blp.route('/words/<int:word_id>')
 class Word(MethodView):
     @blp.response(200, WordSchema)
     def get(self, word_id: int):
-        word = WordModel.query.filter_by(word_id=word_id, is_active=True).first_or_404()
-        return word
+        word = WordModel.query.options(joinedload(WordModel.user)).filter_by(word_id=word_id, is_active=True).first_or_404()
+        # The body nests the author, so their fields are part of the version too. Users have no change
+        # time of their own, so there is no honest Last-Modified and revalidation goes by ETag only.
+        author = word.user
+        etag = content_etag([word.word_id, word.updated_at, author.username, author.email, author.is_active])
+        headers = cache_headers('word', etag)
+        response = not_modified(headers)
+        if response is not None:
+            return response
+        return word, 200, headers
 
     @jwt_required()
     @blp.arguments(WordUpdateSchema)
@@ -77,39 +95,40 @@ class WordVotes(MethodView):
     @blp.arguments(VoteActionSchema)
     @blp.response(201, VoteReturnSchema)
     def post(self, request_payload: dict):
-        word = WordModel.query.filter_by(word_id=request_payload['word_id'], is_active=True).first_or_404()
         if 'upvote_action' in request_payload and \
             'downvote_action' in request_payload and \
             request_payload['upvote_action'] == request_payload['downvote_action']:
                 abort(400, message='Cannot have the same action for both upvote and downvote.')
+        upvote_delta = 0
+        downvote_delta = 0
         if 'upvote_action' in request_payload:
             if request_payload['upvote_action'] != 'increment' and request_payload['upvote_action'] != 'decrement':
                 abort(400, message="Bad payload. Upvote action needs to be either increment or decrement.")
-            elif request_payload['upvote_action'] == 'increment':
-                word.upvotes += 1
-            elif request_payload['upvote_action'] == 'decrement' and word.upvotes > 0:
-                word.upvotes -= 1
+            upvote_delta = 1 if request_payload['upvote_action'] == 'increment' else -1
         if 'downvote_action' in request_payload:
             if request_payload['downvote_action'] != 'increment' and request_payload['downvote_action'] != 'decrement':
                 abort(400, message="Bad payload. Downvote action needs to be either increment or decrement.")
-            elif request_payload['downvote_action'] == 'increment':
-                word.downvotes += 1
-            elif request_payload['downvote_action'] == 'decrement' and word.downvotes > 0:
-                word.downvotes -= 1
+            downvote_delta = 1 if request_payload['downvote_action'] == 'increment' else -1
+
         try:
-            db.session.add(word)
-            db.session.commit()
+            if vote_aggregator.enabled:
+                votes = vote_aggregator.add(request_payload['word_id'], upvote_delta, downvote_delta)
+            else:
+                votes = apply_vote(request_payload['word_id'], upvote_delta, downvote_delta)
         except SQLAlchemyError:
-            abort(500, message=f'Word with ID {word.word_id} could not update the votes.')
-        
-        return word
+            db.session.rollback()
+            abort(500, message=f'Word with ID {request_payload["word_id"]} could not update the votes.')
+        if votes is None:
+            abort(404)
+
+        return votes
 
 
 @blp.route('/words')
 class WordAdd(MethodView):
-    @blp.response(200, WordSchema(many=True))
+    @compiled_response(blp, 200, WordSchema(many=True))
     def get(self):
-        return WordModel.query.limit(10).all()
+        return WordModel.query.options(joinedload(WordModel.user)).limit(10).all()
     
     @jwt_required()
     @blp.arguments(WordSchema)
@@ -127,23 +146,18 @@ class WordAdd(MethodView):
         game = GameModel.query.get(request_payload['game_id'])
         new_game = None
         if not game:
-            igdb_game = req_post('https://api.igdb.com/v4/games',
-                                **{'headers':
-                                    {
-                                       'Client-ID': os.getenv('IGDB_CLIENT_ID'),
-                                        'Authorization': f'Bearer {os.getenv("IGDB_ACCESS_TOKEN")}'
-                                    },
-                                'data':
-                                    f'where id=({request_payload["game_id"]}) & parent_game=null & game_type.type="Main Game" & version_parent=null;\n\
-                                    fields name,summary,first_release_date,involved_companies,cover.url,slug;'
-                                }
-                            )
-            
+            try:
+                igdb_game = fetch_game_by_id(request_payload['game_id'], MAIN_GAME_FILTER)
+            except IGDBError:
+                abort(502, message='Unable to verify game with IGDB.')
+
             if not igdb_game:
                 abort(400, message='No game found in IGDB with that game ID')
             
             new_game = GameModel()
             new_game.game_id = request_payload['game_id']
+            new_game.update_from_igdb(igdb_game)
+            game_cache.put(igdb_game)
         # new_game.words.append(word)
 
         try:
@@ -151,9 +165,12 @@ class WordAdd(MethodView):
                 db.session.add(new_game)
             db.session.add(word)
             db.session.commit()
-            return word
         except SQLAlchemyError:
             abort(500, message='Unable to save word to database.')
+
+        if new_game:
+            add_stored_game(new_game)
+        return word
             
 
 # @blp.route('/word/<int:word_id>/flag')
@@ -177,98 +194,131 @@ class WordAdd(MethodView):
 @blp.route('/words/search')
 class WordSearch(MethodView):
     @blp.arguments(WordSearchSchema, location='query')
-    @blp.response(200, WordWithUsernameSchema(many=True))
+    @compiled_response(blp, 200, WordWithUsernameSchema(many=True))
     def get(self, args: dict):
+        '''Search words. Pages are ordered by lowercased word and can be walked with the cursor returned in the X-Next-Cursor header.'''
         offset = args['offset'] if 'offset' in args else 0
         offset = max(offset, 0)
         limit = args['limit'] if 'limit' in args else default_query_limit
-        limit = max(limit, 1)
+        limit = min(max(limit, 1), max_query_limit)
+
+        ranked_mode = 'fulltext' if args.get('fulltext') else 'fuzzy' if args.get('fuzzy') else None
+        if args.get('fulltext') and args.get('fuzzy'):
+            abort(400, message='Choose either a fulltext or a fuzzy search, not both.')
+        if ranked_mode and not args.get('word', '').strip():
+            abort(400, message=f'Must include \'word\' in query parameters for a {ranked_mode} search.')
+        if 'cursor' in args and ('offset' in args or ranked_mode):
+            abort(400, message='\'cursor\' cannot be combined with \'offset\' or a ranked search.')
 
         filters = [WordModel.is_active.is_(True)]
+        prefix = args['startsWith'].lower() if 'startsWith' in args else None
         if 'startsWith' in args and 'word' in args:
             abort(400, message='Must include \'startsWith\' OR \'word\' in query parameters, not both.')
         elif 'startsWith' in args:
-            if (args['startsWith'] == '*'):
-                regex_pattern = r'^[^A-Za-z].*'
-                filters.append(WordModel.word.op('regexp')(regex_pattern))
+            if prefix == '*':
+                filters.append(WordModel.first_char_bucket == '#')
+            elif len(prefix) == 1 and first_char_bucket(prefix) == prefix:
+                filters.append(WordModel.first_char_bucket == prefix)
             else:
-                filters.append(WordModel.word.ilike(args['startsWith'] + '%'))
-        elif 'word' in args:
+                filters.append(WordModel.word_lower >= prefix)
+                filters.append(WordModel.word_lower < prefix + max_unicode_char)
+        elif 'word' in args and not ranked_mode:
             filters.append(WordModel.word.ilike('%' + args['word'] + '%'))
         if 'author' in args:
             filters.append(WordModel.user.has(username=args['author']))
         if 'game_id' in args:
             filters.append(WordModel.game_id.is_(args['game_id']))
+        if 'cursor' in args:
+            try:
+                position = decode_cursor(args['cursor'], {'word_lower': str, 'word_id': int})
+            except ValueError:
+                abort(400, message='Invalid cursor.')
+            filters.append(tuple_(WordModel.word_lower, WordModel.word_id) > tuple_(position['word_lower'], position['word_id']))
+
+        cache_key = (ranked_mode, args.get('word'), prefix, args.get('author'), args.get('game_id'), args.get('threshold'), args.get('cursor'), offset, limit)
+        cache_stamp = search_result_cache.stamp(search_result_scopes(args.get('game_id'), prefix))
+        cached = search_result_cache.get(cache_key, cache_stamp)
+        if cached is not None:
+            words_query_result, headers = cached
+            return words_query_result, 200, dict(headers)
 
         words_query = select(
                 WordModel,
                 UserModel.username.label('author_username')
             ).join(UserModel
             ).where(*filters
-            ).offset(offset
             ).limit(limit)
-
-        words_query_result = [row for row in db.engine.connect().execute(words_query)]
-
-        return words_query_result
+        with db.engine.connect() as connection:
+            if ranked_mode == 'fuzzy':
+                words_query_result = fuzzy_search(connection, words_query, args['word'], args.get('threshold'), offset, limit)
+            else:
+                if ranked_mode == 'fulltext':
+                    words_query = apply_full_text_search(words_query, args['word']).offset(offset)
+                else:
+                    words_query = words_query.order_by(WordModel.word_lower, WordModel.word_id)
+                    if 'cursor' not in args:
+                        words_query = words_query.offset(offset)
+
+                words_query_result = [row for row in connection.execute(words_query)]
+
+        headers = {}
+        if len(words_query_result) == limit and not ranked_mode:
+            last_word = words_query_result[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor({'word_lower': last_word.word_lower, 'word_id': last_word.word_id})
+        search_result_cache.set(cache_key, cache_stamp, (words_query_result, headers))
+        return words_query_result, 200, dict(headers)
     
+@blp.route('/words/suggest')
+class WordSuggest(MethodView):
+    @blp.arguments(WordSuggestSchema, location='query')
+    @blp.response(200, WordSuggestionSchema(many=True))
+    def get(self, args: dict):
+        '''Autocomplete: distinct published words starting with "prefix", most upvoted first. Served from memory.'''
+        limit = args['limit'] if 'limit' in args else default_query_limit
+        limit = min(max(limit, 1), max_suggestion_limit)
+        word_suggestion_index.ensure_fresh()
+        return word_suggestion_index.suggest(args['prefix'], limit)
+
 @blp.route('/words/random')
 class RandomWords(MethodView):
     @blp.arguments(WordSearchSchema)
-    @blp.response(200, WordWithUsernameSchema(many=True))
+    @compiled_response(blp, 200, WordWithUsernameSchema(many=True))
     def get(self, args: dict):
-        if 'game_id' in args:
-            limit = 10
-            filters = [WordModel.is_active.is_(True), WordModel.game_id.is_(args['game_id']), WordModel.published.is_(True)]
-            random_words_by_game_id_query = select(WordModel
-                ).where(*filters
-                ).order_by(func.random()
-                ).limit(limit
-                )
-
-            return [row for row in db.engine.connect().execute(random_words_by_game_id_query)]
-
-        else:
-            word_count = WordModel.query.count()
-
-            limit_amount = min(30, word_count)
-
-            last_acceptable_offset_amount = word_count - limit_amount
-
-            start_loc = randint(0, last_acceptable_offset_amount)
-
-            random_section_of_words_query = select(
-                    WordModel,
-                    UserModel.username.label('author_username')
-                ).join(UserModel
-                ).offset(start_loc
-                ).limit(limit_amount)
-
-            randomized_selection_order = [i for i in range(limit_amount)]
-            shuffle(randomized_selection_order)
-            words_objects = []
-
-
-            random_words_query_result = [row for row in db.engine.connect().execute(random_section_of_words_query)]
-            if len(random_words_query_result) == 0:
-                return []
-            
-
-            for i in randomized_selection_order:
-                is_active = random_words_query_result[i][7]
-                if not is_active:
-                    continue
-                words_objects.append(random_words_query_result[i])
-                if len(words_objects) == 7:
+        '''Random active, published words: 10 from one game when "game_id" is given, otherwise 7 from anywhere.'''
+        game_id = args.get('game_id')
+        limit = random_words_per_game if game_id is not None else random_words_count
+        random_word_index.ensure_fresh()
+
+        words = []
+        picked_ids = []
+        with db.engine.connect() as connection:
+            # The index can trail other workers' writes, so re-check eligibility and top up if a pick was stale.
+            for attempt in range(3):
+                word_ids = random_word_index.sample(limit - len(words), game_id, exclude=picked_ids)
+                if not word_ids:
                     break
-            
-            return words_objects
+                picked_ids.extend(word_ids)
+                random_words_query = select(
+                        WordModel,
+                        UserModel.username.label('author_username')
+                    ).join(UserModel
+                    ).where(WordModel.word_id.in_(word_ids), WordModel.is_active.is_(True), WordModel.published.is_(True))
+                rows = {row.word_id: row for row in connection.execute(random_words_query)}
+                for word_id in word_ids:
+                    if word_id in rows:
+                        words.append(rows[word_id])
+                    else:
+                        random_word_index.remove(word_id)
+                if len(words) == limit:
+                    break
+
+        return words
 
 @blp.route('/words/mywords')
 class MyWords(MethodView):
     @jwt_required()
-    @blp.response(200, WordSchema(many=True))
+    @compiled_response(blp, 200, WordSchema(many=True))
     def get(self):
         user_id = get_jwt_identity()
-        words = WordModel.query.filter_by(is_active=True, author_id=user_id).all()
+        words = WordModel.query.options(joinedload(WordModel.user)).filter_by(is_active=True, author_id=user_id).all()
         return words
@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
+from webargs.fields import DelimitedList
 
 
 # ------------------------------------------------------------
@@ -68,12 +69,21 @@ class UserUpdateSchema(Schema):
 class SearchSchema(Schema):
     offset = fields.Int()
     limit = fields.Int()
+    cursor = fields.Str()
 
 class WordSearchSchema(SearchSchema):
     word = fields.Str()
     startsWith = fields.Str()
     author = fields.Str()
     game_id = fields.Int()
+    fulltext = fields.Bool()
+    fuzzy = fields.Bool()
+    threshold = fields.Float(validate=validate.Range(min=0, max=1))
+
+
+class WordSuggestSchema(Schema):
+    prefix = fields.Str(required=True, validate=validate.Length(min=1))
+    limit = fields.Int()
 
 
 class GameSearchSchema(SearchSchema):
@@ -81,6 +91,10 @@ class GameSearchSchema(SearchSchema):
     startsWith = fields.Str()
 
 
+class GameBatchSchema(Schema):
+    ids = DelimitedList(fields.Int(), required=True, validate=validate.Length(min=1, max=100))
+
+
 # ------------------------------------------------------------
 # On the Fly Schemas (built after querying but before sending)
 # ------------------------------------------------------------
@@ -88,6 +102,16 @@ class GameSearchSchema(SearchSchema):
 class WordWithUsernameSchema(WordSchema):
     author_username = fields.Str()
 
+class WordSuggestionSchema(Schema):
+    word = fields.Str(dump_only=True)
+    score = fields.Int(dump_only=True)
+
+class WordStatsSchema(Schema):
+    word_count = fields.Int(dump_only=True)
+    upvotes = fields.Int(dump_only=True)
+    downvotes = fields.Int(dump_only=True)
+    top_word = fields.Nested(PlainWordSchema(), dump_only=True, allow_none=True)
+
 
 # ------------------------------------------------------------
 # Vote Action Schemas
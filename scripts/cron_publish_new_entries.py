@@ -8,7 +8,7 @@ import sys
 parent_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
 sys.path.append(parent_dir)
 
-from models import WordModel
+from models import WordModel, count_publish_run
 
 
 def publish_words(db_url: str | None = None):
@@ -18,7 +18,8 @@ def publish_words(db_url: str | None = None):
     engine = create_engine(db_url, echo=False)
     with Session(engine) as session:
         word_update = update(WordModel).where(WordModel.published == False).values(published=True)
-        session.execute(word_update)
+        if session.execute(word_update).rowcount:
+            count_publish_run(session.connection())
         session.commit()
 
 
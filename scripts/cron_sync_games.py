@@ -0,0 +1,46 @@
+import argparse
+import os
+from dotenv import load_dotenv
+from sqlalchemy import select, create_engine
+from sqlalchemy.orm import Session
+import sys
+
+parent_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+sys.path.append(parent_dir)
+
+from igdb import MAX_QUERY_LIMIT, fetch_games_by_ids
+from models import GameModel
+
+
+def sync_games(db_url: str | None = None, batch_size: int = MAX_QUERY_LIMIT):
+    load_dotenv('../.env')
+    print('sqlite://' + parent_dir + '/instance/data.db')
+    db_url = db_url or os.getenv('DATABASE_URL', 'sqlite:///' + parent_dir + '/instance/data.db')
+    if not os.getenv('IGDB_ACCESS_TOKEN'):
+        with open(os.path.join(parent_dir, 'access.txt'), 'r') as cred:
+            os.environ['IGDB_ACCESS_TOKEN'] = cred.read()
+    engine = create_engine(db_url, echo=False)
+    with Session(engine) as session:
+        game_ids = session.scalars(select(GameModel.game_id).order_by(GameModel.game_id)).all()
+        synced_count = 0
+        for start in range(0, len(game_ids), batch_size):
+            batch = game_ids[start:start + batch_size]
+            igdb_games = fetch_games_by_ids(batch, batch_size)
+            stored_games = {game.game_id: game for game in session.scalars(select(GameModel).where(GameModel.game_id.in_(batch)))}
+            for igdb_game in igdb_games:
+                stored_game = stored_games.get(igdb_game['id'])
+                if stored_game:
+                    stored_game.update_from_igdb(igdb_game)
+                    synced_count += 1
+            session.commit()
+        print('Synced', synced_count, 'of', len(game_ids), 'games from IGDB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--db_url', required=False, default=None)
+    parser.add_argument('-b', '--batch_size', required=False, type=int, default=MAX_QUERY_LIMIT)
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    sync_games(db_url, args.batch_size)
@@ -0,0 +1,497 @@
+import heapq
+import logging
+import re
+import threading
+
+from collections import Counter
+from contextlib import nullcontext
+from random import randrange
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class PrefixTrie:
+    '''Maps every prefix of a (lowercased) key to the ids of the entries whose key starts with it.'''
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def add(self, key: str, item_id):
+        node = self._root
+        node.ids.add(item_id)
+        for char in key.lower():
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(item_id)
+
+    def remove(self, key: str, item_id):
+        node = self._root
+        node.ids.discard(item_id)
+        for char in key.lower():
+            node = node.children.get(char)
+            if node is None:
+                return
+            node.ids.discard(item_id)
+
+    def find(self, prefix: str) -> set:
+        node = self._root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+
+class NGramIndex:
+    '''Substring index over (lowercased) keys built from all of their grams up to `n` characters long.'''
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._grams = {}
+        self._keys = {}
+
+    def _grams_of(self, key: str) -> set:
+        return {key[i:i + size] for size in range(1, self.n + 1) for i in range(len(key) - size + 1)}
+
+    def add(self, key: str, item_id):
+        key = key.lower()
+        self._keys[item_id] = key
+        for gram in self._grams_of(key):
+            self._grams.setdefault(gram, set()).add(item_id)
+
+    def remove(self, key: str, item_id):
+        key = self._keys.pop(item_id, key.lower())
+        for gram in self._grams_of(key):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._grams[gram]
+
+    def find(self, substring: str) -> set:
+        substring = substring.lower()
+        if len(substring) <= self.n:
+            return set(self._grams.get(substring, ()))
+        grams = [substring[i:i + self.n] for i in range(len(substring) - self.n + 1)]
+        candidates = set(self._grams.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self._grams.get(gram, set())
+            if not candidates:
+                break
+        return {item_id for item_id in candidates if substring in self._keys[item_id]}
+
+
+class RefreshingIndex:
+    '''Base for the in-memory indexes below, which are loaded from the database and rebuilt every `max_age` seconds.
+
+    Subclasses implement `_build_structures(rows)`, building new structures off the lock, and
+    `_use_structures(structures)`, which swaps them in under `_lock`, so lookups never wait on the load.
+    `loader()` returns those rows. Incremental changes go through `_apply`: while a rebuild is loading they
+    are also logged and replayed onto the new structures before the swap, so a change that missed the
+    loader's snapshot is not lost.
+
+    An index that was never built, or was invalidated, is built by the first caller while the others wait
+    for it. Once an index has merely expired, one background thread rebuilds it and the old one keeps
+    serving meanwhile. `context()` is called in the requesting thread and returns the context manager
+    (e.g. an app context) that background rebuild runs in.
+    '''
+
+    def __init__(self, max_age: float, loader=None, context=None):
+        self.max_age = max_age
+        self.loader = loader
+        self.context = context or nullcontext
+        self._built_at = None
+        self._invalidations = 0
+        self._changes = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_at is None or monotonic() - self._built_at > self.max_age
+
+    def invalidate(self):
+        '''Mark the index stale so it is rebuilt on next use, including when a rebuild is already loading.'''
+        with self._lock:
+            self._built_at = None
+            self._invalidations += 1
+
+    def _build_structures(self, rows):
+        raise NotImplementedError
+
+    def _use_structures(self, structures):
+        raise NotImplementedError
+
+    def build(self, rows):
+        '''Build the index from `rows` and swap it in.'''
+        with self._lock:
+            invalidations = self._invalidations
+        self._swap(self._build_structures(rows), invalidations)
+
+    def _swap(self, structures, invalidations: int):
+        with self._lock:
+            self._use_structures(structures)
+            for change, args in self._changes or ():
+                change(*args)
+            self._changes = None
+            # An invalidate() since the load began means the rows may already be outdated.
+            if self._invalidations == invalidations:
+                self._built_at = monotonic()
+
+    def _load_and_build(self):
+        with self._lock:
+            self._changes = []
+            invalidations = self._invalidations
+        try:
+            structures = self._build_structures(self.loader())
+        except BaseException:
+            with self._lock:
+                self._changes = None
+            raise
+        self._swap(structures, invalidations)
+
+    def _apply(self, change, *args):
+        '''Run `change(*args)` on the live structures, logging it for replay if a rebuild is loading.
+
+        `change` must reach the structures through `self`, so a replay hits the new ones.
+        '''
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((change, args))
+            if self._built_at is not None:
+                change(*args)
+
+    def rebuild(self):
+        '''Load and build the index now. Only one rebuild runs at a time.'''
+        with self._rebuild_lock:
+            self._load_and_build()
+
+    def ensure_fresh(self):
+        '''Make sure the index can serve: build it if it has nothing to serve, refresh it in the background if it expired.'''
+        if not self.is_stale:
+            return
+        if self.is_built:
+            self._refresh_in_background()
+            return
+        with self._rebuild_lock:
+            if not self.is_built:
+                self._load_and_build()
+
+    def _refresh_in_background(self):
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            context = self.context()
+        except Exception:
+            self._rebuild_lock.release()
+            raise
+
+        def run():
+            try:
+                with context:
+                    if self.is_stale:
+                        self._load_and_build()
+            except Exception:
+                logger.exception('Refreshing %s failed', type(self).__name__)
+            finally:
+                self._rebuild_lock.release()
+
+        threading.Thread(target=run, name=f'{type(self).__name__}-refresh', daemon=True).start()
+
+
+class GameSearchIndex(RefreshingIndex):
+    '''In-memory name index over the games we store locally, answering "startsWith" and "name" searches.'''
+
+    def __init__(self, max_age: float, loader=None, context=None):
+        super().__init__(max_age, loader, context)
+        self._games = {}
+        self._trie = PrefixTrie()
+        self._ngrams = NGramIndex()
+
+    def _build_structures(self, games: list[dict]):
+        trie = PrefixTrie()
+        ngrams = NGramIndex()
+        indexed_games = {}
+        for game in games:
+            if game.get('name'):
+                indexed_games[game['id']] = game
+                trie.add(game['name'], game['id'])
+                ngrams.add(game['name'], game['id'])
+        return indexed_games, trie, ngrams
+
+    def _use_structures(self, structures):
+        self._games, self._trie, self._ngrams = structures
+
+    def add(self, game: dict):
+        if game.get('name'):
+            self._apply(self._add, game)
+
+    def _add(self, game: dict):
+        previous = self._games.get(game['id'])
+        if previous:
+            self._trie.remove(previous['name'], game['id'])
+            self._ngrams.remove(previous['name'], game['id'])
+        self._games[game['id']] = game
+        self._trie.add(game['name'], game['id'])
+        self._ngrams.add(game['name'], game['id'])
+
+    def search(self, name: str | None = None, starts_with: str | None = None) -> list[dict]:
+        '''Return matching games ordered by name. Both filters must match when both are given.'''
+        with self._lock:
+            ids = None
+            if starts_with is not None:
+                ids = set(self._trie.find(starts_with))
+            if name is not None:
+                name_ids = self._ngrams.find(name)
+                ids = name_ids if ids is None else ids & name_ids
+            games = [self._games[game_id] for game_id in ids or ()]
+        return sorted(games, key=lambda game: (game['name'].lower(), game['id']))
+
+    def __len__(self):
+        return len(self._games)
+
+
+def trigrams(text: str) -> set:
+    '''Trigrams of `text` the way pg_trgm builds them: per alphanumeric word, lowercased, padded with two leading spaces and one trailing space.'''
+    grams = set()
+    for word in re.split(r'[^0-9a-z]+', text.lower()):
+        if word:
+            padded = f'  {word} '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex(RefreshingIndex):
+    '''Inverted trigram index ranking keys by pg_trgm-style similarity (shared trigrams / all distinct trigrams).'''
+
+    def __init__(self, max_age: float, loader=None, context=None):
+        super().__init__(max_age, loader, context)
+        self._grams = {}
+        self._keys = {}
+
+    def _build_structures(self, entries):
+        grams_index = {}
+        keys = {}
+        for item_id, key in entries:
+            keys[item_id] = trigrams(key)
+            for gram in keys[item_id]:
+                grams_index.setdefault(gram, set()).add(item_id)
+        return grams_index, keys
+
+    def _use_structures(self, structures):
+        self._grams, self._keys = structures
+
+    def _remove(self, item_id):
+        for gram in self._keys.pop(item_id, ()):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._grams[gram]
+
+    def _add(self, item_id, key: str):
+        self._remove(item_id)
+        self._keys[item_id] = trigrams(key)
+        for gram in self._keys[item_id]:
+            self._grams.setdefault(gram, set()).add(item_id)
+
+    def add(self, item_id, key: str):
+        self._apply(self._add, item_id, key)
+
+    def remove(self, item_id):
+        self._apply(self._remove, item_id)
+
+    def search(self, term: str, threshold: float, limit: int | None = None) -> list[tuple]:
+        '''Return up to `limit` (or, with limit None, all) (id, similarity) pairs with similarity >= threshold, most similar first.'''
+        term_grams = trigrams(term)
+        if not term_grams:
+            return []
+        with self._lock:
+            shared = Counter()
+            for gram in term_grams:
+                shared.update(self._grams.get(gram, ()))
+            matches = []
+            for item_id, shared_count in shared.items():
+                similarity = shared_count / (len(term_grams) + len(self._keys[item_id]) - shared_count)
+                if similarity >= threshold:
+                    matches.append((item_id, similarity))
+        rank = lambda match: (-match[1], match[0])
+        if limit is None:
+            return sorted(matches, key=rank)
+        return heapq.nsmallest(limit, matches, key=rank)
+
+
+class _WordScores:
+    __slots__ = ('definitions', 'words', 'trie')
+
+    def __init__(self):
+        self.definitions = {}
+        self.words = {}
+        self.trie = PrefixTrie()
+
+    def add(self, definition_id, word: str, score: int):
+        key = word.lower()
+        self.definitions[definition_id] = (key, score)
+        entry = self.words.get(key)
+        if entry is None:
+            entry = self.words[key] = {'word': word, 'score': 0, 'definitions': 0}
+            self.trie.add(key, key)
+        entry['score'] += score
+        entry['definitions'] += 1
+
+    def remove(self, definition_id):
+        definition = self.definitions.pop(definition_id, None)
+        if definition is None:
+            return
+        key, score = definition
+        entry = self.words[key]
+        entry['score'] -= score
+        entry['definitions'] -= 1
+        if entry['definitions'] == 0:
+            del self.words[key]
+            self.trie.remove(key, key)
+
+
+class WordSuggestionIndex(RefreshingIndex):
+    '''Prefix index over distinct (case-insensitive) words, each scored by the summed net votes of its definitions.'''
+
+    def __init__(self, max_age: float, loader=None, context=None):
+        super().__init__(max_age, loader, context)
+        self._scores = _WordScores()
+
+    def _build_structures(self, definitions):
+        '''Build from (definition id, word, net votes) rows.'''
+        scores = _WordScores()
+        for definition_id, word, score in definitions:
+            scores.add(definition_id, word, score)
+        return scores
+
+    def _use_structures(self, scores):
+        self._scores = scores
+
+    def _upsert(self, definition_id, word: str, score: int):
+        self._scores.remove(definition_id)
+        self._scores.add(definition_id, word, score)
+
+    def _remove(self, definition_id):
+        self._scores.remove(definition_id)
+
+    def upsert(self, definition_id, word: str, score: int):
+        self._apply(self._upsert, definition_id, word, score)
+
+    def remove(self, definition_id):
+        self._apply(self._remove, definition_id)
+
+    def suggest(self, prefix: str, limit: int) -> list[dict]:
+        '''Return up to `limit` distinct words starting with `prefix`, highest score first.'''
+        with self._lock:
+            words = self._scores.words
+            keys = self._scores.trie.find(prefix)
+            top_keys = heapq.nsmallest(limit, keys, key=lambda key: (-words[key]['score'], key))
+            return [{'word': words[key]['word'], 'score': words[key]['score']} for key in top_keys]
+
+
+class _DenseSet:
+    '''A set kept as a dense list plus positions, giving O(1) add, remove and uniform random sampling.'''
+
+    __slots__ = ('items', 'positions')
+
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last_item = self.items.pop()
+        if last_item != item:
+            self.items[position] = last_item
+            self.positions[last_item] = position
+
+
+class _GroupedSamples:
+    __slots__ = ('all', 'groups', 'group_of')
+
+    def __init__(self):
+        self.all = _DenseSet()
+        self.groups = {}
+        self.group_of = {}
+
+    def add(self, item_id, group):
+        self.remove(item_id)
+        self.all.add(item_id)
+        self.groups.setdefault(group, _DenseSet()).add(item_id)
+        self.group_of[item_id] = group
+
+    def remove(self, item_id):
+        if item_id not in self.group_of:
+            return
+        group = self.group_of.pop(item_id)
+        self.all.remove(item_id)
+        self.groups[group].remove(item_id)
+        if not self.groups[group].items:
+            del self.groups[group]
+
+
+class RandomSampleIndex(RefreshingIndex):
+    '''Eligible ids kept in dense arrays, globally and per group, so k random picks cost O(k).'''
+
+    def __init__(self, max_age: float, loader=None, context=None):
+        super().__init__(max_age, loader, context)
+        self._samples = _GroupedSamples()
+
+    def _build_structures(self, entries):
+        '''Build from (id, group) rows.'''
+        samples = _GroupedSamples()
+        for item_id, group in entries:
+            samples.add(item_id, group)
+        return samples
+
+    def _use_structures(self, samples):
+        self._samples = samples
+
+    def _add(self, item_id, group):
+        self._samples.add(item_id, group)
+
+    def _remove(self, item_id):
+        self._samples.remove(item_id)
+
+    def add(self, item_id, group):
+        self._apply(self._add, item_id, group)
+
+    def remove(self, item_id):
+        self._apply(self._remove, item_id)
+
+    def sample(self, k: int, group=None, exclude=()) -> list:
+        '''Up to k distinct random ids, from one group or (with group None) from everything, skipping `exclude`.'''
+        with self._lock:
+            candidates = self._samples.all if group is None else self._samples.groups.get(group, _DenseSet())
+            available = len(candidates.items) - sum(1 for item_id in exclude if item_id in candidates.positions)
+            wanted = min(k, available)
+            picks = []
+            seen = set(exclude)
+            while len(picks) < wanted:
+                item_id = candidates.items[randrange(len(candidates.items))]
+                if item_id not in seen:
+                    seen.add(item_id)
+                    picks.append(item_id)
+            return picks
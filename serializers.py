@@ -0,0 +1,153 @@
+import datetime as dt
+import os
+
+from functools import wraps
+from flask import current_app
+from flask_smorest.utils import unpack_tuple_response
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.utils import ensure_text_type, get_value
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ------------------------------------------------------------
+# Compiled dump functions. Each schema is turned into plain Python source once,
+# with one line per field, so dumping a row costs a few attribute lookups
+# instead of marshmallow's per-field method dispatch. Fields this module
+# doesn't know are delegated to the marshmallow field itself, and schemas with
+# dump hooks are left entirely to marshmallow, so the output always matches
+# `schema.dump`.
+# ------------------------------------------------------------
+
+use_orjson = orjson is not None and os.getenv('SERIALIZER_JSON', 'stdlib').lower() == 'orjson'
+
+_compiled = {}
+
+_iso_formats = (None, 'iso', 'iso8601')
+
+
+def _value_expression(field, var: str, namespace: dict) -> str | None:
+    '''A Python expression serializing `var` the way `field._serialize` would, or None if it can't be compiled.'''
+    field_type = type(field)
+    if field_type in (fields.Integer, fields.Float) and not field.as_string:
+        return f'None if {var} is None else {field.num_type.__name__}({var})'
+    if field_type is fields.String:
+        return f'None if {var} is None else ({var} if type({var}) is str else ensure_text_type({var}))'
+    if field_type in (fields.Boolean, fields.Raw):
+        return var
+    if field_type is fields.DateTime and field.format in _iso_formats:
+        return f'None if {var} is None else datetime_isoformat({var})'
+    if field_type is fields.Nested and isinstance(field.nested, Schema):
+        nested_schema = field.schema
+        nested_dump = _compile_one(nested_schema)
+        if nested_dump is None:
+            return None
+        name = f'nested_{len(namespace)}'
+        namespace[name] = nested_dump
+        if nested_schema.many or field.many:
+            return f'None if {var} is None else [{name}(each) for each in {var}]'
+        return f'None if {var} is None else {name}({var})'
+    if field_type is fields.List:
+        inner = _value_expression(field.inner, 'each', namespace)
+        if inner is None:
+            return None
+        return f'None if {var} is None else [{inner} for each in {var}]'
+    return None
+
+
+def _dump_function(name: str, schema: Schema, getter: str, namespace: dict) -> list[str]:
+    lines = [f'def {name}(obj):', '    out = {}']
+    for index, (attr_name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else attr_name
+        source = field.attribute if field.attribute is not None else attr_name
+        expression = None
+        if field.dump_default is missing and '.' not in source:
+            expression = _value_expression(field, 'value', namespace)
+        if expression is None:
+            namespace[f'field_{index}'] = field
+            lines.append(f'    value = field_{index}.serialize({attr_name!r}, obj, accessor=get_attribute)')
+            lines.append('    if value is not MISSING:')
+            lines.append(f'        out[{key!r}] = value')
+            continue
+        lines.append(f'    value = {getter.format(key=repr(source))}')
+        lines.append('    if value is not MISSING:')
+        lines.append(f'        out[{key!r}] = {expression}')
+    lines.append('    return out')
+    return lines
+
+
+def _compile_one(schema: Schema):
+    '''Compile a function dumping one object like `schema.dump(obj, many=False)`, or return None if the schema can't be compiled.'''
+    if schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP] or schema.dict_class is not dict:
+        return None
+    namespace = {
+        'MISSING': missing,
+        'Row': Row,
+        'ensure_text_type': ensure_text_type,
+        'datetime_isoformat': dt.datetime.isoformat,
+        'get_value': get_value,
+        'get_attribute': schema.get_attribute
+    }
+    # Same lookup order as marshmallow's get_value: item access first, then attributes.
+    # Dicts and SQLAlchemy rows (which only index by position) get inlined versions of it.
+    lines = _dump_function('dump_dict', schema, '(obj[{key}] if {key} in obj else getattr(obj, {key}, MISSING))', namespace)
+    lines += _dump_function('dump_object', schema, 'getattr(obj, {key}, MISSING)', namespace)
+    lines += _dump_function('dump_other', schema, 'get_value(obj, {key}, MISSING)', namespace)
+    lines += [
+        'def dump(obj):',
+        '    if type(obj) is dict:',
+        '        return dump_dict(obj)',
+        "    if isinstance(obj, Row) or not hasattr(obj, '__getitem__'):",
+        '        return dump_object(obj)',
+        '    return dump_other(obj)'
+    ]
+    exec(compile('\n'.join(lines), f'<compiled dump of {type(schema).__name__}>', 'exec'), namespace)
+    return namespace['dump']
+
+
+def compile_schema(schema: Schema):
+    '''Return a function equivalent to `schema.dump`, compiled on first use and cached per schema instance.'''
+    key = id(schema)
+    if key not in _compiled:
+        dump_one = _compile_one(schema)
+        if dump_one is None:
+            dump = schema.dump
+        elif schema.many:
+            def dump(objs, dump_one=dump_one):
+                return None if objs is None else [dump_one(obj) for obj in objs]
+        else:
+            dump = dump_one
+        # Keep the schema alive so its id can't be reused by another object.
+        _compiled[key] = (schema, dump)
+    return _compiled[key][1]
+
+
+def json_response(data, status_code: int, headers: dict | None = None):
+    '''A JSON response for already-dumped data, written with orjson when SERIALIZER_JSON=orjson.'''
+    if use_orjson:
+        response = current_app.response_class(orjson.dumps(data, option=orjson.OPT_SORT_KEYS), mimetype='application/json')
+    else:
+        response = current_app.json.response(data)
+    response.status_code = status_code
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
+def compiled_response(blp, status_code: int, schema: Schema):
+    '''Like `blp.response(status_code, schema)`, but dumps with the compiled serializer. The schema still documents the endpoint.'''
+    dump = compile_schema(schema)
+
+    def decorator(func):
+        @blp.response(status_code, schema)
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result, result_status_code, headers = unpack_tuple_response(func(*args, **kwargs))
+            return json_response(dump(result), result_status_code or status_code, headers)
+        return wrapper
+    return decorator
@@ -26,4 +26,127 @@ def login_credentials():
     refresh_token = signin_data['refresh_token']
     signed_in = True
     credentials = {"access_token": access_token, "refresh_token": refresh_token, "signed_in": signed_in}
-    return credentials
\ No newline at end of file
+    return credentials
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    from app import create_app
+    from blocklist import revocation_store
+    from db import db
+    from igdb import game_cache
+    from models.user_access import user_access_cache, user_access_version
+    from models.word_search import random_word_index, search_result_cache, word_suggestion_index, word_trigram_index
+    from resources.game import game_search_index, random_game_index, random_game_pool
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JWT_SECRET_KEY', 'test-secret-key-long-enough-for-hs256')
+    monkeypatch.setenv('RANDOM_GAME_POOL_WARM_ON_START', 'false')
+    monkeypatch.setenv('FLAG_MAIL_SENDER', 'false')
+    (tmp_path / 'access.txt').write_text('test-access-token')
+
+    app = create_app('sqlite://')
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    game_cache.clear()
+    game_search_index.invalidate()
+    random_game_index.invalidate()
+    random_game_pool.clear()
+    word_trigram_index.invalidate()
+    word_suggestion_index.invalidate()
+    random_word_index.invalidate()
+    search_result_cache.clear()
+    user_access_cache.clear()
+    user_access_version.reset()
+    revocation_store.invalidate()
+
+
+@pytest.fixture
+def query_budget(app):
+    '''`with query_budget(n):` fails if a request made inside the block runs more than `n` SQL statements.
+
+    The session is emptied first, so relationships load as they would in a fresh request instead of from
+    objects the test already holds.
+    '''
+    from contextlib import contextmanager
+    from flask import request, request_finished, request_started
+    from sqlalchemy import event
+    from db import db
+
+    @contextmanager
+    def query_budget(budget: int):
+        requests = []
+        current = {}
+
+        def start_request(sender, **extra):
+            current['statements'] = []
+            requests.append((request.method, request.path, current['statements']))
+
+        def finish_request(sender, **extra):
+            current.pop('statements', None)
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            if 'statements' in current:
+                current['statements'].append(statement)
+
+        db.session.expunge_all()
+        request_started.connect(start_request, app)
+        request_finished.connect(finish_request, app)
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            yield requests
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+            request_finished.disconnect(finish_request, app)
+            request_started.disconnect(start_request, app)
+        for method, path, statements in requests:
+            assert len(statements) <= budget, \
+                f'{method} {path} ran {len(statements)} SQL statements, over its budget of {budget}:\n' + '\n'.join(statements)
+    return query_budget
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_user(app):
+    from db import db
+    from models import UserModel
+
+    def add_user(username='tester', **kwargs):
+        user = UserModel(username=username, email=kwargs.pop('email', f'{username}@example.com'), is_active=kwargs.pop('is_active', True), **kwargs)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return add_user
+
+
+@pytest.fixture
+def add_word(app):
+    from datetime import datetime
+    from db import db
+    from models import GameModel, WordModel
+
+    def add_word(word, author, game_id=1, **kwargs):
+        if not db.session.get(GameModel, game_id):
+            db.session.add(GameModel(game_id=game_id))
+        fields = {
+            'definition': f'Definition of {word}.',
+            'example': f'An example using {word}.',
+            'published': True,
+            'is_active': True,
+            'upvotes': 0,
+            'downvotes': 0,
+            'submit_datetime': datetime(2025, 1, 1)
+        }
+        fields.update(kwargs)
+        new_word = WordModel(word=word, author_id=author.user_id, game_id=game_id, **fields)
+        db.session.add(new_word)
+        db.session.commit()
+        return new_word
+    return add_word
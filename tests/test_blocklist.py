@@ -0,0 +1,52 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from flask_jwt_extended import create_refresh_token
+
+from blocklist import BloomFilter, DatabaseRevocationStore, utc_now
+from db import db
+from models import RevokedTokenModel
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom_filter = BloomFilter(capacity=1000)
+    added = [str(uuid4()) for _ in range(1000)]
+    for jti in added:
+        bloom_filter.add(jti)
+
+    assert all(jti in bloom_filter for jti in added)
+    assert sum(str(uuid4()) in bloom_filter for _ in range(2000)) < 100
+
+
+def test_logout_revokes_the_refresh_token(client, app, add_user):
+    user = add_user()
+    with app.app_context():
+        token = create_refresh_token(identity=str(user.user_id))
+    client.set_cookie('refresh_token_cookie', token)
+
+    assert client.get('/logout').status_code == 204
+    client.set_cookie('refresh_token_cookie', token)
+    response = client.get('/refresh')
+
+    assert response.status_code == 401
+    assert response.json['error'] == 'token_revoked'
+
+
+def test_revocations_reach_other_workers_on_refresh(app):
+    worker, other_worker = (DatabaseRevocationStore(refresh_interval=0, rebuild_interval=3600, capacity=100) for _ in range(2))
+    assert not other_worker.is_revoked('jti-1')
+
+    worker.revoke('jti-1', utc_now() + timedelta(hours=1))
+
+    assert other_worker.is_revoked('jti-1')
+
+
+def test_rebuild_purges_expired_revocations(app):
+    store = DatabaseRevocationStore(refresh_interval=0, rebuild_interval=3600, capacity=100)
+    store.revoke('expired', utc_now() - timedelta(seconds=1))
+    store.revoke('current', utc_now() + timedelta(hours=1))
+
+    assert not store.is_revoked('expired')
+    store.rebuild()
+
+    assert db.session.scalars(db.select(RevokedTokenModel.jti)).all() == ['current']
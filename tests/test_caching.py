@@ -0,0 +1,110 @@
+import threading
+
+import caching
+import igdb
+
+from caching import GenerationCache, SingleFlight, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(caching, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=10, max_entries=10)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    now[0] += 11
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_generation_cache_drops_only_bumped_scopes():
+    cache = GenerationCache(ttl=60, max_entries=10)
+    cache.set('doom', cache.stamp(('game:1',)), 'doom words')
+    cache.set('quake', cache.stamp(('game:2',)), 'quake words')
+    stamp_before_write = cache.stamp(('game:2',))
+
+    cache.bump({'game:2'})
+
+    assert cache.get('doom', cache.stamp(('game:1',))) == 'doom words'
+    assert cache.get('quake', cache.stamp(('game:2',))) is None
+    # A value computed before the write must not be stored as current.
+    cache.set('quake', stamp_before_write, 'old quake words')
+    assert cache.get('quake', cache.stamp(('game:2',))) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['stale'] == 2
+
+
+def test_generation_cache_epoch_change_drops_everything():
+    epoch = [3]
+    cache = GenerationCache(ttl=60, max_entries=10, epoch=lambda: epoch[0], epoch_check_interval=0)
+    cache.set('doom', cache.stamp(('game:1',)), 'doom words')
+
+    epoch[0] = 4
+
+    assert cache.get('doom', cache.stamp(('game:1',))) is None
+
+
+def test_game_cache_lookup_by_slug_fills_id():
+    cache = igdb.GameCache(ttl=60, max_entries=10)
+    cache.put({'id': 7, 'slug': 'doom', 'name': 'DOOM'})
+
+    assert cache.get_by_slug('doom')['name'] == 'DOOM'
+    assert cache.get_by_id(7)['name'] == 'DOOM'
+    cache.invalidate(game_id=7)
+    assert cache.get_by_id(7) is None
+
+
+def test_single_flight_shares_one_call():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return ['doom']
+
+    def caller():
+        results.append(single_flight.do('slug="doom"', slow_fetch))
+
+    threads = [threading.Thread(target=caller) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    while single_flight.stats()['shared'] < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [['doom']] * 5
+    assert single_flight.stats() == {'calls': 1, 'shared': 4, 'in_flight': 0}
+
+
+def test_single_flight_propagates_errors():
+    single_flight = SingleFlight()
+
+    def failing_fetch():
+        raise igdb.IGDBError('down', 503)
+
+    try:
+        single_flight.do('id=(1)', failing_fetch)
+    except igdb.IGDBError as e:
+        assert e.status_code == 503
+    assert single_flight.stats()['in_flight'] == 0
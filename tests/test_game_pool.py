@@ -0,0 +1,93 @@
+import time
+
+import resources.game
+
+from db import db
+from game_pool import RefillingPool
+from models import GameModel
+
+
+def wait_for_refill(pool):
+    for i in range(200):
+        if not pool.stats()['refilling']:
+            return
+        time.sleep(0.01)
+
+
+def test_pool_refills_below_low_water(app):
+    batches = []
+    def refill(count):
+        batches.append(count)
+        return [{'id': len(batches) * 100 + i} for i in range(count)]
+    pool = RefillingPool(size=4, low_water=2, refill=refill)
+
+    assert pool.pop(app) is None
+    wait_for_refill(pool)
+    served = [pool.pop(), pool.pop(), pool.pop()]
+    wait_for_refill(pool)
+
+    assert served == [{'id': 100}, {'id': 101}, {'id': 102}]
+    assert batches == [4, 3]
+    assert len(pool) == 4
+    assert pool.stats()['empty'] == 1
+    assert pool.stats()['served'] == 3
+
+
+def test_pool_survives_failed_refills(app):
+    def refill(count):
+        raise RuntimeError('IGDB down')
+    pool = RefillingPool(size=4, low_water=2, refill=refill)
+
+    pool.start(app)
+    wait_for_refill(pool)
+
+    assert pool.pop() is None
+    assert pool.stats()['refill_failures'] >= 1
+
+
+def test_random_game_is_served_from_pool(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game.random_game_pool, 'refill', lambda count: [{'id': 7, 'name': 'DOOM'}] * count)
+    db.session.add(GameModel(game_id=3, name='Quake', slug='quake'))
+    db.session.commit()
+
+    cold_response = client.get('/games/random')
+    wait_for_refill(resources.game.random_game_pool)
+    warm_response = client.get('/games/random')
+
+    assert cold_response.json['name'] == 'Quake'
+    assert warm_response.json['name'] == 'DOOM'
+
+
+def test_refill_resolves_stored_games_without_igdb(app, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_games_by_ids', lambda game_ids: [])
+    db.session.add(GameModel(game_id=3, name='Quake', slug='quake'))
+    db.session.commit()
+
+    assert resources.game.refill_random_games(2) == [{'id': 3, 'name': 'Quake', 'slug': 'quake', 'summary': None, 'cover_url': None, 'first_release_date': None}]
+
+
+def test_refill_skips_games_already_in_the_pool(app, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_games_by_ids', lambda game_ids: [])
+    for game_id, name in [(3, 'Quake'), (4, 'Doom')]:
+        db.session.add(GameModel(game_id=game_id, name=name, slug=name.lower()))
+    db.session.commit()
+    monkeypatch.setattr(resources.game.random_game_pool, 'items', lambda: [{'id': 3, 'name': 'Quake'}])
+
+    assert [game['id'] for game in resources.game.refill_random_games(5)] == [4]
+
+
+def test_random_games_are_sampled_from_the_index(app, client, monkeypatch, query_budget):
+    monkeypatch.setattr(resources.game, 'fetch_games_by_ids', lambda game_ids: [])
+    db.session.add(GameModel(game_id=3))
+    db.session.commit()
+    resources.game.random_game_index.rebuild()
+    assert resources.game.pick_stored_random_game() is None
+
+    resources.game.store_game(db.session.get(GameModel, 3), {'id': 3, 'name': 'Quake', 'slug': 'quake'})
+    monkeypatch.setattr(resources.game.random_game_index, 'loader', lambda: (_ for _ in ()).throw(AssertionError('index rebuilt')))
+    monkeypatch.setattr(resources.game.random_game_pool, 'refill', lambda count: [])
+
+    with query_budget(1):
+        response = client.get('/games/random')
+    assert response.json['name'] == 'Quake'
+    assert [game['id'] for game in resources.game.refill_random_games(3)] == [3]
@@ -0,0 +1,176 @@
+from datetime import datetime
+
+import igdb
+import resources.game
+
+from db import db
+from models import GameModel
+from pagination import decode_cursor, encode_cursor
+
+
+def add_game(**kwargs):
+    game = GameModel(**kwargs)
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+
+def fail_fetch(*args, **kwargs):
+    raise AssertionError('IGDB should not be called')
+
+
+def test_game_by_id_is_served_from_store(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_game_by_id', fail_fetch)
+    add_game(game_id=7, name='DOOM', slug='doom', summary='Demons.', cover_url='//img/doom.jpg', first_release_date=datetime(1993, 12, 10))
+
+    response = client.get('/games/by_id/7')
+
+    assert response.status_code == 200
+    assert response.json['name'] == 'DOOM'
+    assert response.json['cover_url'] == '//img/doom.jpg'
+
+
+def test_game_by_slug_is_served_from_store(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_game_by_slug', fail_fetch)
+    add_game(game_id=7, name='DOOM', slug='doom')
+
+    response = client.get('/games/doom')
+
+    assert response.status_code == 200
+    assert response.json['id'] == 7
+
+
+def test_unsynced_game_falls_back_to_igdb_and_is_stored(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_game_by_id', lambda game_id, where=None: {'id': game_id, 'name': 'Quake', 'slug': 'quake'})
+    add_game(game_id=9)
+
+    response = client.get('/games/by_id/9')
+
+    assert response.status_code == 200
+    assert response.json['slug'] == 'quake'
+    assert db.session.get(GameModel, 9).name == 'Quake'
+
+
+def test_fetch_games_by_ids_batches(monkeypatch):
+    calls = []
+    def fake_fetch_games(where, limit=None, **kwargs):
+        calls.append((where, limit))
+        return []
+    monkeypatch.setattr(igdb, 'fetch_games', fake_fetch_games)
+
+    igdb.fetch_games_by_ids(range(1, 6), batch_size=2)
+
+    assert calls == [('id=(1,2)', 2), ('id=(3,4)', 2), ('id=(5)', 1)]
+
+
+def test_game_batch_queries_igdb_once_for_misses(app, client, monkeypatch):
+    calls = []
+    def fake_fetch_games_by_ids(game_ids):
+        calls.append(list(game_ids))
+        return [{'id': game_id, 'name': f'Game {game_id}', 'slug': f'game-{game_id}'} for game_id in game_ids if game_id != 404]
+    monkeypatch.setattr(resources.game, 'fetch_games_by_ids', fake_fetch_games_by_ids)
+    add_game(game_id=1, name='DOOM', slug='doom')
+    add_game(game_id=2)
+
+    response = client.get('/games/batch?ids=3,1,2,404,3')
+
+    assert response.status_code == 200
+    assert [game['id'] for game in response.json] == [3, 1, 2]
+    assert calls == [[3, 2, 404]]
+    assert db.session.get(GameModel, 2).name == 'Game 2'
+
+
+def test_game_batch_rejects_too_many_ids(app, client):
+    ids = ','.join(str(i) for i in range(101))
+
+    response = client.get(f'/games/batch?ids={ids}')
+
+    assert response.status_code == 422
+
+
+def test_game_search_is_answered_from_local_index(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_games', fail_fetch)
+    add_game(game_id=1, name='Halo: Combat Evolved', slug='halo-combat-evolved')
+    add_game(game_id=2, name='Halo 2', slug='halo-2')
+    add_game(game_id=3, name='Half-Life', slug='half-life')
+    resources.game.load_game_search_index()
+
+    starts_with_response = client.get('/games/search?startsWith=hal&limit=2')
+    name_response = client.get('/games/search?name=combat&limit=1')
+
+    assert [game['id'] for game in starts_with_response.json] == [3, 2]
+    assert [game['id'] for game in name_response.json] == [1]
+
+
+def test_game_search_falls_back_to_igdb_when_local_results_run_short(app, client, monkeypatch):
+    calls = []
+    def fake_fetch_games(where, limit=None, offset=None, **kwargs):
+        calls.append((where, limit, offset))
+        return [{'id': 4, 'name': 'Hades', 'slug': 'hades'}]
+    monkeypatch.setattr(resources.game, 'fetch_games', fake_fetch_games)
+    add_game(game_id=3, name='Half-Life', slug='half-life')
+    resources.game.load_game_search_index()
+
+    response = client.get('/games/search?startsWith=ha&limit=5')
+
+    assert [game['id'] for game in response.json] == [3, 4]
+    assert calls == [(f'name~"ha"* & {resources.game.MAIN_GAME_FILTER} & id!=(3)', 4, 0)]
+
+
+def test_game_search_continues_into_igdb_after_local_matches(app, client, monkeypatch):
+    # IGDB also knows game 1, which the id!=(...) filter leaves out.
+    igdb_matches = [{'id': game_id, 'name': f'Halo {game_id}'} for game_id in (5, 6, 7)]
+    calls = []
+    def fake_fetch_games(where, limit=None, offset=None, **kwargs):
+        calls.append((where, limit, offset))
+        return igdb_matches[offset:offset + limit]
+    monkeypatch.setattr(resources.game, 'fetch_games', fake_fetch_games)
+    for game_id, name in [(1, 'Halo'), (2, 'Halo 2'), (3, 'Halo 3')]:
+        add_game(game_id=game_id, name=name, slug=name.lower().replace(' ', '-'))
+    resources.game.load_game_search_index()
+
+    pages = [client.get(f'/games/search?startsWith=halo&limit=2&offset={offset}').json for offset in (0, 2, 4)]
+
+    assert [[game['id'] for game in page] for page in pages] == [[1, 2], [3, 5], [6, 7]]
+    assert [(limit, offset) for where, limit, offset in calls] == [(1, 0), (2, 1)]
+    assert calls[0][0].endswith(' & id!=(1,2,3)')
+
+
+def test_game_search_cursor_records_its_source(app, client, monkeypatch):
+    igdb_matches = [{'id': game_id, 'name': f'Halo {game_id}'} for game_id in (5, 6, 7)]
+    monkeypatch.setattr(resources.game, 'fetch_games', lambda where, limit=None, offset=None, **kwargs: igdb_matches[offset:offset + limit])
+    for game_id, name in [(1, 'Halo'), (2, 'Halo 2')]:
+        add_game(game_id=game_id, name=name, slug=name.lower().replace(' ', '-'))
+    resources.game.load_game_search_index()
+
+    pages, cursors, url = [], [], '/games/search?startsWith=halo&limit=2'
+    while url:
+        response = client.get(url)
+        pages.append([game['id'] for game in response.json])
+        cursor = response.headers.get('X-Next-Cursor')
+        cursors.append(cursor and decode_cursor(cursor, {'source': str, 'offset': int}))
+        url = cursor and f'/games/search?startsWith=halo&limit=2&cursor={cursor}'
+
+    assert pages == [[1, 2], [5, 6], [7]]
+    assert cursors == [{'source': 'igdb', 'offset': 0}, {'source': 'igdb', 'offset': 2}, None]
+
+
+def test_game_search_pages_with_cursor(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_games', fail_fetch)
+    for game_id, name in enumerate(['Halo', 'Halo 2', 'Halo 3', 'Halo 4'], start=1):
+        add_game(game_id=game_id, name=name, slug=name.lower().replace(' ', '-'))
+    resources.game.load_game_search_index()
+
+    first_page = client.get('/games/search?startsWith=halo&limit=2')
+    second_page = client.get(f'/games/search?startsWith=halo&limit=2&cursor={first_page.headers["X-Next-Cursor"]}')
+
+    assert [game['id'] for game in first_page.json] == [1, 2]
+    assert [game['id'] for game in second_page.json] == [3, 4]
+
+
+def test_game_search_rejects_bad_cursors(app, client, monkeypatch):
+    monkeypatch.setattr(resources.game, 'fetch_games', fail_fetch)
+
+    for position in [{'source': 'local', 'offset': 'x'}, {'source': 'local', 'offset': -2}, {'source': 'local', 'offset': 1.5},
+                     {'source': 'elsewhere', 'offset': 0}, {'offset': 2}, {}]:
+        assert client.get(f'/games/search?startsWith=halo&cursor={encode_cursor(position)}').status_code == 400
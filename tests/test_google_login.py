@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+from requests import ConnectionError
+
+from google_login import GoogleCertCache, GoogleCertsError, GoogleTokenError, GoogleTokenVerifier, cache_control_max_age
+
+
+CLIENT_ID = 'client-id.apps.googleusercontent.com'
+
+
+def make_key(key_id):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return crypt.RSASigner.from_string(private_pem, key_id), public_pem.decode()
+
+
+@pytest.fixture(scope='module')
+def keys():
+    return {key_id: make_key(key_id) for key_id in ('key-1', 'key-2')}
+
+
+def make_token(signer, **claims):
+    now = int(time.time())
+    payload = {'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'email': 'player@example.com', 'iat': now, 'exp': now + 300}
+    payload.update(claims)
+    return jwt.encode(signer, payload).decode()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeGoogle:
+    def __init__(self, certs, max_age=600):
+        self.certs = certs
+        self.max_age = max_age
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError('unreachable')
+        return dict(self.certs), self.max_age
+
+
+def test_cache_control_max_age():
+    assert cache_control_max_age('public, max-age=19845, must-revalidate, no-transform') == 19845
+    assert cache_control_max_age('no-cache') is None
+
+
+def test_certs_are_cached_for_max_age_and_reused_when_google_is_down(keys):
+    google = FakeGoogle({'key-1': keys['key-1'][1]})
+    clock = FakeClock()
+    cache = GoogleCertCache(fetch=google, refresh_ahead=1.0, clock=clock)
+
+    cache.get()
+    clock.now += 599
+    cache.get()
+    assert google.calls == 1
+
+    clock.now += 2
+    google.fail = True
+    assert cache.get() == {'key-1': keys['key-1'][1]}
+    assert google.calls == 2
+
+
+def test_certs_refresh_ahead_of_expiry_in_the_background(keys):
+    google = FakeGoogle({'key-1': keys['key-1'][1]})
+    clock = FakeClock()
+    cache = GoogleCertCache(fetch=google, refresh_ahead=0.5, clock=clock)
+    cache.get()
+
+    clock.now += 400
+    google.certs = {'key-2': keys['key-2'][1]}
+    assert 'key-1' in cache.get()
+
+    for _ in range(100):
+        if google.calls == 2:
+            break
+        time.sleep(0.01)
+    assert 'key-2' in cache.get()
+
+
+def test_empty_cache_and_google_down_is_an_error():
+    google = FakeGoogle({})
+    google.fail = True
+    with pytest.raises(GoogleCertsError):
+        GoogleCertCache(fetch=google).get()
+
+
+def test_verifier_checks_signature_audience_and_issuer(keys):
+    verifier = GoogleTokenVerifier(CLIENT_ID, GoogleCertCache(fetch=FakeGoogle({'key-1': keys['key-1'][1]})))
+    signer = keys['key-1'][0]
+
+    assert verifier.verify(make_token(signer))['email'] == 'player@example.com'
+    for token in (make_token(signer, aud='someone-else'), make_token(signer, iss='https://evil.example.com'), 'not-a-token'):
+        with pytest.raises(GoogleTokenError):
+            verifier.verify(token)
+
+
+def test_unknown_key_id_forces_one_refetch(keys):
+    google = FakeGoogle({'key-1': keys['key-1'][1]})
+    clock = FakeClock()
+    verifier = GoogleTokenVerifier(CLIENT_ID, GoogleCertCache(fetch=google, clock=clock))
+    verifier.verify(make_token(keys['key-1'][0]))
+
+    clock.now += 61
+    google.certs = {'key-1': keys['key-1'][1], 'key-2': keys['key-2'][1]}
+
+    assert verifier.verify(make_token(keys['key-2'][0]))['email'] == 'player@example.com'
+    assert google.calls == 2
+
+
+def test_login_uses_injected_verifier(client, app, keys):
+    app.extensions['google_token_verifier'] = GoogleTokenVerifier(CLIENT_ID, GoogleCertCache(fetch=FakeGoogle({'key-1': keys['key-1'][1]})))
+
+    response = client.post('/login', json={'source': 'Google', 'token': make_token(keys['key-1'][0])})
+    assert response.status_code == 201
+    assert client.post('/login', json={'source': 'Google', 'token': make_token(keys['key-1'][0])}).status_code == 200
+    assert client.post('/login', json={'source': 'Google', 'token': make_token(keys['key-1'][0], aud='other')}).status_code == 401
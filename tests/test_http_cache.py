@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from db import db
+from models import GameModel
+from votes import VoteAggregator
+
+
+def test_word_updated_at_follows_every_write(app, add_user, add_word):
+    word = add_word('Noob', add_user())
+    created_at = word.updated_at
+
+    word.definition = 'A new player.'
+    db.session.commit()
+    edited_at = word.updated_at
+    client = app.test_client()
+    client.post('/words/vote', json={'word_id': word.word_id, 'upvote_action': 'increment'})
+    db.session.expire_all()
+    voted_at = word.updated_at
+    aggregator = VoteAggregator(interval=60)
+    aggregator.start(app)
+    aggregator.add(word.word_id, 1, 0)
+    aggregator.stop()
+    db.session.expire_all()
+
+    assert created_at < edited_at < voted_at < word.updated_at
+
+
+def test_word_revalidates_with_etag(client, add_user, add_word):
+    word = add_word('Noob', add_user())
+
+    first = client.get(f'/words/{word.word_id}')
+    by_etag = client.get(f'/words/{word.word_id}', headers={'If-None-Match': first.headers['ETag']})
+    by_date = client.get(f'/words/{word.word_id}', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'public, max-age=60'
+    assert 'Last-Modified' not in first.headers
+    assert by_etag.status_code == 304
+    assert by_etag.data == b''
+    assert by_etag.headers['ETag'] == first.headers['ETag']
+    assert by_date.status_code == 200
+
+
+def test_word_etag_changes_with_word_and_author(client, add_user, add_word):
+    author = add_user()
+    word = add_word('Noob', author)
+    etag = client.get(f'/words/{word.word_id}').headers['ETag']
+
+    author.username = 'renamed'
+    db.session.commit()
+    renamed = client.get(f'/words/{word.word_id}', headers={'If-None-Match': etag})
+    client.post('/words/vote', json={'word_id': word.word_id, 'upvote_action': 'increment'})
+    voted = client.get(f'/words/{word.word_id}', headers={'If-None-Match': renamed.headers['ETag']})
+
+    assert renamed.status_code == 200
+    assert renamed.json['user']['username'] == 'renamed'
+    assert voted.status_code == 200
+    assert voted.json['upvotes'] == 1
+
+
+def test_game_etag_is_a_content_hash(client, monkeypatch):
+    monkeypatch.setenv('CACHE_CONTROL_GAME', 'public, max-age=5')
+    game = GameModel(game_id=7, name='DOOM', slug='doom', first_release_date=datetime(1993, 12, 10))
+    db.session.add(game)
+    db.session.commit()
+
+    by_slug = client.get('/games/doom')
+    by_id = client.get('/games/by_id/7', headers={'If-None-Match': by_slug.headers['ETag']})
+
+    assert by_slug.headers['Cache-Control'] == 'public, max-age=5'
+    assert 'Last-Modified' not in by_slug.headers
+    assert by_id.status_code == 304
+
+
+def test_cache_control_can_be_turned_off(client, add_user, add_word, monkeypatch):
+    monkeypatch.setenv('CACHE_CONTROL_WORD', '')
+    word = add_word('Noob', add_user())
+
+    response = client.get(f'/words/{word.word_id}')
+
+    assert 'Cache-Control' not in response.headers
+    assert 'ETag' in response.headers
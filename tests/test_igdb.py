@@ -0,0 +1,69 @@
+import pytest
+
+from requests import ConnectionError as RequestsConnectionError
+
+import igdb
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    def install(response):
+        session = FakeSession(response)
+        monkeypatch.setattr(igdb, 'get_session', lambda: session)
+        return session
+    return install
+
+
+def test_fetch_games_normalizes_payload(fake_session):
+    session = fake_session(FakeResponse(200, [{'id': 1, 'slug': 'doom', 'first_release_date': 0, 'cover': {'url': '//img/doom.jpg'}}]))
+
+    games = igdb.fetch_games('slug="doom"', limit=1, offset=0)
+
+    assert games[0]['cover_url'] == '//img/doom.jpg'
+    assert games[0]['first_release_date'].year in (1969, 1970)
+    url, kwargs = session.calls[0]
+    assert url == igdb.IGDB_GAMES_URL
+    assert kwargs['data'] == f'where slug="doom";\nfields {igdb.GAME_FIELDS};\nlimit 1;\noffset 0;'
+    assert kwargs['timeout'] == igdb.get_timeout()
+
+
+def test_fetch_games_raises_on_error_status(fake_session):
+    fake_session(FakeResponse(400, {'message': 'Syntax Error'}))
+
+    with pytest.raises(igdb.IGDBError) as error:
+        igdb.fetch_games('id=(1)')
+    assert error.value.status_code == 400
+
+
+def test_fetch_games_raises_on_transport_error(fake_session):
+    fake_session(RequestsConnectionError('boom'))
+
+    with pytest.raises(igdb.IGDBError):
+        igdb.fetch_games('id=(1)')
+
+
+def test_session_is_reused():
+    assert igdb.get_session() is igdb.get_session()
@@ -0,0 +1,122 @@
+import socketserver
+import threading
+
+import pytest
+
+from flask_jwt_extended import create_access_token
+from flask_mail import Mail
+
+from db import db
+from mail_queue import FlagMailSender, enqueue_flag_mail
+from models import FlagMailModel
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stub ready')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.reply('250-stub')
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                while (data_line := self.rfile.readline()) != b'.\r\n':
+                    lines.append(data_line.decode())
+                self.server.messages.append(''.join(lines))
+                self.reply('250 OK')
+            else:
+                self.reply('250 OK')
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=server.server_address[1], MAIL_USE_TLS=False, MAIL_SUPPRESS_SEND=False)
+    Mail(app)
+    monkeypatch.setenv('SEND_EMAIL', 'bot@example.com')
+    monkeypatch.setenv('FLAG_RECV_EMAIL', 'mods@example.com')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_flag_is_queued_without_sending(client, app, add_user, add_word):
+    user = add_user()
+    word = add_word('Noob', user)
+    with app.app_context():
+        token = create_access_token(identity=str(user.user_id))
+
+    response = client.post('/flag', json={'content_type': 'word', 'id': word.word_id, 'reason': 'spam'},
+        headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    mail = db.session.scalars(db.select(FlagMailModel)).one()
+    assert mail.subject == f'Flag for WORD {word.word_id}'
+    assert mail.sent_at is None
+
+
+def test_sender_reuses_one_connection(app, smtp_server):
+    sender = FlagMailSender(interval=60)
+    for number in range(3):
+        enqueue_flag_mail(f'Flag {number}', 'body')
+
+    assert sender.send_pending() == 3
+    enqueue_flag_mail('Flag 3', 'body')
+    assert sender.send_pending() == 1
+
+    assert len(smtp_server.messages) == 4
+    assert smtp_server.connections == 1
+    assert sender.stats()['queue_length'] == 0
+    assert sender.stats()['emails'] == 4
+
+
+def test_digest_batches_flags_into_one_email(app, smtp_server):
+    sender = FlagMailSender(interval=60, digest=True)
+    enqueue_flag_mail('Flag for WORD 1', 'first')
+    enqueue_flag_mail('Flag for GAME 2', 'second')
+
+    assert sender.send_pending() == 2
+
+    assert len(smtp_server.messages) == 1
+    assert 'Subject: 2 Flags' in smtp_server.messages[0]
+    assert 'Flag for GAME 2' in smtp_server.messages[0]
+
+
+def test_failed_sends_stay_queued(app, smtp_server):
+    sender = FlagMailSender(interval=60)
+    enqueue_flag_mail('Flag', 'body')
+    app.config['MAIL_PORT'] = 1
+    Mail(app)
+
+    assert sender.send_pending() == 0
+
+    mail = db.session.scalars(db.select(FlagMailModel)).one()
+    assert (mail.attempts, mail.claimed_by, mail.sent_at) == (1, None, None)
+    assert sender.stats()['queue_length'] == 1
+
+
+def test_stop_logs_a_failed_final_send(app, monkeypatch, caplog):
+    sender = FlagMailSender(interval=60)
+    sender.start(app)
+    def missing_table():
+        raise RuntimeError('no such table: flag_mail_queue')
+    monkeypatch.setattr(sender, 'send_pending', missing_table)
+
+    sender.stop()
+
+    assert 'Sending flag mail failed' in caplog.text
+    assert sender.stats()['running'] is False
@@ -0,0 +1,83 @@
+import os
+import time
+
+from datetime import datetime, timezone
+
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from db import db
+from models import GameModel, UserModel, WordModel
+
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def migrated_app(tmp_path, monkeypatch):
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JWT_SECRET_KEY', 'test-secret-key-long-enough-for-hs256')
+    monkeypatch.setenv('RANDOM_GAME_POOL_WARM_ON_START', 'false')
+    monkeypatch.setenv('FLAG_MAIL_SENDER', 'false')
+    (tmp_path / 'access.txt').write_text('test-access-token')
+    return create_app(f'sqlite:///{tmp_path / "migrated.db"}')
+
+
+def test_fulltext_search_sees_words_added_after_upgrading(tmp_path, monkeypatch):
+    app = migrated_app(tmp_path, monkeypatch)
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        triggers = db.session.scalars(text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name")).all()
+        author = UserModel(username='tester', email='tester@example.com', is_active=True)
+        db.session.add_all([author, GameModel(game_id=1)])
+        db.session.flush()
+        db.session.add(WordModel(word='Camping', definition='Waiting for enemies to walk by.', example='Stop camping.',
+                                 author_id=author.user_id, game_id=1, published=True, submit_datetime=datetime(2025, 1, 1)))
+        db.session.commit()
+
+        response = app.test_client().get('/words/search?word=camping&fulltext=true')
+        db.session.remove()
+
+    assert triggers == ['words_fts_delete', 'words_fts_insert', 'words_fts_update']
+    assert [word['word'] for word in response.json] == ['Camping']
+
+
+def test_updated_at_backfill_converts_local_submit_times_to_utc(tmp_path, monkeypatch):
+    app = migrated_app(tmp_path, monkeypatch)
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    try:
+        with app.app_context():
+            upgrade(directory=MIGRATIONS, revision='d5a8b3c6e912')
+            db.session.execute(text("INSERT INTO users (user_id, email, is_active) VALUES (1, 'tester@example.com', 1)"))
+            db.session.execute(text('INSERT INTO games (game_id) VALUES (1)'))
+            db.session.execute(text(
+                "INSERT INTO words (word_id, word, definition, example, author_id, published, submit_datetime, is_active, upvotes, downvotes, game_id) "
+                "VALUES (1, 'Noob', 'A new player.', 'Such a noob.', 1, 1, '2025-01-01 12:00:00.000000', 1, 0, 0, 1)"
+            ))
+            db.session.commit()
+            upgrade(directory=MIGRATIONS)
+            updated_at = db.session.get(WordModel, 1).updated_at
+            db.session.remove()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    assert updated_at == datetime(2025, 1, 1, 17, 0)
+
+
+def test_downgrades_keep_the_fulltext_triggers(tmp_path, monkeypatch):
+    app = migrated_app(tmp_path, monkeypatch)
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        triggers = {}
+        # Down past updated_at (e93b7d2f4a16), then past the word browse columns (e57a0d3b8c14).
+        for revision in ('d5a8b3c6e912', '9c1d7e5a2f60'):
+            downgrade(directory=MIGRATIONS, revision=revision)
+            triggers[revision] = db.session.scalars(text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name")).all()
+        db.session.remove()
+
+    assert triggers == {revision: ['words_fts_delete', 'words_fts_insert', 'words_fts_update'] for revision in triggers}
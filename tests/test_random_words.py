@@ -0,0 +1,42 @@
+from db import db
+from models import random_word_index
+
+
+def test_random_words_returns_full_count_of_eligible_words(client, add_user, add_word):
+    author = add_user()
+    eligible = {add_word(f'word{i}', author).word_id for i in range(8)}
+    add_word('hidden', author, published=False)
+    add_word('deleted', author, is_active=False)
+
+    response = client.get('/words/random')
+
+    assert response.status_code == 200
+    assert len(response.json) == 7
+    assert {word['word_id'] for word in response.json} <= eligible
+    assert all(word['author_username'] == 'tester' for word in response.json)
+
+
+def test_random_words_by_game(client, add_user, add_word):
+    author = add_user()
+    game_words = {add_word(f'halo{i}', author, game_id=2).word_id for i in range(3)}
+    add_word('doom', author, game_id=1)
+
+    response = client.get('/words/random', json={'game_id': 2})
+
+    assert {word['word_id'] for word in response.json} == game_words
+
+
+def test_random_words_tops_up_after_stale_picks(client, add_user, add_word, monkeypatch):
+    author = add_user()
+    words = [add_word(f'word{i}', author) for i in range(9)]
+    client.get('/words/random')
+    # Simulate another worker deactivating words without this worker's index hearing about it.
+    monkeypatch.setattr(random_word_index, 'max_age', float('inf'))
+    for word in words[:2]:
+        db.session.execute(db.update(type(word)).where(type(word).word_id == word.word_id).values(is_active=False))
+    db.session.commit()
+
+    for i in range(5):
+        response = client.get('/words/random')
+        assert len(response.json) == 7
+        assert {word['word_id'] for word in response.json}.isdisjoint({words[0].word_id, words[1].word_id})
@@ -0,0 +1,119 @@
+import threading
+import pytest
+
+import igdb
+
+from ratelimit import RequestScheduler, SchedulerBusy, SQLiteSlots, SQLiteTokenBucket, TokenBucket
+
+
+def test_token_bucket_reports_wait_when_empty():
+    bucket = TokenBucket(rate=4, capacity=2)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert 0 < bucket.try_acquire() <= 0.25
+
+
+def test_sqlite_token_bucket_is_shared(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    first_worker = SQLiteTokenBucket(path, rate=1, capacity=1)
+    second_worker = SQLiteTokenBucket(path, rate=1, capacity=1)
+
+    assert first_worker.try_acquire() == 0
+    assert second_worker.try_acquire() > 0
+
+
+def test_sqlite_slots_are_shared_and_expire(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    first_worker = SQLiteSlots(path, limit=1, lease=60)
+    second_worker = SQLiteSlots(path, limit=1, lease=60)
+    dead_worker = SQLiteSlots(path, limit=1, lease=0, name='other')
+
+    lease_id = first_worker.try_acquire()
+    assert lease_id is not None
+    assert second_worker.try_acquire() is None
+    first_worker.release(lease_id)
+    assert second_worker.try_acquire() is not None
+    assert dead_worker.try_acquire() is not None
+    assert dead_worker.try_acquire() is not None
+
+
+def test_scheduler_caps_in_flight_calls_across_workers(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    workers = [
+        RequestScheduler(TokenBucket(rate=100, capacity=100), max_in_flight=1, max_queue=4, max_wait=0.2,
+                         shared_slots=SQLiteSlots(path, limit=1, lease=60), slot_poll_interval=0.01)
+        for _ in range(2)
+    ]
+    release = threading.Event()
+    thread = threading.Thread(target=workers[0].run, args=(release.wait, 5))
+    thread.start()
+    while workers[0].stats()['in_flight'] == 0:
+        pass
+
+    with pytest.raises(SchedulerBusy):
+        workers[1].run(lambda: None)
+
+    release.set()
+    thread.join()
+    assert workers[1].run(lambda: 'done') == 'done'
+    assert workers[1].stats()['in_flight'] == 0
+
+
+def test_scheduler_retries_rate_limited_calls(monkeypatch):
+    scheduler = RequestScheduler(TokenBucket(rate=100, capacity=100), max_in_flight=2, max_queue=4, max_wait=5,
+                                 backoff_base=0.001, is_retryable=igdb.is_retryable)
+    responses = [igdb.IGDBError('slow down', 429), igdb.IGDBError('oops', 502), ['doom']]
+
+    def flaky_fetch():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert scheduler.run(flaky_fetch) == ['doom']
+    stats = scheduler.stats()
+    assert stats['requests'] == 3
+    assert stats['retries'] == 2
+    assert stats['in_flight'] == 0
+
+
+def test_scheduler_does_not_retry_client_errors():
+    scheduler = RequestScheduler(TokenBucket(rate=100, capacity=100), max_in_flight=2, max_queue=4, max_wait=5,
+                                 is_retryable=igdb.is_retryable)
+
+    def bad_request():
+        raise igdb.IGDBError('bad query', 400)
+
+    with pytest.raises(igdb.IGDBError):
+        scheduler.run(bad_request)
+    assert scheduler.stats()['retries'] == 0
+
+
+def test_scheduler_rejects_when_queue_is_full():
+    scheduler = RequestScheduler(TokenBucket(rate=100, capacity=100), max_in_flight=1, max_queue=1, max_wait=5)
+    release = threading.Event()
+    thread = threading.Thread(target=scheduler.run, args=(release.wait, 5))
+    thread.start()
+    while scheduler.stats()['in_flight'] == 0:
+        pass
+    waiter = threading.Thread(target=lambda: scheduler.run(lambda: None))
+    waiter.start()
+    while scheduler.stats()['queue_depth'] == 0:
+        pass
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.run(lambda: None)
+
+    release.set()
+    thread.join()
+    waiter.join()
+    assert scheduler.stats()['rejected'] == 1
+
+
+def test_scheduler_gives_up_at_deadline():
+    scheduler = RequestScheduler(TokenBucket(rate=0.1, capacity=1), max_in_flight=1, max_queue=4, max_wait=0.05)
+    scheduler.run(lambda: None)
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.run(lambda: None)
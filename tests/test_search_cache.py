@@ -0,0 +1,79 @@
+from sqlalchemy import update
+
+from db import db
+from models import WordModel, count_publish_run, search_result_cache
+from models.site_counter import count_search_changes, read_search_generations
+
+
+def search(client, query):
+    return [(word['word'], word['upvotes'], word['published']) for word in client.get(f'/words/search?{query}').json]
+
+
+def test_repeated_search_is_served_from_cache(client, add_user, add_word):
+    add_word('Noob', add_user())
+    hits = search_result_cache.stats()['hits']
+
+    first = client.get('/words/search?startsWith=n')
+    second = client.get('/words/search?startsWith=N')
+
+    assert second.json == first.json
+    assert search_result_cache.stats()['hits'] == hits + 1
+
+
+def test_writes_invalidate_only_matching_searches(client, add_user, add_word):
+    author = add_user()
+    add_word('Noob', author, game_id=1)
+    search(client, 'game_id=1')
+    search(client, 'startsWith=n')
+    hits = search_result_cache.stats()['hits']
+
+    add_word('Nerf', author, game_id=2)
+
+    assert search(client, 'game_id=1') == [('Noob', 0, True)]
+    assert [word for word, _, _ in search(client, 'startsWith=n')] == ['Nerf', 'Noob']
+    assert search_result_cache.stats()['hits'] == hits + 1
+
+
+def test_votes_and_deletes_invalidate_cached_results(client, add_user, add_word):
+    word = add_word('Noob', add_user())
+    search(client, 'game_id=1')
+
+    client.post('/words/vote', json={'word_id': word.word_id, 'upvote_action': 'increment'})
+    assert search(client, 'game_id=1') == [('Noob', 1, True)]
+
+    word.is_active = False
+    db.session.commit()
+    assert search(client, 'game_id=1') == []
+
+
+def test_publish_runs_invalidate_every_worker(client, add_user, add_word, monkeypatch):
+    monkeypatch.setattr(search_result_cache.epoch, 'interval', 0)
+    add_word('Noob', add_user(), published=False)
+    search(client, 'startsWith=n')
+
+    # The publish cron writes with a bulk UPDATE from its own process.
+    db.session.execute(update(WordModel).values(published=True))
+    count_publish_run(db.session.connection())
+    db.session.commit()
+
+    assert search(client, 'startsWith=n') == [('Noob', 0, True)]
+
+
+def test_writes_from_other_workers_invalidate_matching_searches(client, add_user, add_word, monkeypatch):
+    monkeypatch.setattr(search_result_cache.shared, 'interval', 0)
+    author = add_user()
+    word = add_word('Noob', author, game_id=1)
+    add_word('Nerf', author, game_id=2)
+    assert read_search_generations(['game:1', 'game:3']) == {'game:1': 1}
+    search(client, 'game_id=1')
+    search(client, 'game_id=2')
+    hits = search_result_cache.stats()['hits']
+
+    # Another worker renames the word; its flush bumps the shared generations of the scopes it touched.
+    db.session.execute(update(WordModel).where(WordModel.word_id == word.word_id).values(word='Newb'))
+    count_search_changes(db.session.connection(), {'all', 'game:1', 'letter:n'})
+    db.session.commit()
+
+    assert search(client, 'game_id=1') == [('Newb', 0, True)]
+    assert search(client, 'game_id=2') == [('Nerf', 0, True)]
+    assert search_result_cache.stats()['hits'] == hits + 1
@@ -0,0 +1,154 @@
+import threading
+import time
+
+from search_index import GameSearchIndex, NGramIndex, PrefixTrie, RandomSampleIndex, WordSuggestionIndex
+
+
+def test_prefix_trie_finds_and_forgets_keys():
+    trie = PrefixTrie()
+    trie.add('Zelda', 1)
+    trie.add('Zork', 2)
+
+    assert trie.find('z') == {1, 2}
+    assert trie.find('ZEL') == {1}
+    trie.remove('Zelda', 1)
+    assert trie.find('z') == {2}
+    assert trie.find('x') == set()
+
+
+def test_ngram_index_matches_substrings():
+    ngrams = NGramIndex()
+    ngrams.add('Super Mario Bros.', 1)
+    ngrams.add('Mario Kart', 2)
+    ngrams.add('Marathon', 3)
+
+    assert ngrams.find('mario') == {1, 2}
+    assert ngrams.find('ar') == {1, 2, 3}
+    assert ngrams.find('o b') == {1}
+    ngrams.remove('Mario Kart', 2)
+    assert ngrams.find('kart') == set()
+
+
+def test_game_search_index_reindexes_renamed_games():
+    index = GameSearchIndex(max_age=60)
+    index.build([{'id': 1, 'name': 'Doom'}, {'id': 2, 'name': None}])
+    index.add({'id': 1, 'name': 'Quake'})
+
+    assert len(index) == 1
+    assert index.search(starts_with='do') == []
+    assert index.search(name='uak') == [{'id': 1, 'name': 'Quake'}]
+    assert not index.is_stale
+
+
+def test_word_suggestions_group_definitions_and_rank_by_votes():
+    index = WordSuggestionIndex(max_age=60)
+    index.build([(1, 'GG', 3), (2, 'gg', 4), (3, 'Gank', 5), (4, 'Grind', -1)])
+
+    assert index.suggest('g', 2) == [{'word': 'GG', 'score': 7}, {'word': 'Gank', 'score': 5}]
+    index.remove(1)
+    index.upsert(3, 'Gank', 0)
+    assert index.suggest('g', 3) == [{'word': 'GG', 'score': 4}, {'word': 'Gank', 'score': 0}, {'word': 'Grind', 'score': -1}]
+    index.remove(2)
+    assert index.suggest('gg', 3) == []
+
+
+def test_random_sample_index_samples_groups_without_repeats():
+    index = RandomSampleIndex(max_age=60)
+    index.build([(1, 'halo'), (2, 'halo'), (3, 'doom')])
+
+    assert sorted(index.sample(5)) == [1, 2, 3]
+    assert sorted(index.sample(5, 'halo')) == [1, 2]
+    assert index.sample(5, 'halo', exclude=[1]) == [2]
+    index.remove(1)
+    index.add(3, 'halo')
+    assert sorted(index.sample(5, 'halo')) == [2, 3]
+    assert index.sample(5, 'doom') == []
+
+
+def test_concurrent_callers_share_one_rebuild():
+    release = threading.Event()
+    loads = []
+
+    def load():
+        loads.append(1)
+        release.wait(5)
+        return [{'id': 1, 'name': 'Doom'}]
+
+    index = GameSearchIndex(max_age=60, loader=load)
+    threads = [threading.Thread(target=index.ensure_fresh) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert index.search(starts_with='do') == [{'id': 1, 'name': 'Doom'}]
+
+
+def test_expired_index_keeps_serving_while_one_background_refresh_runs():
+    release = threading.Event()
+    loads = []
+
+    def load():
+        loads.append(1)
+        release.wait(5)
+        return [(1, 'Nerf', 2)]
+
+    index = WordSuggestionIndex(max_age=0, loader=load)
+    index.build([(1, 'Noob', 1)])
+
+    index.ensure_fresh()
+    index.ensure_fresh()
+    assert index.suggest('n', 5) == [{'word': 'Noob', 'score': 1}]
+
+    release.set()
+    for _ in range(500):
+        if index.suggest('n', 5) != [{'word': 'Noob', 'score': 1}]:
+            break
+        time.sleep(0.01)
+    assert index.suggest('n', 5) == [{'word': 'Nerf', 'score': 2}]
+    assert len(loads) == 1
+
+
+def test_changes_made_while_loading_survive_the_swap():
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load():
+        loading.set()
+        release.wait(5)
+        return [(1, 'Nerf', 2), (2, 'Noob', 1)]
+
+    index = WordSuggestionIndex(max_age=60, loader=load)
+    index.build([(1, 'Nerf', 2), (2, 'Noob', 1)])
+    thread = threading.Thread(target=index.rebuild)
+    thread.start()
+    loading.wait(5)
+    index.remove(1)
+    index.upsert(3, 'Ninja', 5)
+    release.set()
+    thread.join()
+
+    assert index.suggest('n', 5) == [{'word': 'Ninja', 'score': 5}, {'word': 'Noob', 'score': 1}]
+    assert index.is_built
+
+
+def test_invalidate_while_loading_leaves_the_index_stale():
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load():
+        loading.set()
+        release.wait(5)
+        return [(1, 'halo')]
+
+    index = RandomSampleIndex(max_age=60, loader=load)
+    thread = threading.Thread(target=index.ensure_fresh)
+    thread.start()
+    loading.wait(5)
+    index.invalidate()
+    release.set()
+    thread.join()
+
+    assert not index.is_built
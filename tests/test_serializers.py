@@ -0,0 +1,82 @@
+from datetime import datetime
+from flask import json
+from marshmallow import Schema, fields, post_dump
+from sqlalchemy import select
+
+import serializers
+from db import db
+from models import UserModel, WordModel
+from schemas import WordSchema, WordWithUsernameSchema
+from serializers import compile_schema
+
+
+def assert_same_dump(schema, data):
+    compiled = compile_schema(schema)(data)
+    assert compiled == schema.dump(data)
+    # Same keys, values and types, so the JSON is byte for byte the same.
+    assert json.dumps(compiled) == json.dumps(schema.dump(data))
+
+
+def test_compiled_dump_matches_marshmallow_for_models_and_rows(app, add_user, add_word):
+    author = add_user('tëster')
+    add_word('Gänk', author, definition='Ambush — a lone player.', upvotes=3)
+    add_word('Nerf', author, published=False, downvotes=2)
+
+    assert_same_dump(WordSchema(many=True), db.session.scalars(select(WordModel)).all())
+    with db.engine.connect() as connection:
+        rows = connection.execute(select(WordModel, UserModel.username.label('author_username')).join(UserModel)).all()
+    assert_same_dump(WordWithUsernameSchema(many=True), rows)
+
+
+def test_compiled_dump_matches_marshmallow_for_dicts():
+    words = [
+        {'word_id': 1, 'word': 'Buff', 'is_active': True, 'submit_datetime': datetime(2025, 1, 1, 12, 30),
+         'user': {'user_id': 2, 'username': 'tester', 'email': None}},
+        {'word_id': '3', 'word': None, 'user': None, 'author_username': 'someone'},
+        {}
+    ]
+
+    assert_same_dump(WordWithUsernameSchema(many=True), words)
+    assert_same_dump(WordWithUsernameSchema(), words[0])
+
+
+def test_schemas_with_dump_hooks_are_left_to_marshmallow():
+    class ShoutSchema(Schema):
+        word = fields.Str()
+
+        @post_dump
+        def shout(self, data, **kwargs):
+            return {'word': data['word'].upper()}
+
+    schema = ShoutSchema(many=True)
+
+    assert compile_schema(schema) == schema.dump
+    assert compile_schema(schema)([{'word': 'gg'}]) == [{'word': 'GG'}]
+
+
+def test_list_endpoints_keep_their_output(app, client, add_user, add_word):
+    author = add_user()
+    for word in ['Buff', 'Aggro', 'Nerf']:
+        add_word(word, author)
+
+    response = client.get('/words/search?limit=2')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert 'X-Next-Cursor' in response.headers
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            select(WordModel, UserModel.username.label('author_username')).join(UserModel).order_by(WordModel.word_lower).limit(2)
+        ).all()
+    assert response.data == app.json.response(WordWithUsernameSchema(many=True).dump(rows)).data
+
+
+def test_orjson_output_parses_the_same(client, add_user, add_word, monkeypatch):
+    add_word('Gänk', add_user())
+    expected = client.get('/words/search').json
+
+    monkeypatch.setattr(serializers, 'use_orjson', True)
+    response = client.get('/words/search')
+
+    assert response.status_code == 200
+    assert response.json == expected
@@ -0,0 +1,44 @@
+from sqlalchemy import update
+
+from db import db
+from models import WordModel, reconcile_site_counters
+
+
+def test_stats_follow_inserts_and_soft_deletes(client, add_user, add_word):
+    author = add_user()
+    add_word('Noob', author, game_id=1)
+    add_word('Nerf', author, game_id=2)
+    add_word('Buff', author, game_id=2, published=False)
+    deleted = add_word('GG', author, game_id=1)
+
+    deleted.is_active = False
+    db.session.commit()
+
+    assert client.get('/stats').json == {
+        'game_count': 2,
+        'word_count': 4,
+        'user_count': 1,
+        'active_word_count': 3,
+        'published_word_count': 2
+    }
+
+
+def test_stats_answers_matching_etag_with_304(client, add_user, add_word):
+    add_word('Noob', add_user())
+    response = client.get('/stats')
+
+    assert client.get('/stats', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    add_word('Nerf', add_user('other'))
+    assert client.get('/stats', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+
+def test_reconcile_corrects_writes_that_bypass_the_orm(client, add_user, add_word):
+    add_word('Noob', add_user(), published=False)
+    db.session.execute(update(WordModel).values(published=True))
+    db.session.commit()
+    assert client.get('/stats').json['published_word_count'] == 0
+
+    reconcile_site_counters(db.session)
+
+    assert client.get('/stats').json['published_word_count'] == 1
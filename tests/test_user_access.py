@@ -0,0 +1,90 @@
+import pytest
+
+from flask_jwt_extended import create_refresh_token, decode_token
+from sqlalchemy import update
+
+from db import db
+from models import RoleModel, UserModel, user_access_cache
+from models.site_counter import USER_ACCESS_VERSION, count_user_access_change, read_counter
+import models.user_access
+
+
+def refresh(client, app, user):
+    with app.app_context():
+        token = create_refresh_token(identity=str(user.user_id))
+    client.set_cookie('refresh_token_cookie', token)
+    return client.get('/refresh')
+
+
+@pytest.fixture
+def no_database(monkeypatch):
+    def fail():
+        monkeypatch.setattr(models.user_access, 'load_user_access', lambda user_ids: pytest.fail('user access loaded from the database'))
+    return fail
+
+
+def test_refresh_is_served_from_cache(client, app, add_user, no_database):
+    user = add_user('player')
+    assert refresh(client, app, user).status_code == 200
+
+    no_database()
+    response = refresh(client, app, user)
+
+    assert response.status_code == 200
+    assert response.json['username'] == 'player'
+
+
+def test_activity_and_role_changes_invalidate_cache(client, app, add_user):
+    user = add_user('player')
+    refresh(client, app, user)
+
+    db.session.add(RoleModel(user_id=user.user_id, admin=True))
+    db.session.commit()
+    response = refresh(client, app, user)
+    with app.app_context():
+        assert decode_token(response.json['access_token'])['is_admin'] is True
+
+    user.is_active = False
+    db.session.commit()
+    assert refresh(client, app, user).status_code == 403
+
+
+def test_admins_are_preloaded(app, add_user):
+    admin = add_user('admin')
+    add_user('player')
+    db.session.add(RoleModel(user_id=admin.user_id, admin=True))
+    db.session.commit()
+    user_access_cache.clear()
+
+    models.preload_admin_access()
+
+    assert user_access_cache.get(admin.user_id) == models.UserAccess(True, True, 'admin')
+    assert len(user_access_cache) == 1
+
+
+def test_changes_made_by_other_workers_are_seen_after_the_check_interval(client, app, add_user, monkeypatch):
+    monkeypatch.setattr(models.user_access.user_access_version, 'interval', 0)
+    user = add_user('player')
+    assert refresh(client, app, user).status_code == 200
+
+    # Another worker freezes the account: the row and the version change, but this worker's cache isn't told.
+    db.session.execute(update(UserModel).where(UserModel.user_id == user.user_id).values(is_active=False))
+    count_user_access_change(db.session.connection())
+    db.session.commit()
+
+    assert refresh(client, app, user).status_code == 403
+
+
+def test_only_changes_to_existing_users_and_roles_bump_the_version(app, add_user):
+    user = add_user('player')
+    assert read_counter(USER_ACCESS_VERSION) == 0
+
+    user.username = user.username
+    db.session.commit()
+    assert read_counter(USER_ACCESS_VERSION) == 0
+
+    db.session.add(RoleModel(user_id=user.user_id, admin=True))
+    db.session.commit()
+    user.is_active = False
+    db.session.commit()
+    assert read_counter(USER_ACCESS_VERSION) == 2
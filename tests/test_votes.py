@@ -0,0 +1,64 @@
+import pytest
+
+from db import db
+from models import WordModel, word_suggestion_index
+from votes import VoteAggregator
+
+
+def vote(client, word_id, **actions):
+    return client.post('/words/vote', json={'word_id': word_id, **actions})
+
+
+def test_vote_increments_and_never_goes_below_zero(client, add_user, add_word):
+    word = add_word('Noob', add_user(), upvotes=1)
+
+    assert vote(client, word.word_id, upvote_action='increment', downvote_action='decrement').json == \
+        {'word_id': word.word_id, 'upvotes': 2, 'downvotes': 0}
+    assert vote(client, word.word_id, upvote_action='decrement', downvote_action='increment').json == \
+        {'word_id': word.word_id, 'upvotes': 1, 'downvotes': 1}
+    db.session.expire_all()
+    assert (word.upvotes, word.downvotes) == (1, 1)
+
+
+def test_vote_rejects_bad_actions_and_missing_words(client, add_user, add_word):
+    word = add_word('Noob', add_user(), is_active=False)
+
+    assert vote(client, word.word_id, upvote_action='increment').status_code == 404
+    assert vote(client, word.word_id, upvote_action='sideways').status_code == 400
+    assert vote(client, word.word_id, upvote_action='increment', downvote_action='increment').status_code == 400
+
+
+def test_vote_updates_suggestion_scores(client, add_user, add_word):
+    word = add_word('Noob', add_user(), upvotes=1)
+    client.get('/words/suggest?prefix=n')
+
+    vote(client, word.word_id, upvote_action='increment')
+
+    assert word_suggestion_index.suggest('n', 1) == [{'word': 'Noob', 'score': 2}]
+
+
+@pytest.fixture
+def aggregator(app, monkeypatch):
+    import resources.word
+    aggregator = VoteAggregator(interval=60)
+    aggregator.start(app)
+    monkeypatch.setattr(resources.word, 'vote_aggregator', aggregator)
+    yield aggregator
+    aggregator.stop()
+
+
+def test_write_behind_buffers_votes_until_flush(client, add_user, add_word, aggregator):
+    word = add_word('Noob', add_user())
+
+    for _ in range(3):
+        response = vote(client, word.word_id, upvote_action='increment')
+    vote(client, word.word_id, downvote_action='decrement')
+
+    assert response.json == {'word_id': word.word_id, 'upvotes': 3, 'downvotes': 0}
+    assert db.session.scalar(db.select(WordModel.upvotes).where(WordModel.word_id == word.word_id)) == 0
+    assert aggregator.stats()['pending_words'] == 1
+
+    aggregator.stop()
+
+    assert db.session.scalar(db.select(WordModel.upvotes).where(WordModel.word_id == word.word_id)) == 3
+    assert aggregator.stats()['flushes'] == 1
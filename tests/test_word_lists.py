@@ -0,0 +1,40 @@
+from flask_jwt_extended import create_access_token
+
+
+def test_word_list_loads_authors_with_the_words(client, add_user, add_word, query_budget):
+    for index in range(5):
+        add_word(f'Word {index}', add_user(f'author{index}'))
+
+    with query_budget(1):
+        response = client.get('/words')
+
+    assert response.status_code == 200
+    assert sorted(word['user']['username'] for word in response.json) == [f'author{index}' for index in range(5)]
+
+
+def test_my_words_loads_the_author_with_the_words(app, client, add_user, add_word, query_budget):
+    author = add_user()
+    for word in ['Buff', 'Nerf', 'Gank']:
+        add_word(word, author)
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(author.user_id))}'}
+    # Warm the token revocation filter, which is loaded on the first authenticated request.
+    client.get('/words/mywords', headers=headers)
+
+    with query_budget(1):
+        response = client.get('/words/mywords', headers=headers)
+
+    assert response.status_code == 200
+    assert {word['user']['username'] for word in response.json} == {'tester'}
+
+
+def test_query_budget_reports_requests_over_budget(client, add_user, add_word, query_budget):
+    add_word('Buff', add_user('one'))
+    add_word('Nerf', add_user('two'))
+
+    try:
+        with query_budget(0):
+            client.get('/words')
+    except AssertionError as error:
+        assert 'GET /words ran 1 SQL statements, over its budget of 0' in str(error)
+    else:
+        raise AssertionError('the budget was not enforced')
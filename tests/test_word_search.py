@@ -0,0 +1,143 @@
+import models.word_search
+
+from db import db
+from pagination import encode_cursor
+
+
+def test_fulltext_search_ranks_word_matches_first(client, add_user, add_word):
+    author = add_user()
+    add_word('Camping', author, definition='Waiting in one spot for enemies to walk by.', example='Stop camping the spawn.')
+    add_word('Spawn camping', author, definition='Camping right where players respawn.', example='They were spawn camping all game.')
+    add_word('Nerf', author, definition='To weaken a character or item.', example='They nerfed my main.')
+
+    response = client.get('/words/search?word=spawn&fulltext=true')
+
+    assert response.status_code == 200
+    assert [word['word'] for word in response.json] == ['Spawn camping', 'Camping']
+    assert response.json[0]['author_username'] == 'tester'
+
+
+def test_fulltext_search_drops_soft_deleted_and_edited_words(client, add_user, add_word):
+    author = add_user()
+    deleted_word = add_word('Gank', author, definition='Ambush a lone player.')
+    edited_word = add_word('Smurf', author, definition='An experienced player on a new account.')
+
+    deleted_word.is_active = False
+    edited_word.definition = 'A veteran on a fresh account.'
+    db.session.commit()
+
+    assert client.get('/words/search?word=ambush&fulltext=true').json == []
+    assert client.get('/words/search?word=experienced&fulltext=true').json == []
+    assert [word['word'] for word in client.get('/words/search?word=veteran&fulltext=true').json] == ['Smurf']
+
+
+def test_fulltext_search_treats_input_literally(client, add_user, add_word):
+    add_word('GG "EZ"', add_user())
+
+    response = client.get('/words/search?word=ez" OR &fulltext=true')
+
+    assert response.status_code == 200
+
+
+def test_fulltext_search_requires_word(client):
+    assert client.get('/words/search?fulltext=true').status_code == 400
+
+
+def test_search_pages_with_cursor(client, add_user, add_word):
+    author = add_user()
+    for word in ['Buff', 'Aggro', 'Nerf', 'Carry', 'Gank']:
+        add_word(word, author)
+
+    first_page = client.get('/words/search?limit=2')
+    second_page = client.get(f'/words/search?limit=2&cursor={first_page.headers["X-Next-Cursor"]}')
+    third_page = client.get(f'/words/search?limit=2&cursor={second_page.headers["X-Next-Cursor"]}')
+
+    assert [word['word'] for word in first_page.json] == ['Aggro', 'Buff']
+    assert [word['word'] for word in second_page.json] == ['Carry', 'Gank']
+    assert [word['word'] for word in third_page.json] == ['Nerf']
+    assert 'X-Next-Cursor' not in third_page.headers
+
+
+def test_search_rejects_bad_cursors(client):
+    assert client.get('/words/search?cursor=not-a-cursor').status_code == 400
+    assert client.get('/words/search?cursor=e30&offset=2').status_code == 400
+    for position in [
+        {'word_lower': ['x'], 'word_id': {'a': 1}},
+        {'word_lower': 'x', 'word_id': 'zz'},
+        {'word_lower': 'x', 'word_id': True},
+        {'word_lower': 'x', 'word_id': -1},
+        {'word_lower': 1, 'word_id': 1}
+    ]:
+        assert client.get(f'/words/search?cursor={encode_cursor(position)}').status_code == 400
+
+
+def test_search_caps_page_size(client, add_user, add_word):
+    author = add_user()
+    for i in range(105):
+        add_word(f'word{i:03}', author)
+
+    response = client.get('/words/search?limit=1000')
+
+    assert len(response.json) == 100
+
+
+def test_starts_with_uses_normalized_columns(client, add_user, add_word):
+    author = add_user()
+    for word in ['ggez', 'GG', 'Git gud', 'gank', '1v1', '#teamwork', 'Ace']:
+        add_word(word, author)
+
+    letter_page = client.get('/words/search?startsWith=G&limit=10')
+    prefix_page = client.get('/words/search?startsWith=gG&limit=10')
+    symbol_page = client.get('/words/search?startsWith=*&limit=10')
+
+    assert [word['word'] for word in letter_page.json] == ['gank', 'GG', 'ggez', 'Git gud']
+    assert [word['word'] for word in prefix_page.json] == ['GG', 'ggez']
+    assert [word['word'] for word in symbol_page.json] == ['#teamwork', '1v1']
+
+
+def test_renamed_word_moves_bucket(client, add_user, add_word):
+    word = add_word('Noob', add_user())
+
+    word.word = 'Bot'
+    db.session.commit()
+
+    assert (word.word_lower, word.first_char_bucket) == ('bot', 'b')
+    assert [word['word'] for word in client.get('/words/search?startsWith=b').json] == ['Bot']
+
+
+def test_fuzzy_search_tolerates_typos(client, add_user, add_word):
+    author = add_user()
+    add_word('Nerf', author)
+    add_word('ggez', author)
+    add_word('Buff', author)
+
+    assert [word['word'] for word in client.get('/words/search?word=nurf&fuzzy=true').json] == ['Nerf']
+    assert [word['word'] for word in client.get('/words/search?word=gg ez&fuzzy=true').json] == ['ggez']
+    assert client.get('/words/search?word=nurf&fuzzy=true&threshold=0.9').json == []
+
+
+def test_filtered_fuzzy_search_looks_past_the_top_candidates(client, add_user, add_word, monkeypatch):
+    monkeypatch.setattr(models.word_search, 'max_fuzzy_candidates', 2)
+    author = add_user()
+    add_word('Nerf', author, game_id=1)
+    add_word('Nerfs', author, game_id=1)
+    add_word('Nerfed', author, game_id=2)
+    add_word('Nerfing', author, game_id=2)
+
+    response = client.get('/words/search?word=nerf&fuzzy=true&game_id=2')
+    second_page = client.get('/words/search?word=nerf&fuzzy=true&game_id=2&limit=1&offset=1')
+
+    assert [word['word'] for word in response.json] == ['Nerfed', 'Nerfing']
+    assert [word['word'] for word in second_page.json] == ['Nerfing']
+
+
+def test_fuzzy_index_follows_word_changes(client, add_user, add_word):
+    author = add_user()
+    word = add_word('Nerf', author)
+    assert len(client.get('/words/search?word=nurf&fuzzy=true').json) == 1
+
+    word.is_active = False
+    db.session.commit()
+    add_word('Nurfed', author)
+
+    assert [word['word'] for word in client.get('/words/search?word=nurf&fuzzy=true').json] == ['Nurfed']
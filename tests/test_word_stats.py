@@ -0,0 +1,75 @@
+from sqlalchemy import select, update
+
+from db import db
+from models import AuthorWordStatsModel, GameWordStatsModel, WordModel, reconcile_word_stats
+
+
+def vote(client, word_id, **actions):
+    return client.post('/words/vote', json={'word_id': word_id, **actions})
+
+
+def stats_rows():
+    return [
+        (row.game_id, row.word_count, row.upvotes, row.downvotes, row.top_word_id, row.top_word_score)
+        for row in db.session.scalars(select(GameWordStatsModel).order_by(GameWordStatsModel.game_id))
+    ]
+
+
+def test_game_stats_track_adds_votes_and_deletes(client, add_user, add_word):
+    author = add_user()
+    noob = add_word('Noob', author, upvotes=2)
+    nerf = add_word('Nerf', author, upvotes=1)
+    add_word('Buff', author, upvotes=9, published=False)
+
+    response = client.get('/games/1/stats')
+    assert response.json['word_count'] == 2
+    assert (response.json['upvotes'], response.json['downvotes']) == (3, 0)
+    assert response.json['top_word']['word'] == 'Noob'
+
+    vote(client, nerf.word_id, upvote_action='increment')
+    vote(client, nerf.word_id, upvote_action='increment')
+    assert client.get('/games/1/stats').json['top_word']['word'] == 'Nerf'
+
+    nerf.is_active = False
+    db.session.commit()
+    response = client.get('/games/1/stats')
+    assert (response.json['word_count'], response.json['upvotes']) == (1, 2)
+    assert response.json['top_word']['word_id'] == noob.word_id
+
+
+def test_user_stats_cover_words_across_games(client, add_user, add_word):
+    author = add_user('writer')
+    add_word('Noob', author, game_id=1, upvotes=1, downvotes=1)
+    add_word('Nerf', author, game_id=2, upvotes=4)
+    add_word('GG', add_user('other'), game_id=2, upvotes=7)
+
+    response = client.get('/users/writer/stats')
+
+    assert (response.json['word_count'], response.json['upvotes'], response.json['downvotes']) == (2, 5, 1)
+    assert response.json['top_word']['word'] == 'Nerf'
+    assert db.session.get(AuthorWordStatsModel, author.user_id).top_word_score == 4
+
+
+def test_stats_for_games_and_users_without_words(client, add_user, add_word):
+    add_user('lurker')
+    add_word('Noob', add_user(), game_id=3, is_active=False)
+
+    assert client.get('/games/3/stats').json == {'word_count': 0, 'upvotes': 0, 'downvotes': 0, 'top_word': None}
+    assert client.get('/users/lurker/stats').json['word_count'] == 0
+    assert client.get('/games/99/stats').status_code == 404
+    assert client.get('/users/nobody/stats').status_code == 404
+
+
+def test_reconcile_matches_incremental_stats(client, add_user, add_word):
+    author = add_user()
+    add_word('Noob', author, game_id=1, upvotes=3)
+    add_word('Nerf', author, game_id=1, upvotes=5, downvotes=4)
+    add_word('Buff', author, game_id=2, downvotes=2)
+    add_word('Nade', author, game_id=2, published=False)
+    incremental = stats_rows()
+
+    db.session.execute(update(WordModel).where(WordModel.word == 'Nade').values(published=True, upvotes=1))
+    reconcile_word_stats(db.session)
+
+    nade_id = db.session.scalar(select(WordModel.word_id).where(WordModel.word == 'Nade'))
+    assert stats_rows() == [incremental[0], (2, 2, 1, 2, nade_id, 1)]
@@ -0,0 +1,33 @@
+from db import db
+from models import word_suggestion_index
+
+
+def test_suggest_ranks_distinct_words_by_votes(client, add_user, add_word):
+    author = add_user()
+    add_word('Noob', author, upvotes=2)
+    add_word('noob', author, upvotes=5, downvotes=1)
+    add_word('Nerf', author, upvotes=4)
+    add_word('Nade', author, upvotes=9, published=False)
+    add_word('Buff', author, upvotes=9)
+
+    response = client.get('/words/suggest?prefix=n')
+
+    assert response.status_code == 200
+    assert response.json == [{'word': 'Noob', 'score': 6}, {'word': 'Nerf', 'score': 4}]
+
+
+def test_suggest_follows_commits_without_querying(client, add_user, add_word, monkeypatch):
+    author = add_user()
+    nerf = add_word('Nerf', author)
+    client.get('/words/suggest?prefix=n')
+    monkeypatch.setattr(word_suggestion_index, 'loader', lambda: (_ for _ in ()).throw(AssertionError('index rebuilt')))
+
+    add_word('Ninja', author, upvotes=3)
+    nerf.is_active = False
+    db.session.commit()
+
+    assert client.get('/words/suggest?prefix=n').json == [{'word': 'Ninja', 'score': 3}]
+
+
+def test_suggest_requires_prefix(client):
+    assert client.get('/words/suggest').status_code == 422
@@ -0,0 +1,179 @@
+import atexit
+import logging
+import os
+import threading
+
+from sqlalchemy import bindparam, case, select, update
+from time import monotonic
+
+from db import db
+from models import WordModel, WordChange, apply_word_stats, count_search_result_changes, notify_word_changes
+from models.word_changes import TRACKED_FIELDS
+
+
+logger = logging.getLogger(__name__)
+
+words_table = WordModel.__table__
+
+
+def _tracked_columns():
+    return [getattr(WordModel, field) for field in TRACKED_FIELDS]
+
+
+def _change_from(after: dict, upvote_delta: int, downvote_delta: int) -> WordChange:
+    before = dict(after, upvotes=after['upvotes'] - upvote_delta, downvotes=after['downvotes'] - downvote_delta)
+    return WordChange(after['word_id'], before, after)
+
+
+def apply_vote(word_id: int, upvote_delta: int, downvote_delta: int) -> dict | None:
+    '''Atomically add the deltas to an active word's vote counts in the database, never letting a count drop below zero.
+
+    Returns the new counts, or None if there is no active word with that id.
+    '''
+    for attempt in range(3):
+        statement = update(WordModel).where(
+            WordModel.word_id == word_id,
+            WordModel.is_active.is_(True),
+            WordModel.upvotes + upvote_delta >= 0,
+            WordModel.downvotes + downvote_delta >= 0
+        ).values(
+            upvotes=WordModel.upvotes + upvote_delta,
+            downvotes=WordModel.downvotes + downvote_delta
+        ).returning(*_tracked_columns()).execution_options(synchronize_session=False)
+        row = db.session.execute(statement).first()
+        if row is not None:
+            after = row._asdict()
+            changes = [_change_from(after, upvote_delta, downvote_delta)]
+            apply_word_stats(db.session.connection(), changes)
+            count_search_result_changes(db.session.connection(), changes)
+            db.session.commit()
+            notify_word_changes(changes)
+            return {'word_id': word_id, 'upvotes': after['upvotes'], 'downvotes': after['downvotes']}
+
+        # Either the word doesn't exist or a decrement would go below zero; drop the decrements that can't apply.
+        current = db.session.execute(
+            select(WordModel.upvotes, WordModel.downvotes).where(WordModel.word_id == word_id, WordModel.is_active.is_(True))
+        ).first()
+        db.session.rollback()
+        if current is None:
+            return None
+        upvote_delta = upvote_delta if current.upvotes + upvote_delta >= 0 else 0
+        downvote_delta = downvote_delta if current.downvotes + downvote_delta >= 0 else 0
+        if upvote_delta == 0 and downvote_delta == 0:
+            break
+    return {'word_id': word_id, 'upvotes': current.upvotes, 'downvotes': current.downvotes}
+
+
+class VoteAggregator:
+    '''Write-behind buffer for votes. Deltas are summed per word in memory and written in one batched UPDATE per interval.'''
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.enabled = False
+        self._app = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._votes = 0
+        self._flushes = 0
+        self._flushed_words = 0
+        self._flush_failures = 0
+        self._last_flush_seconds = None
+
+    def start(self, app):
+        self._app = app
+        self.enabled = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='vote-aggregator', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        '''Stop the background flusher and drain whatever is still buffered.'''
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        self.enabled = False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def add(self, word_id: int, upvote_delta: int, downvote_delta: int) -> dict | None:
+        '''Buffer a vote and return the counts it will produce, or None if there is no active word with that id.'''
+        current = db.session.execute(
+            select(WordModel.upvotes, WordModel.downvotes).where(WordModel.word_id == word_id, WordModel.is_active.is_(True))
+        ).first()
+        if current is None:
+            return None
+        with self._lock:
+            pending_upvotes, pending_downvotes = self._pending.get(word_id, (0, 0))
+            upvotes = current.upvotes + pending_upvotes
+            downvotes = current.downvotes + pending_downvotes
+            upvote_delta = upvote_delta if upvotes + upvote_delta >= 0 else 0
+            downvote_delta = downvote_delta if downvotes + downvote_delta >= 0 else 0
+            if upvote_delta or downvote_delta:
+                self._pending[word_id] = (pending_upvotes + upvote_delta, pending_downvotes + downvote_delta)
+                self._votes += 1
+        return {'word_id': word_id, 'upvotes': upvotes + upvote_delta, 'downvotes': downvotes + downvote_delta}
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            started_at = monotonic()
+            try:
+                with self._app.app_context():
+                    self._write(pending)
+            except Exception:
+                logger.exception('Flushing buffered votes failed')
+                with self._lock:
+                    self._flush_failures += 1
+                    for word_id, (upvote_delta, downvote_delta) in pending.items():
+                        pending_upvotes, pending_downvotes = self._pending.get(word_id, (0, 0))
+                        self._pending[word_id] = (pending_upvotes + upvote_delta, pending_downvotes + downvote_delta)
+                return
+            with self._lock:
+                self._flushes += 1
+                self._flushed_words += len(pending)
+                self._last_flush_seconds = monotonic() - started_at
+
+    def _write(self, pending: dict):
+        new_upvotes = words_table.c.upvotes + bindparam('b_upvotes')
+        new_downvotes = words_table.c.downvotes + bindparam('b_downvotes')
+        statement = words_table.update().where(words_table.c.word_id == bindparam('b_word_id')).values(
+            upvotes=case((new_upvotes < 0, 0), else_=new_upvotes),
+            downvotes=case((new_downvotes < 0, 0), else_=new_downvotes)
+        )
+        db.session.execute(statement, [
+            {'b_word_id': word_id, 'b_upvotes': upvote_delta, 'b_downvotes': downvote_delta}
+            for word_id, (upvote_delta, downvote_delta) in pending.items()
+        ])
+        rows = db.session.execute(select(*_tracked_columns()).where(WordModel.word_id.in_(pending)))
+        changes = [_change_from(row._asdict(), *pending[row.word_id]) for row in rows]
+        apply_word_stats(db.session.connection(), changes)
+        count_search_result_changes(db.session.connection(), changes)
+        db.session.commit()
+        notify_word_changes(changes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending_words': len(self._pending),
+                'buffered_votes': self._votes,
+                'flushes': self._flushes,
+                'flushed_words': self._flushed_words,
+                'flush_failures': self._flush_failures,
+                'last_flush_seconds': self._last_flush_seconds
+            }
+
+
+vote_aggregator = VoteAggregator(interval=float(os.getenv('VOTE_FLUSH_INTERVAL_MS', 250)) / 1000)